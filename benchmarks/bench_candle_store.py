@@ -0,0 +1,35 @@
+"""Reload of five years of hourly bars for 100 coins from the local candle store
+
+Run from the repo root: python -m benchmarks.bench_candle_store
+"""
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from extlib.candle_store import CandleStore
+
+
+def main(n_coins=100, years=5):
+    n = years * 365 * 24
+    ts = pd.date_range('2016-01-01', periods=n, freq='h')
+    rng = np.random.default_rng(0)
+
+    with tempfile.TemporaryDirectory() as root:
+        store = CandleStore(root)
+        symbols = [f't{i:03d}USD' for i in range(n_coins)]
+        for symbol in symbols:
+            close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+            df = pd.DataFrame({'TS': ts, 'OPEN': close, 'CLOSE': close, 'HIGH': close, 'LOW': close, 'VOLUME': close})
+            store.append('bfx', symbol, '1h', df)
+
+        st = time.perf_counter()
+        df = store.read_many('bfx', symbols, '1h')
+        elapsed = time.perf_counter() - st
+
+    print(f'{len(df):,} bars for {n_coins} coins loaded in {elapsed * 1000:.0f} ms')
+
+
+if __name__ == '__main__':
+    main()
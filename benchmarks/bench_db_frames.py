@@ -0,0 +1,76 @@
+"""Load time and peak memory of a year of trades, pd.DataFrame(list(cursor)) vs projected columnar loading
+
+Needs a local mongod, or MONGODB_CLIENT pointing to a test server. Writes to and drops a scratch collection.
+
+Run from the repo root: python -m benchmarks.bench_db_frames
+"""
+import os
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+os.environ.setdefault('MONGODB_CLIENT', 'mongodb://localhost:27017')
+os.environ.setdefault('RYO_DB', 'ryo_bench')
+os.environ.setdefault('SLACK_KEY', '')
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from db_models.connect_ryo import close_clients, get_mongo_client  # noqa: E402
+from db_models.frames import cursor_to_df, projection  # noqa: E402
+
+COLLECTION = 'bench_frames'
+FIELDS = ['dateTime', 'coin', 'qty', 'px']
+DTYPES = {'dateTime': 'datetime64[ns]', 'coin': 'category', 'qty': 'float64', 'px': 'float64'}
+
+
+def make_trades(n, lo, hi):
+    """Trades lo to hi of n spread over a year, with the extra fields a stored trade carries"""
+    rng = np.random.default_rng(lo)
+    start = datetime(2020, 1, 1)
+    step = 365 * 86400 / n
+    qty, px = rng.normal(size=hi - lo), rng.uniform(1, 1e4, hi - lo)
+    return [{'strat': 'BENCH', 'dateTime': start + timedelta(seconds=i * step), 'coin': f'COIN{i % 30:02d}USD',
+             'qty': float(qty[i - lo]), 'px': float(px[i - lo]), 'fee': 0.002, 'feeCcy': 'USD',
+             'orderId': 10 ** 10 + i, 'tradeId': 10 ** 11 + i, 'exchange': 'bfx', 'maker': bool(i % 2),
+             'orderType': 'EXCHANGE LIMIT'} for i in range(lo, hi)]
+
+
+def _measure(load):
+    tracemalloc.start()
+    st = time.perf_counter()
+    df = load()
+    elapsed = time.perf_counter() - st
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return df, elapsed, peak / 2 ** 20
+
+
+def main(n=500000):
+    col = get_mongo_client()[COLLECTION]
+    col.drop()
+    for lo in range(0, n, 50000):
+        col.insert_many(make_trades(n, lo, min(lo + 50000, n)))
+    col.create_index([('strat', 1), ('dateTime', -1)])
+
+    try:
+        query = {'strat': 'BENCH'}
+        runs = {
+            'list of dicts': lambda: pd.DataFrame(list(col.find(query))),
+            'columnar, all fields': lambda: cursor_to_df(col.find(query)),
+            'columnar, projected': lambda: cursor_to_df(col.find(query, projection(FIELDS)), FIELDS, DTYPES),
+        }
+        print(f'{n:,} trades')
+        base = None
+        for name, load in runs.items():
+            df, elapsed, peak = _measure(load)
+            base = base if base else (elapsed, peak)
+            print(f'{name:22s} {elapsed:6.2f} s ({base[0] / elapsed:4.1f}x)  peak {peak:8.1f} MB '
+                  f'({base[1] / peak:4.1f}x)  frame {df.memory_usage(deep=True).sum() / 2 ** 20:8.1f} MB')
+    finally:
+        col.drop()
+        close_clients()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""Per-query latency of a new MongoClient per call (the old get_mongo_client) vs the shared pooled client
+
+Needs a local mongod, or MONGODB_CLIENT pointing to a test server. Writes to and drops a scratch collection.
+
+Run from the repo root: python -m benchmarks.bench_mongo
+"""
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+os.environ.setdefault('MONGODB_CLIENT', 'mongodb://localhost:27017')
+os.environ.setdefault('RYO_DB', 'ryo_bench')
+os.environ.setdefault('SLACK_KEY', '')
+
+import pymongo  # noqa: E402
+
+from db_models.connect_ryo import close_clients, get_mongo_client, pool_stats  # noqa: E402
+from settings import MONGO_CLIENT, MONGO_DB  # noqa: E402
+
+COLLECTION = 'bench_pool'
+
+
+def _new_client_db():
+    """get_mongo_client before pooling, closed here so the benchmark does not leak a pool per call"""
+    return pymongo.MongoClient(MONGO_CLIENT)[MONGO_DB]
+
+
+def _last_trade(db, strat):
+    return db[COLLECTION].find_one({'strat': strat}, sort=[('dateTime', pymongo.DESCENDING)])
+
+
+def _time_queries(n, pooled):
+    st = time.perf_counter()
+    for i in range(n):
+        db = get_mongo_client() if pooled else _new_client_db()
+        _last_trade(db, f'STRAT_{i % 10}')
+        if not pooled:
+            db.client.close()
+    return (time.perf_counter() - st) / n * 1000
+
+
+def main(n=200, threads=16):
+    db = get_mongo_client()
+    db[COLLECTION].drop()
+    start = datetime(2020, 1, 1)
+    db[COLLECTION].insert_many([{'strat': f'STRAT_{i % 10}', 'dateTime': start + timedelta(hours=i), 'qty': 1.0}
+                                for i in range(10000)])
+    db[COLLECTION].create_index([('strat', pymongo.ASCENDING), ('dateTime', pymongo.DESCENDING)])
+
+    try:
+        new_ms = _time_queries(n, pooled=False)
+        pooled_ms = _time_queries(n, pooled=True)
+        print(f'new client per query {new_ms:8.3f} ms/query')
+        print(f'shared pooled client {pooled_ms:8.3f} ms/query')
+        print(f'saved                {new_ms - pooled_ms:8.3f} ms/query ({new_ms / pooled_ms:.1f}x)')
+
+        st = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            list(executor.map(lambda i: _last_trade(get_mongo_client(), f'STRAT_{i % 10}'), range(n * 5)))
+        print(f'{threads} threads, shared client {(time.perf_counter() - st) / (n * 5) * 1000:8.3f} ms/query')
+        for address, stats in pool_stats().items():
+            print(address, stats)
+    finally:
+        db[COLLECTION].drop()
+        close_clients()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""Performance stats and monthly returns of 150 strategies on three years of hourly NAV, batch against looping the
+per-series functions
+
+Run from the repo root: python -m benchmarks.bench_portfolio
+"""
+import io
+import time
+
+import numpy as np
+import pandas as pd
+
+from extlib.portfolio import (annualised_return, annualised_vol, batch_perf_stats, calendar_returns_json,
+                              get_daily_stats, high_water_mark, max_drawdown, perf_per_month, sharpe_ratio)
+
+
+def make_navs(n_strats, years, freq='h'):
+    index = pd.date_range('2018-01-01', periods=years * 365 * 24, freq=freq)
+    rng = np.random.default_rng(0)
+    navs = np.exp(np.cumsum(rng.normal(0.0001, 0.005, (len(index), n_strats)), axis=0))
+    df_nav = pd.DataFrame(navs, index=index, columns=[f'strat_{i:03d}' for i in range(n_strats)])
+    # Strategies launched at different times
+    for i, start in enumerate(rng.integers(0, len(index) // 2, n_strats)):
+        df_nav.iloc[:start, i] = np.nan
+    return df_nav
+
+
+def loop_perf_stats(df_nav, timeframe):
+    stats = {}
+    for col in df_nav.columns:
+        nav = df_nav[col].dropna().rename('nav')
+        rets = nav / nav.shift(1) - 1
+        ann_ret = annualised_return(nav.iloc[-1] / nav.iloc[0] - 1, len(nav) - 1, timeframe)
+        ann_vol = annualised_vol(rets, nav.index[0], nav.index[-1], timeframe)
+        stats[col] = dict({'ann_ret': ann_ret, 'ann_vol': ann_vol, 'sharpe': sharpe_ratio(ann_ret, ann_vol),
+                           'hwm': high_water_mark(nav), 'max_dd': max_drawdown(nav)}, **get_daily_stats(nav))
+    return pd.DataFrame.from_dict(stats, orient='index')
+
+
+def main(n_strats=150, years=3, timeframe='1H'):
+    df_nav = make_navs(n_strats, years)
+    print(f'{len(df_nav):,} hourly NAVs x {n_strats} strategies')
+
+    st = time.perf_counter()
+    df_loop = loop_perf_stats(df_nav, timeframe)
+    t_loop = time.perf_counter() - st
+
+    st = time.perf_counter()
+    df_batch = batch_perf_stats(df_nav, timeframe)
+    t_batch = time.perf_counter() - st
+    print(f'loop: {t_loop:.2f} s, batch: {t_batch:.2f} s, speedup {t_loop / t_batch:.0f}x')
+
+    pd.testing.assert_frame_equal(df_batch[df_loop.columns], df_loop, check_dtype=False, rtol=1e-9)
+
+    st = time.perf_counter()
+    monthly_loop = {col: perf_per_month(df_nav[col].dropna().rename('nav')) for col in df_nav.columns}
+    t_loop = time.perf_counter() - st
+
+    st = time.perf_counter()
+    monthly_batch = calendar_returns_json(df_nav)
+    t_batch = time.perf_counter() - st
+    print(f'monthly returns loop: {t_loop:.2f} s, batch: {t_batch:.2f} s, speedup {t_loop / t_batch:.0f}x')
+
+    for col, js in monthly_loop.items():
+        pd.testing.assert_frame_equal(pd.read_json(io.StringIO(monthly_batch[col]), orient='index'),
+                                      pd.read_json(io.StringIO(js), orient='index'), rtol=1e-9)
+
+
+if __name__ == '__main__':
+    main()
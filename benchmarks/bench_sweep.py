@@ -0,0 +1,28 @@
+"""PriceProcessor parameter sweep on one worker against every core, prices shared through shared memory
+
+Run from the repo root: python -m benchmarks.bench_sweep
+"""
+import os
+import time
+
+from benchmarks.bench_price_processor import make_prices
+from extlib.sweep import run_sweep
+
+
+def main(n_coins=100, years=5):
+    df_prices = make_prices(n_coins, years)
+    insts = list(df_prices['coin'].unique())
+    vol_windows = [10, 20, 30, 60, 90]
+    hr_offsets = [0, 1, 2, 3]
+    print(f'{len(df_prices):,} hourly bars, {n_coins} coins, {len(vol_windows) * len(hr_offsets)} parameter sets')
+
+    timings = {}
+    for max_workers in sorted({1, os.cpu_count()}):
+        st = time.perf_counter()
+        run_sweep(insts, df_prices, vol_windows, hr_offsets=hr_offsets, max_workers=max_workers)
+        timings[max_workers] = time.perf_counter() - st
+        print(f'{max_workers} workers: {timings[max_workers]:.2f} s, speedup {timings[1] / timings[max_workers]:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
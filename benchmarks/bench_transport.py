@@ -0,0 +1,72 @@
+"""Per-call latency of module level requests.get vs the pooled keep-alive session
+
+Run from the repo root: python -m benchmarks.bench_transport
+"""
+import http.server
+import os
+import ssl
+import subprocess
+import tempfile
+import threading
+import time
+import warnings
+
+import requests
+
+from extlib.transport import build_session
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        body = b'[["tBTCUSD",1,1,1,1,1,1,1,1,1,1]]'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def _start_https_server(tmp_dir):
+    """Start a threaded HTTPS stand-in with a throwaway self-signed certificate"""
+    cert = os.path.join(tmp_dir, 'cert.pem')
+    key = os.path.join(tmp_dir, 'key.pem')
+    subprocess.run(['openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '1', '-subj', '/CN=localhost',
+                    '-keyout', key, '-out', cert], check=True, capture_output=True)
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    ctx = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    ctx.load_cert_chain(cert, key)
+    server.socket = ctx.wrap_socket(server.socket, server_side=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _time_calls(get, url, n):
+    st = time.perf_counter()
+    for _ in range(n):
+        get(url, verify=False).json()
+    return (time.perf_counter() - st) / n * 1000
+
+
+def main(n=200):
+    warnings.filterwarnings('ignore')
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        server = _start_https_server(tmp_dir)
+        url = f'https://127.0.0.1:{server.server_address[1]}/v2/tickers'
+
+        naive_ms = _time_calls(requests.get, url, n)
+        pooled_ms = _time_calls(build_session().get, url, n)
+        server.shutdown()
+
+    print(f'requests.get   {naive_ms:8.3f} ms/call')
+    print(f'pooled session {pooled_ms:8.3f} ms/call')
+    print(f'saved          {naive_ms - pooled_ms:8.3f} ms/call ({naive_ms / pooled_ms:.1f}x)')
+
+
+if __name__ == '__main__':
+    main()
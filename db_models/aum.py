@@ -10,6 +10,11 @@ def delete_all_aum_db():
     col.delete_many({})
 
 
+def latest_aum_query(fund):
+    """find() arguments of get_latest_aum_db"""
+    return {'filter': {'fund': fund}, 'sort': [('dateTime', pymongo.DESCENDING)], 'limit': 1}
+
+
 def get_latest_aum_db(fund):
     """Get latest aum of fund from db
 
@@ -20,4 +25,4 @@ def get_latest_aum_db(fund):
         list -- list of last record recorded in aum by fund
     """
     mongo_client = get_mongo_client()
-    return list(mongo_client['aum'].find({'fund': fund}, sort=[('dateTime', pymongo.DESCENDING)]).limit(1))
+    return list(mongo_client['aum'].find(**latest_aum_query(fund)))
@@ -12,6 +12,11 @@ def bt_perf_db(record):
     col.insert(record)
 
 
+def bt_query(strat):
+    """find() arguments of get_bt_db"""
+    return {'filter': {'strat': strat}}
+
+
 def get_bt_db(strat):
     """Get backtest results from backtest collection
 
@@ -20,5 +25,5 @@ def get_bt_db(strat):
     """
     mongo_client = get_mongo_client()
     col = mongo_client['backtest']
-    res = list(col.find({'strat': strat}))
+    res = list(col.find(**bt_query(strat)))
     return res
@@ -15,6 +15,11 @@ def balance_db(x):
     col.insert_one(x)
 
 
+def latest_balances_query(strat):
+    """find() arguments of get_latest_balances_db"""
+    return {'filter': {'strat': strat}, 'sort': [('dateTime', pymongo.DESCENDING)], 'limit': 1}
+
+
 def get_latest_balances_db(strat):
     """Get latest performance from modelperf collection
 
@@ -25,23 +30,18 @@ def get_latest_balances_db(strat):
         list -- list of last record recorded in modelperf by strategy
     """
     mongo_client = get_mongo_client()
-    return list(mongo_client['balances'].find({'strat': strat}, sort=[('dateTime', pymongo.DESCENDING)]).limit(1))
-
+    return list(mongo_client['balances'].find(**latest_balances_query(strat)))
 
-def get_balances_eod_db(date_st, date_end, strat):
-    """Get balances at the end of the day only
 
-    Arguments:
-        date_st {datetime} --  start date
-        date_end {datetime} -- end date
-        strat {str} -- strategy to pull balances for in the collection
+def balances_eod_query(date_st, date_end, strat):
+    """aggregate() arguments of get_balances_eod_db
 
-    Returns:
-        pd.DataFrame --  aum, dateTime, strat
+    Notes:
+        $sort directly follows $match so both are served by the (strat, dateTime) index
     """
     date_st = date_st.replace(hour=23, minute=59, second=0)
     date_end = date_end.replace(hour=23, minute=59, second=59)
-    query = [
+    pipeline = [
         {
             "$match": {
                 "dateTime": {
@@ -51,6 +51,11 @@ def get_balances_eod_db(date_st, date_end, strat):
                 "strat": strat
             }
         },
+        {
+            "$sort": {
+                "dateTime": -1
+            }
+        },
         {
             "$addFields": {
                 "year": {
@@ -64,11 +69,6 @@ def get_balances_eod_db(date_st, date_end, strat):
                 },
             },
         },
-        {
-            "$sort": {
-                "dateTime": -1
-            }
-        },
         {
             "$group": {
                 "_id": {
@@ -82,8 +82,22 @@ def get_balances_eod_db(date_st, date_end, strat):
             }
         },
     ]
+    return {'pipeline': pipeline}
+
+
+def get_balances_eod_db(date_st, date_end, strat):
+    """Get balances at the end of the day only
+
+    Arguments:
+        date_st {datetime} --  start date
+        date_end {datetime} -- end date
+        strat {str} -- strategy to pull balances for in the collection
+
+    Returns:
+        pd.DataFrame --  aum, dateTime, strat
+    """
     mongo_client = get_mongo_client()
-    data = mongo_client['balances'].aggregate(query)
+    data = mongo_client['balances'].aggregate(**balances_eod_query(date_st, date_end, strat))
 
     bal = []
     prices = []
@@ -1,13 +1,184 @@
+import inspect
+import os
+import threading
+
 import pymongo
+from pymongo import monitoring
 
 from settings import MONGO_DB, MONGO_CLIENT
 
+DEFAULT_POOL_SIZE = 20
+DEFAULT_MIN_POOL_SIZE = 0
+DEFAULT_SERVER_TIMEOUT_MS = 5000
+DEFAULT_CONNECT_TIMEOUT_MS = 5000
+DEFAULT_SOCKET_TIMEOUT_MS = 60000
+DEFAULT_READ_PREFERENCE = 'primary'
+
+_clients = {}
+_pid = None
+_lock = threading.Lock()
+
+
+class PoolStats(monitoring.ConnectionPoolListener):
+
+    def __init__(self):
+        """Connection pool listener counting connections per server of one client
+
+        Notes:
+            'open' is connections alive in the pool, 'in_use' connections checked out by a running operation and
+            'peak_in_use' the highest in_use seen, to compare against the pool size.
+        """
+        self._lock = threading.Lock()
+        self.servers = {}
+
+    def _count(self, event, **deltas):
+        address = '{}:{}'.format(*event.address)
+        with self._lock:
+            stats = self.servers.setdefault(address, {
+                'open': 0, 'in_use': 0, 'peak_in_use': 0, 'created': 0, 'checkouts': 0, 'checkout_failures': 0,
+                'clears': 0})
+            for key, delta in deltas.items():
+                stats[key] += delta
+            stats['peak_in_use'] = max(stats['peak_in_use'], stats['in_use'])
+
+    def pool_created(self, event):
+        self._count(event)
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self._count(event, clears=1)
+
+    def pool_closed(self, event):
+        pass
 
-def get_mongo_client():
+    def connection_created(self, event):
+        self._count(event, open=1, created=1)
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self._count(event, open=-1)
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        self._count(event, checkout_failures=1)
+
+    def connection_checked_out(self, event):
+        self._count(event, in_use=1, checkouts=1)
+
+    def connection_checked_in(self, event):
+        self._count(event, in_use=-1)
+
+
+def build_client(uri=MONGO_CLIENT, pool_size=DEFAULT_POOL_SIZE, min_pool_size=DEFAULT_MIN_POOL_SIZE,
+                 server_timeout_ms=DEFAULT_SERVER_TIMEOUT_MS, connect_timeout_ms=DEFAULT_CONNECT_TIMEOUT_MS,
+                 socket_timeout_ms=DEFAULT_SOCKET_TIMEOUT_MS, read_preference=DEFAULT_READ_PREFERENCE,
+                 event_listeners=None):
+    """Build a MongoClient that connects on its first operation
+
+    Keyword Arguments:
+        uri {str} -- Mongo connection string (default: {MONGO_CLIENT})
+        pool_size {int} -- Max connections per server (default: {DEFAULT_POOL_SIZE})
+        min_pool_size {int} -- Connections kept open per server when idle (default: {DEFAULT_MIN_POOL_SIZE})
+        server_timeout_ms {int} -- ms to wait for a suitable server (default: {DEFAULT_SERVER_TIMEOUT_MS})
+        connect_timeout_ms {int} -- ms to wait for a new connection (default: {DEFAULT_CONNECT_TIMEOUT_MS})
+        socket_timeout_ms {int} -- ms to wait for a reply (default: {DEFAULT_SOCKET_TIMEOUT_MS})
+        read_preference {str} -- 'primary', 'primaryPreferred', 'secondaryPreferred' etc.
+                                 (default: {DEFAULT_READ_PREFERENCE})
+        event_listeners {list} -- pymongo.monitoring listeners (default: {None})
+
+    Returns:
+        pymongo.MongoClient -- Client
+    """
+    return pymongo.MongoClient(uri, maxPoolSize=pool_size, minPoolSize=min_pool_size,
+                               serverSelectionTimeoutMS=server_timeout_ms, connectTimeoutMS=connect_timeout_ms,
+                               socketTimeoutMS=socket_timeout_ms, readPreference=read_preference,
+                               event_listeners=event_listeners, connect=False)
+
+
+def get_client(uri=MONGO_CLIENT, **kwargs):
+    """Get the process wide client for uri, creating it on first use
+
+    Notes:
+        MongoClient is not fork safe, a forked process drops the clients inherited from its parent and builds its
+        own on first use.
+        Pool size, timeouts and read preference are fixed when the client is built, so pass them on the first call
+        for uri, e.g. at start up. A later call asking for other values raises rather than returning a client
+        that ignores them, call close_clients() first to rebuild it. Calls without kwargs get the client as built.
+
+    Keyword Arguments:
+        uri {str} -- Mongo connection string (default: {MONGO_CLIENT})
+        kwargs -- build_client options, used to build the client the first time uri is seen
+
+    Raises:
+        ValueError: kwargs differ from the options the client for uri was built with
+
+    Returns:
+        pymongo.MongoClient -- Shared client for uri
+    """
+    global _pid
+    options = _client_options(uri, kwargs)
+    with _lock:
+        if _pid != os.getpid():
+            _clients.clear()
+            _pid = os.getpid()
+        if uri not in _clients:
+            stats = PoolStats()
+            _clients[uri] = build_client(uri, event_listeners=[stats], **options), stats, options
+        client, _, built = _clients[uri]
+    changed = {key: (built[key], value) for key, value in options.items() if key in kwargs and built[key] != value}
+    if changed:
+        raise ValueError(f'Mongo client for {uri} was built with other options (built, asked): {changed}, '
+                         f'call close_clients() before changing them')
+    return client
+
+
+def _client_options(uri, kwargs):
+    """build_client options of a get_client call, defaults filled in"""
+    bound = inspect.signature(build_client).bind(uri, **kwargs)
+    bound.apply_defaults()
+    return {key: value for key, value in bound.arguments.items() if key not in ('uri', 'event_listeners')}
+
+
+def get_mongo_client(**kwargs):
     """Get correct mongo client
 
+    Keyword Arguments:
+        kwargs -- Passed to get_client
+
     Returns:
         pymongo.database.Database -- client that points to db
     """
-    mongo_client = pymongo.MongoClient(MONGO_CLIENT)
-    return mongo_client[MONGO_DB]
+    return get_client(**kwargs)[MONGO_DB]
+
+
+def pool_stats():
+    """Connection pool counters of every shared client
+
+    Returns:
+        dict -- 'host:port' to PoolStats counters, summed over clients
+    """
+    with _lock:
+        listeners = [listener for _, listener, _ in _clients.values()] if _pid == os.getpid() else []
+    totals = {}
+    for listener in listeners:
+        with listener._lock:
+            for address, stats in listener.servers.items():
+                total = totals.setdefault(address, dict.fromkeys(stats, 0))
+                for key, value in stats.items():
+                    total[key] += value
+    return totals
+
+
+def close_clients():
+    """Close every shared client and drop its pooled connections"""
+    with _lock:
+        if _pid == os.getpid():
+            for client, _, _ in _clients.values():
+                client.close()
+        _clients.clear()
@@ -0,0 +1,117 @@
+import numpy as np
+import pandas as pd
+
+BATCH_SIZE = 10000
+
+
+def projection(fields):
+    """Mongo projection of fields, '_id' left out unless asked for, None (every field) if fields is None"""
+    if fields is None:
+        return None
+    proj = {field: 1 for field in fields}
+    if '_id' not in proj:
+        proj['_id'] = 0
+    return proj
+
+
+class _Column:
+
+    def __init__(self, dtype=None):
+        """Values of one field gathered batch by batch
+
+        Notes:
+            Numpy dtypes are converted once per batch, 'category' is stored as int32 codes into a growing list of
+            categories and anything else keeps the dtype pandas infers for the batch.
+        """
+        self.dtype = dtype
+        self.chunks = []
+        self.categories = pd.Index([])
+
+    def add(self, start, values):
+        """Add one batch of values (pandas.Series) starting at row start"""
+        if self.dtype == 'category':
+            new = pd.Index(values.dropna().unique()).difference(self.categories, sort=False)
+            self.categories = self.categories.append(new)
+            chunk = self.categories.get_indexer(values).astype('int32')
+        elif self.dtype is not None:
+            # Integers and booleans can't hold a missing value, the batch falls back to float64 with NaN
+            missing = np.dtype(self.dtype).kind in 'iub' and values.isna().any()
+            chunk = values.to_numpy(dtype='float64' if missing else self.dtype)
+        else:
+            chunk = values.set_axis(pd.RangeIndex(start, start + len(values)))
+        self.chunks.append((start, chunk))
+
+    def build(self, rows):
+        covered = sum(len(chunk) for _, chunk in self.chunks) == rows
+        if self.dtype == 'category':
+            codes = self._stack(rows, covered, -1, 'int32')
+            return pd.Categorical.from_codes(codes, categories=self.categories)
+        if self.dtype is not None:
+            dtype = np.dtype(self.dtype)
+            if dtype.kind == 'M':
+                return self._stack(rows, covered, np.datetime64('NaT'), dtype)
+            if dtype.kind == 'O':
+                return self._stack(rows, covered, None, dtype)
+            return self._stack(rows, covered, np.nan, dtype if dtype.kind in 'fc' else 'float64')
+
+        # Fields missing from whole batches are reindexed to NaN, as pd.DataFrame does from a list of dicts
+        series = self.chunks[0][1] if len(self.chunks) == 1 else pd.concat([chunk for _, chunk in self.chunks])
+        return series.to_numpy() if covered else series.reindex(pd.RangeIndex(rows)).to_numpy()
+
+    def _stack(self, rows, covered, missing, dtype):
+        """Chunks in one array, rows no chunk covers set to missing in dtype"""
+        if covered:
+            return self.chunks[0][1] if len(self.chunks) == 1 else np.concatenate([c for _, c in self.chunks])
+        values = np.full(rows, missing, dtype=dtype)
+        for start, chunk in self.chunks:
+            values[start:start + len(chunk)] = chunk
+        return values
+
+
+def cursor_to_df(cursor, fields=None, dtypes=None, batch_size=BATCH_SIZE):
+    """Build a DataFrame column by column from a cursor, one batch of documents at a time
+
+    Notes:
+        Same frame as pd.DataFrame(list(cursor)) without holding every document at once. Only one batch of
+        documents is alive at a time, each field is converted to an array as its batch arrives. Fields in dtypes
+        are stored as that numpy dtype, or as codes if 'category', others keep the dtype pandas infers.
+
+    Arguments:
+        cursor {pymongo.cursor.Cursor} -- Cursor, ideally with projection(fields) applied
+
+    Keyword Arguments:
+        fields {list} -- Columns in order, every field found if None (default: {None})
+        dtypes {dict} -- Field to dtype ('float64', 'datetime64[ns]', 'category' etc.) (default: {None})
+        batch_size {int} -- Documents per batch (default: {BATCH_SIZE})
+
+    Returns:
+        pandas.DataFrame -- One row per document
+    """
+    dtypes = dtypes if dtypes else {}
+    columns = {field: _Column(dtypes.get(field)) for field in fields} if fields is not None else {}
+    if hasattr(cursor, 'batch_size'):
+        cursor = cursor.batch_size(batch_size)
+
+    rows = 0
+    batch = []
+    for doc in cursor:
+        batch.append(doc)
+        if len(batch) == batch_size:
+            rows = _add_batch(columns, batch, rows, fields, dtypes)
+            batch = []
+    if batch:
+        rows = _add_batch(columns, batch, rows, fields, dtypes)
+
+    if not rows:
+        return pd.DataFrame(columns=list(columns))
+    return pd.DataFrame({field: column.build(rows) for field, column in columns.items()})
+
+
+def _add_batch(columns, batch, rows, fields, dtypes):
+    """Add one batch of documents to columns, adding the fields first seen in it if fields is None"""
+    df = pd.DataFrame(batch, columns=fields)
+    for field in df.columns:
+        if field not in columns:
+            columns[field] = _Column(dtypes.get(field))
+        columns[field].add(rows, df[field])
+    return rows + len(batch)
@@ -1,8 +1,8 @@
-import pandas as pd
 from pymongo.errors import BulkWriteError, DuplicateKeyError
 
 from logger.logger import log_error_msg
 from .connect_ryo import get_mongo_client
+from .frames import cursor_to_df, projection
 
 
 def funding_db(x, strat_name, bulk=False):
@@ -38,11 +38,19 @@ def delete_all_funding_documents():
     mongo_client['funding'].delete_many({})
 
 
-def get_funding_db(strat):
+def funding_query(strat):
+    """find() arguments of get_funding_db"""
+    return {'filter': {'strat': strat}}
+
+
+def get_funding_db(strat, fields=None, dtypes=None):
     """Get all funding from specific strategy
 
     Arguments:
         strat (str): strategy name
+        fields (list): fields to load, all if None
+        dtypes (dict): field to dtype, see frames.cursor_to_df
     """
     mongo_client = get_mongo_client()
-    return pd.DataFrame((list(mongo_client['funding'].find({'strat': strat}))))
+    return cursor_to_df(mongo_client['funding'].find(projection=projection(fields), **funding_query(strat)), fields,
+                        dtypes)
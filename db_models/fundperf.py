@@ -4,6 +4,11 @@ from logger.logger import log_generic_msg, log_error_msg
 from .connect_ryo import get_mongo_client
 
 
+def fundperf_query(fund):
+    """find() and delete_many() arguments of a fund's fundperf documents"""
+    return {'filter': {'fund': fund}}
+
+
 def perf_db(records, save_all_data=False, fund=''):
     """Save LIVE ACTUAL performance of fund to database
 
@@ -14,7 +19,7 @@ def perf_db(records, save_all_data=False, fund=''):
     """
     mongo_client = get_mongo_client()
     col = mongo_client['fundperf']
-    col.delete_many({'fund': fund})
+    col.delete_many(**fundperf_query(fund))
 
     try:
         log_generic_msg(f'Last fundperf document to be recorded: {records[-1]}')
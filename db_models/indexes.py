@@ -0,0 +1,147 @@
+from datetime import datetime
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+
+from . import aum, backtest, balances, funding, fundperf, modelperf, prices, settings, subred, trades
+from .connect_ryo import get_mongo_client
+
+# Indexes each collection needs, as key patterns
+INDEXES = {
+    'aum': [[('fund', ASCENDING), ('dateTime', DESCENDING)]],
+    'backtest': [[('strat', ASCENDING)]],
+    'balances': [[('strat', ASCENDING), ('dateTime', DESCENDING)]],
+    'funding': [[('strat', ASCENDING), ('dateTime', DESCENDING)]],
+    'fundperf': [[('fund', ASCENDING)]],
+    'modelperf': [[('strat', ASCENDING), ('dateTime', DESCENDING)]],
+    'prices': [[('timeframe', ASCENDING), ('dateTime', DESCENDING)]],
+    'settings': [[('fund', ASCENDING)], [('key', ASCENDING)], [('strategy', ASCENDING)]],
+    'subred': [[('strat', ASCENDING)]],
+    'trades': [[('strat', ASCENDING), ('dateTime', DESCENDING)], [('dateTime', DESCENDING)]],
+}
+
+# Plan stages that fail check_query_plans. SORT is an in-memory sort in a find() plan and $sort an aggregation
+# $sort that could not be pushed down to an index.
+BAD_STAGES = ('COLLSCAN', 'SORT', '$sort')
+
+_STRAT = 'STRAT'
+_FUND = 'FUND'
+_DT_ST, _DT_END = datetime(2020, 1, 1), datetime(2020, 2, 1)
+
+
+def _shape(collection, query):
+    return dict(query, collection=collection)
+
+
+# The queries the db_models readers run, built with the same query builders the readers call, keyed by
+# module.function. Readers sharing a builder (i.e. the deletes) share its entry.
+QUERY_SHAPES = {
+    'aum.get_latest_aum_db': _shape('aum', aum.latest_aum_query(_FUND)),
+    'backtest.get_bt_db': _shape('backtest', backtest.bt_query(_STRAT)),
+    'balances.get_latest_balances_db': _shape('balances', balances.latest_balances_query(_STRAT)),
+    'balances.get_balances_eod_db': _shape('balances', balances.balances_eod_query(_DT_ST, _DT_END, _STRAT)),
+    'funding.get_funding_db': _shape('funding', funding.funding_query(_STRAT)),
+    'fundperf.perf_db': _shape('fundperf', fundperf.fundperf_query(_FUND)),
+    'modelperf.model_perf_db': _shape('modelperf', modelperf.model_perf_query(_STRAT)),
+    'modelperf.get_model_perf_db': _shape('modelperf', modelperf.model_perfs_query([_STRAT, 'STRAT_2'])),
+    'modelperf.get_latest_modelperf_db': _shape('modelperf', modelperf.latest_modelperf_query(_STRAT)),
+    'prices.get_prices_eod_db': _shape('prices', prices.prices_eod_query(_DT_ST, _DT_END)),
+    'settings.get_fund_info_db': _shape('settings', settings.fund_info_query(_FUND)),
+    'settings.get_all_fund_info_db': _shape('settings', settings.key_query('FUND_INFO')),
+    'settings.get_strat_info_db': _shape('settings', settings.strat_info_query(_STRAT)),
+    'settings.get_all_strats_db': _shape('settings', settings.key_query('STRAT_INFO')),
+    'settings.get_public_puller_info': _shape('settings', settings.key_query('PUBLIC_PULLER')),
+    'subred.get_subred_db': _shape('subred', subred.subred_query(_STRAT)),
+    'trades.get_trades_db_by_dt': _shape('trades', trades.trades_query(_STRAT, _DT_ST, _DT_END)),
+    'trades.get_all_trades_db': _shape('trades', trades.trades_query(_STRAT)),
+    'trades.get_recent_trades': _shape('trades', trades.recent_trades_query(_DT_ST)),
+}
+
+
+class QueryPlanError(Exception):
+    pass
+
+
+def _key_pattern(keys):
+    return tuple((field, int(direction) if isinstance(direction, float) else direction) for field, direction in keys)
+
+
+def ensure_indexes(db=None, collections=None):
+    """Create the INDEXES missing from the db, safe to run on every deploy
+
+    Notes:
+        An index is only created if no index with the same key pattern exists, whatever its name or options, so
+        indexes made by hand (unique ones included) are left as they are.
+
+    Keyword Arguments:
+        db {pymongo.database.Database} -- Database, get_mongo_client() if None (default: {None})
+        collections {list} -- Collections to provision, all of INDEXES if None (default: {None})
+
+    Returns:
+        dict -- Collection to names of the indexes created
+    """
+    db = db if db is not None else get_mongo_client()
+    created = {}
+    for name in collections if collections else INDEXES:
+        existing = {_key_pattern(info['key']) for info in db[name].index_information().values()}
+        missing = [IndexModel(keys) for keys in INDEXES[name] if _key_pattern(keys) not in existing]
+        if missing:
+            created[name] = db[name].create_indexes(missing)
+    return created
+
+
+def _plan_stages(plan):
+    """Stage names of the chosen plan in explain output, rejected plans left out
+
+    Notes:
+        find() plans name their stages in 'stage', aggregations also list the pipeline stages left after pushdown
+        in 'stages' as {'$cursor': ...}, {'$sort': ...} etc., those are named by their key.
+    """
+    if isinstance(plan, list):
+        return [stage for item in plan for stage in _plan_stages(item)]
+    if not isinstance(plan, dict):
+        return []
+    stages = [plan['stage']] if isinstance(plan.get('stage'), str) else []
+    for key, value in plan.items():
+        if key == 'stages' and isinstance(value, list):
+            stages += [name for item in value if isinstance(item, dict) for name in item if name.startswith('$')]
+        if key not in ('rejectedPlans', 'allPlansExecution'):
+            stages += _plan_stages(value)
+    return stages
+
+
+def explain_query(db, shape):
+    """explain() of one QUERY_SHAPES entry
+
+    Arguments:
+        db {pymongo.database.Database} -- Database
+        shape {dict} -- 'collection' and the find() ('filter', 'sort', 'limit') or aggregate() ('pipeline') arguments
+
+    Returns:
+        dict -- explain output
+    """
+    query = {key: value for key, value in shape.items() if key != 'collection'}
+    if 'pipeline' in query:
+        return db.command('aggregate', shape['collection'], pipeline=query['pipeline'], explain=True)
+    return db[shape['collection']].find(**query).explain()
+
+
+def check_query_plans(db=None, shapes=None):
+    """Explain every query shape and raise if any plan scans a collection or sorts in memory
+
+    Keyword Arguments:
+        db {pymongo.database.Database} -- Database, get_mongo_client() if None (default: {None})
+        shapes {dict} -- Name to query shape (default: {QUERY_SHAPES})
+
+    Raises:
+        QueryPlanError -- Listing every query shape whose plan holds one of BAD_STAGES
+
+    Returns:
+        dict -- Query shape name to the stages of its plan
+    """
+    db = db if db is not None else get_mongo_client()
+    shapes = shapes if shapes else QUERY_SHAPES
+    plans = {name: _plan_stages(explain_query(db, shape)) for name, shape in shapes.items()}
+    bad = {name: stages for name, stages in plans.items() if set(stages) & set(BAD_STAGES)}
+    if bad:
+        raise QueryPlanError('; '.join(f'{name}: {" <- ".join(stages)}' for name, stages in bad.items()))
+    return plans
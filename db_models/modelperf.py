@@ -6,6 +6,21 @@ from logger.logger import log_generic_msg, log_error_msg
 from .connect_ryo import get_mongo_client
 
 
+def model_perf_query(strat):
+    """find() and delete_many() arguments of a strategy's modelperf documents"""
+    return {'filter': {'strat': strat}}
+
+
+def model_perfs_query(strats):
+    """find() arguments of get_model_perf_db"""
+    return {'filter': {'strat': {'$in': strats}}}
+
+
+def latest_modelperf_query(strat):
+    """find() arguments of get_latest_modelperf_db"""
+    return {'filter': {'strat': strat}, 'sort': [('dateTime', pymongo.DESCENDING)], 'limit': 1}
+
+
 def model_perf_db(df, strat, save_all_data=False):
     """Save model performance to mongodb
 
@@ -31,7 +46,7 @@ def model_perf_db(df, strat, save_all_data=False):
 
     # Find latest dateTime save in mongo and only save records after that date
     else:
-        df_db = pd.DataFrame(list(col.find({'strat': strat})))
+        df_db = pd.DataFrame(list(col.find(**model_perf_query(strat))))
 
         if not df_db.empty:
             df_db.sort_values('dateTime', inplace=True)
@@ -58,8 +73,7 @@ def get_model_perf_db(strats):
         list -- list of performance from modelperf collection
     """
     mongo_client = get_mongo_client()
-    query = {'strat': {'$in': strats}}
-    return list(mongo_client['modelperf'].find(query))
+    return list(mongo_client['modelperf'].find(**model_perfs_query(strats)))
 
 
 def get_latest_modelperf_db(strat):
@@ -72,11 +86,11 @@ def get_latest_modelperf_db(strat):
         list -- list of last record recorded in modelperf by strategy
     """
     mongo_client = get_mongo_client()
-    return list(mongo_client['modelperf'].find({'strat': strat}, sort=[('dateTime', pymongo.DESCENDING)]).limit(1))
+    return list(mongo_client['modelperf'].find(**latest_modelperf_query(strat)))
 
 
 def delete_all_model_perf_db(strat):
     """Delete all data in modelperf collection"""
     mongo_client = get_mongo_client()
     col = mongo_client['modelperf']
-    col.delete_many({'strat': strat})
+    col.delete_many(**model_perf_query(strat))
@@ -2,16 +2,16 @@ from .connect_ryo import get_mongo_client
 import pandas as pd
 
 
-def get_prices_eod_db(date_st, date_end):
-    """Get prices at the end of the day only
+def prices_eod_query(date_st, date_end):
+    """aggregate() arguments of get_prices_eod_db, $sort follows $match to be served by the (timeframe, dateTime) index
 
-    Arguments:
+    Args:
         date_st (datetime.datetime): start date
         date_end (datetime.datetime): end date
     """
     date_st = date_st.replace(hour=23, minute=44, second=50)
     date_end = date_end.replace(hour=23, minute=59, second=59)
-    query = [
+    pipeline = [
         {
             "$match": {
                 "dateTime": {
@@ -21,6 +21,11 @@ def get_prices_eod_db(date_st, date_end):
                 "timeframe": '1h'
             }
         },
+        {
+            "$sort": {
+                "dateTime": -1
+            }
+        },
         {
             "$addFields": {
                 "year": {
@@ -34,11 +39,6 @@ def get_prices_eod_db(date_st, date_end):
                 },
             },
         },
-        {
-            "$sort": {
-                "dateTime": -1
-            }
-        },
         {
             "$group": {
                 "_id": {
@@ -53,8 +53,18 @@ def get_prices_eod_db(date_st, date_end):
             }
         },
     ]
+    return {'pipeline': pipeline}
+
+
+def get_prices_eod_db(date_st, date_end):
+    """Get prices at the end of the day only
+
+    Arguments:
+        date_st (datetime.datetime): start date
+        date_end (datetime.datetime): end date
+    """
     mongo_client = get_mongo_client()
-    data = mongo_client['prices'].aggregate(query)
+    data = mongo_client['prices'].aggregate(**prices_eod_query(date_st, date_end))
 
     df_data = []
     for x in data:
@@ -1,6 +1,21 @@
 from .connect_ryo import get_mongo_client
 
 
+def fund_info_query(fund):
+    """find() arguments of get_fund_info_db"""
+    return {'filter': {'fund': fund}}
+
+
+def key_query(key):
+    """find() arguments of the settings documents of a key, 'FUND_INFO', 'STRAT_INFO', 'PUBLIC_PULLER'"""
+    return {'filter': {'key': key}}
+
+
+def strat_info_query(strat):
+    """find() and update_one() arguments of get_strat_info_db and set_last_run_db"""
+    return {'filter': {'strategy': strat}}
+
+
 def get_fund_info_db(fund):
     """Get fund information
 
@@ -11,7 +26,7 @@ def get_fund_info_db(fund):
         list -- list of fund information
     """
     mongo_client = get_mongo_client()
-    return list(mongo_client['settings'].find({'fund': fund}))[0]
+    return list(mongo_client['settings'].find(**fund_info_query(fund)))[0]
 
 
 def get_all_fund_info_db():
@@ -24,7 +39,7 @@ def get_all_fund_info_db():
         list -- list of all fund information
     """
     mongo_client = get_mongo_client()
-    return list(mongo_client['settings'].find({'key': 'FUND_INFO'}))
+    return list(mongo_client['settings'].find(**key_query('FUND_INFO')))
 
 
 def get_strat_info_db(strat):
@@ -40,7 +55,7 @@ def get_strat_info_db(strat):
         list -- list of strat information
     """
     mongo_client = get_mongo_client()
-    return list(mongo_client['settings'].find({'strategy': strat}))[0]
+    return list(mongo_client['settings'].find(**strat_info_query(strat)))[0]
 
 
 def get_all_strats_db():
@@ -50,7 +65,7 @@ def get_all_strats_db():
         list -- list of documents that have key: 'STRAT_INFO'
     """
     mongo_client = get_mongo_client()
-    return list(mongo_client['settings'].find({'key': 'STRAT_INFO'}))
+    return list(mongo_client['settings'].find(**key_query('STRAT_INFO')))
 
 
 def get_last_run_db(strat):
@@ -70,9 +85,8 @@ def set_last_run_db(strat, dt):
         dt {datetime.datetime} -- datetime to set
     """
     mongo_client = get_mongo_client()
-    query = {'strategy': strat}
     newvalues = {'$set': {'lastRun': dt}}
-    mongo_client['settings'].update_one(query, newvalues)
+    mongo_client['settings'].update_one(update=newvalues, **strat_info_query(strat))
 
 
 def get_haircut_db(strat_name):
@@ -91,5 +105,4 @@ def get_haircut_db(strat_name):
 def get_public_puller_info():
     """Get public puller instruments"""
     mongo_client = get_mongo_client()
-    query = {'key': 'PUBLIC_PULLER'}
-    return list(mongo_client['settings'].find(query))[0]
+    return list(mongo_client['settings'].find(**key_query('PUBLIC_PULLER')))[0]
@@ -1,13 +1,20 @@
-import pandas as pd
-
 from .connect_ryo import get_mongo_client
+from .frames import cursor_to_df, projection
+
+
+def subred_query(strat):
+    """find() arguments of get_subred_db"""
+    return {'filter': {'strat': strat}}
 
 
-def get_subred_db(strat):
+def get_subred_db(strat, fields=None, dtypes=None):
     """Get all subred from specific strategy
 
     Arguments:
         strat (str): strategy name
+        fields (list): fields to load, all if None
+        dtypes (dict): field to dtype, see frames.cursor_to_df
     """
     mongo_client = get_mongo_client()
-    return pd.DataFrame((list(mongo_client['subred'].find({'strat': strat}))))
+    return cursor_to_df(mongo_client['subred'].find(projection=projection(fields), **subred_query(strat)), fields,
+                        dtypes)
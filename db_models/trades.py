@@ -1,35 +1,53 @@
 from datetime import datetime, timedelta
 
-import pandas as pd
 from dateutil import parser
 from pymongo.errors import BulkWriteError
 
 from logger.logger import log_error_msg
 from .connect_ryo import get_mongo_client
+from .frames import cursor_to_df, projection
 from .settings import get_fund_info_db
 
 
-def get_trades_db_by_dt(strat, date_st, date_end):
+def trades_query(strat, date_st=None, date_end=None):
+    """find() and delete_many() arguments of a strategy's trades, within [date_st, date_end] if given"""
+    query = {'strat': strat}
+    if date_st is not None or date_end is not None:
+        query['dateTime'] = {op: dt for op, dt in [('$gte', date_st), ('$lte', date_end)] if dt is not None}
+    return {'filter': query}
+
+
+def recent_trades_query(start_dt):
+    """find() arguments of get_recent_trades"""
+    return {'filter': {'dateTime': {'$gte': start_dt}}}
+
+
+def get_trades_db_by_dt(strat, date_st, date_end, fields=None, dtypes=None):
     """Get all trades from specific strategy
 
     Args:
         strat (str): strategy name
         date_st (datetime.datetime): start date
         date_end (datetime.datetime): end date
+        fields (list): fields to load, all if None
+        dtypes (dict): field to dtype, see frames.cursor_to_df
     """
     mongo_client = get_mongo_client()
-    query = {"strat": strat, "dateTime": {"$gte": date_st, "$lte": date_end}}
-    return pd.DataFrame((list(mongo_client['trades'].find(query))))
+    res = mongo_client['trades'].find(projection=projection(fields), **trades_query(strat, date_st, date_end))
+    return cursor_to_df(res, fields, dtypes)
 
 
-def get_all_trades_db(strat):
+def get_all_trades_db(strat, fields=None, dtypes=None):
     """Get all trades from specific strategy
 
     Args:
         strat (str): strategy name
+        fields (list): fields to load, all if None
+        dtypes (dict): field to dtype, see frames.cursor_to_df
     """
     mongo_client = get_mongo_client()
-    return pd.DataFrame((list(mongo_client['trades'].find({'strat': strat}))))
+    res = mongo_client['trades'].find(projection=projection(fields), **trades_query(strat))
+    return cursor_to_df(res, fields, dtypes)
 
 
 def delete_all_strat_trades(strat):
@@ -39,7 +57,7 @@ def delete_all_strat_trades(strat):
         strat_name {str} - 'MA_BO_I', 'NAX_TREND' etc.
     """
     mongo_client = get_mongo_client()
-    mongo_client['trades'].delete_many({'strat': strat})
+    mongo_client['trades'].delete_many(**trades_query(strat))
 
 
 def delete_trades_by_dt(strat, date_start, date_end):
@@ -51,8 +69,7 @@ def delete_trades_by_dt(strat, date_start, date_end):
         date_end {str} - date to end delete in string format
     """
     mongo_client = get_mongo_client()
-    query = {"strat": strat, "dateTime": {"$gte": parser.parse(date_start), "$lte": parser.parse(date_end)}}
-    x = mongo_client['trades'].delete_many(query)
+    x = mongo_client['trades'].delete_many(**trades_query(strat, parser.parse(date_start), parser.parse(date_end)))
     print(f'{x.deleted_count} trades deleted for {strat}')
 
 
@@ -92,15 +109,18 @@ def trades_to_db(x, strat_name):
         log_error_msg(msg)
 
 
-def get_recent_trades(days=0):
+def get_recent_trades(days=0, fields=None, dtypes=None):
     """Get recent trades from db
 
     Arguments:
         days {int} -- days to go back for in the db
+
+    Keyword Arguments:
+        fields {list} -- fields to load, all if None (default: {None})
+        dtypes {dict} -- field to dtype, see frames.cursor_to_df (default: {None})
     """
     mongo_client = get_mongo_client()
     start_dt = datetime.utcnow() - timedelta(days=days)
     start_dt = start_dt.replace(hour=0, minute=0, second=0)
-    query = {'dateTime': {'$gte': start_dt}}
-    res = mongo_client['trades'].find(query)
-    return pd.DataFrame(list(res))
+    res = mongo_client['trades'].find(projection=projection(fields), **recent_trades_query(start_dt))
+    return cursor_to_df(res, fields, dtypes)
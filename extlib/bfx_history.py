@@ -0,0 +1,105 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+import pandas as pd
+
+from extlib.bfx_v2 import BFXV2, CANDLE_COLS, MAX_CANDLES, get_freq_ms
+from extlib.columnar import ColumnWriter, read_columns
+from extlib.utils import split_range
+
+CANDLE_DTYPES = {'TS': 'int64', 'OPEN': 'float64', 'CLOSE': 'float64', 'HIGH': 'float64', 'LOW': 'float64',
+                 'VOLUME': 'float64'}
+
+
+def split_windows(start, end, freq, limit=MAX_CANDLES):
+    """Split [start, end] into windows of at most limit candles
+
+    Arguments:
+        start {int} -- ms start time
+        end {int} -- ms end time (inclusive)
+        freq {str} -- '1m', '1h', '1D' etc.
+
+    Keyword Arguments:
+        limit {int} -- Max candles per window (default: {MAX_CANDLES})
+
+    Returns:
+        list -- [(window_start, window_end), ...] in ms, non overlapping and in time order
+    """
+    return split_range(start, end, get_freq_ms()[freq] * limit)
+
+
+def download_candles(freq, coin, start, end, path, bfx=None, max_workers=4, retries=3):
+    """Download candle history in windows of 5000 concurrently and stream them into a columnar store
+
+    Notes:
+        - Calls are queued by the BFXV2 scheduler under the candle rate limit at bulk priority.
+        - Windows are fetched concurrently but written in time order, so the store is always a clean prefix.
+        - The store itself is the checkpoint: an interrupted pull restarts after the last committed bar.
+        - Bars at or before the last committed TS and duplicate TS within a window are dropped.
+
+    Arguments:
+        freq {str} -- '1m', '5m', '15m', '30m', '1h', '3h', '6h', '12h', '1D', '7D', '14D'
+        coin {str} -- The symbol you want information about. (tBTCUSD)
+        start {int} -- ms start time
+        end {int} -- ms end time (inclusive)
+        path {str} -- Directory of the columnar store, see extlib.columnar
+
+    Keyword Arguments:
+        bfx {BFXV2} -- client to pull candles with (default: {None})
+        max_workers {int} -- Windows in flight at once (default: {4})
+        retries {int} -- Attempts per window before giving up (default: {3})
+
+    Returns:
+        int -- Number of bars written by this call
+    """
+    bfx = bfx if bfx else BFXV2()
+    writer = ColumnWriter(path, CANDLE_DTYPES)
+    last_ts = writer.last('TS')
+    if last_ts is not None:
+        start = max(start, int(last_ts) + get_freq_ms()[freq])
+    if start > end:
+        return 0
+
+    def fetch(window):
+        for attempt in range(retries):
+            df = bfx.get_candles(freq, coin, 'hist', start=window[0], end=window[1], limit=MAX_CANDLES, sort=1)
+            if df is not None:
+                return df
+        raise RuntimeError(f'Failed to pull {coin} {freq} candles for window {window} after {retries} attempts')
+
+    written = 0
+    windows = iter(split_windows(start, end, freq))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # Keep a bounded number of windows in flight and append them in time order as the oldest completes
+        pending = deque(executor.submit(fetch, w) for w in islice(windows, max_workers * 2))
+        while pending:
+            df = pending.popleft().result()
+            for w in islice(windows, 1):
+                pending.append(executor.submit(fetch, w))
+
+            df = df[CANDLE_COLS].copy()
+            df['TS'] = df['TS'].values.astype('datetime64[ms]').astype('int64')
+            df = df.drop_duplicates('TS', keep='last')
+            if last_ts is not None:
+                df = df[df['TS'] > last_ts]
+            if not df.empty:
+                writer.append(df)
+                last_ts = df['TS'].iloc[-1]
+                written += len(df.index)
+    return written
+
+
+def load_candles(path):
+    """Load a downloaded candle store
+
+    Arguments:
+        path {str} -- Directory of the columnar store
+
+    Returns:
+        pandas.DataFrame -- DataFrame of candles in the same shape as BFXV2.get_candles
+    """
+    df = read_columns(path)
+    if not df.empty:
+        df['TS'] = pd.to_datetime(df['TS'], unit='ms')
+    return df
@@ -0,0 +1,250 @@
+import json
+import re
+import zlib
+
+import aiohttp
+import numpy as np
+import pandas as pd
+
+from extlib.bfx_v2 import CANDLE_COLS
+
+WS_URL = 'wss://api-pub.bitfinex.com/ws/2'
+OB_CHECKSUM_FLAG = 131072
+TICKER_COLS = ['BID', 'BID_SIZE', 'ASK', 'ASK_SIZE', 'DAILY_CHANGE', 'DAILY_CHANGE_PERC', 'PX_LAST', 'VOLUME',
+               'HIGH', 'LOW']
+
+
+class ChecksumError(Exception):
+    pass
+
+
+def _js_num(x):
+    """Format a number the way BFX (javascript) does when building the book checksum string"""
+    ax = abs(x)
+    if ax != 0 and (ax < 1e-6 or ax >= 1e21):
+        return re.sub(r'e([+-])0*(\d)', r'e\1\2', repr(float(x)))
+    return np.format_float_positional(x, trim='-')
+
+
+class OrderBook:
+
+    def __init__(self):
+        """Array-backed price level book for one symbol
+
+        Notes:
+            Each side holds sorted numpy arrays of key, price, count and amount. Bids are keyed by -price so both
+            sides are ascending from the top of book and levels can be found with searchsorted.
+        """
+        self.sides = {'bid': self._empty(), 'ask': self._empty()}
+
+    @staticmethod
+    def _empty():
+        return {'key': np.empty(0), 'price': np.empty(0), 'count': np.empty(0), 'amount': np.empty(0)}
+
+    def reset(self):
+        self.sides = {'bid': self._empty(), 'ask': self._empty()}
+
+    def load_snapshot(self, levels):
+        """Replace the book with a snapshot of [[price, count, amount], ...]"""
+        self.reset()
+        arr = np.asarray(levels, dtype=float).reshape(-1, 3)
+        for side, mask, sign in [('bid', arr[:, 2] > 0, -1), ('ask', arr[:, 2] < 0, 1)]:
+            lvl = arr[mask]
+            order = np.argsort(sign * lvl[:, 0], kind='stable')
+            lvl = lvl[order]
+            self.sides[side] = {'key': sign * lvl[:, 0], 'price': lvl[:, 0], 'count': lvl[:, 1], 'amount': lvl[:, 2]}
+
+    def update(self, price, count, amount):
+        """Apply one [price, count, amount] update, count 0 deletes the level (amount 1 bids, -1 asks)"""
+        side, key = ('bid', -price) if amount > 0 else ('ask', price)
+        book = self.sides[side]
+        idx = np.searchsorted(book['key'], key)
+        exists = idx < len(book['key']) and book['key'][idx] == key
+
+        if count == 0:
+            if exists:
+                for col in book:
+                    book[col] = np.delete(book[col], idx)
+        elif exists:
+            book['count'][idx] = count
+            book['amount'][idx] = amount
+        else:
+            for col, val in zip(['key', 'price', 'count', 'amount'], [key, price, count, amount]):
+                book[col] = np.insert(book[col], idx, val)
+
+    def checksum(self, levels=25):
+        """CRC32 of the top levels as defined by BFX, signed 32 bit"""
+        parts = []
+        bids, asks = self.sides['bid'], self.sides['ask']
+        for i in range(levels):
+            if i < len(bids['price']):
+                parts += [_js_num(bids['price'][i]), _js_num(bids['amount'][i])]
+            if i < len(asks['price']):
+                parts += [_js_num(asks['price'][i]), _js_num(asks['amount'][i])]
+        crc = zlib.crc32(':'.join(parts).encode('utf8'))
+        return crc - (1 << 32) if crc >= (1 << 31) else crc
+
+    def snapshot(self, side, levels=None):
+        """Copy of the top levels of one side
+
+        Arguments:
+            side {str} -- 'bid' or 'ask'
+
+        Keyword Arguments:
+            levels {int} -- Number of levels from the top of book, all if None (default: {None})
+
+        Returns:
+            numpy.ndarray -- [[price, count, amount], ...] from the top of book
+        """
+        book = self.sides[side]
+        return np.column_stack([book['price'], book['count'], book['amount']])[:levels]
+
+    def depth(self, side, levels=None):
+        """Cumulative absolute amount from the top of book
+
+        Arguments:
+            side {str} -- 'bid' or 'ask'
+
+        Keyword Arguments:
+            levels {int} -- Number of levels from the top of book, all if None (default: {None})
+
+        Returns:
+            numpy.ndarray -- Cumulative absolute amount per level
+        """
+        return np.abs(np.cumsum(self.sides[side]['amount'][:levels]))
+
+    def to_frames(self):
+        """Same shape as BFXV2.get_order_books
+
+        Returns:
+            pandas.DataFrame -- DataFrame of bid and ask books
+        """
+        frames = []
+        for side in ['bid', 'ask']:
+            df = pd.DataFrame(self.snapshot(side), columns=['PRICE', 'COUNT', 'AMOUNT'])
+            df['ABS_CUMULATIVE_AMOUNT'] = self.depth(side)
+            frames.append(df)
+        return frames[0], frames[1]
+
+
+class BFXStream:
+
+    def __init__(self, url=WS_URL, max_candles=1000):
+        """BFX V2 public websocket client for ticker, candle and book channels
+
+        Notes:
+            Books are kept incrementally in an OrderBook per symbol and verified against the BFX checksum
+            messages, a mismatch resubscribes the book to get a fresh snapshot.
+
+        Keyword Arguments:
+            url {str} -- Websocket url (default: {WS_URL})
+            max_candles {int} -- Candles kept per subscription (default: {1000})
+        """
+        self.url = url
+        self.max_candles = max_candles
+        self.subscriptions = []
+        self.channels = {}
+        self.books = {}
+        self.tickers = {}
+        self.candles = {}
+        self._ws = None
+
+    def subscribe_ticker(self, symbol):
+        self.subscriptions.append({'event': 'subscribe', 'channel': 'ticker', 'symbol': symbol})
+
+    def subscribe_candles(self, freq, symbol):
+        self.subscriptions.append({'event': 'subscribe', 'channel': 'candles', 'key': f'trade:{freq}:{symbol}'})
+
+    def subscribe_book(self, symbol, precision='P0', depth=25):
+        """Subscribe to a book channel
+
+        Arguments:
+            symbol {str} -- 'tBTCUSD'
+
+        Keyword Arguments:
+            precision {str} -- Level of price aggregation (P0, P1, P2, P3, P4) (default: {'P0'})
+            depth {int} -- Depth of book wanted, 1/25/100/250 (default: {25})
+        """
+        self.subscriptions.append({'event': 'subscribe', 'channel': 'book', 'symbol': symbol, 'prec': precision,
+                                   'freq': 'F0', 'len': str(depth)})
+        self.books[symbol] = OrderBook()
+
+    async def run(self):
+        """Connect, subscribe and consume messages until the connection closes"""
+        async with aiohttp.ClientSession() as session:
+            async with session.ws_connect(self.url, heartbeat=30) as ws:
+                self._ws = ws
+                await ws.send_str(json.dumps({'event': 'conf', 'flags': OB_CHECKSUM_FLAG}))
+                for sub in self.subscriptions:
+                    await ws.send_str(json.dumps(sub))
+
+                async for msg in ws:
+                    if msg.type != aiohttp.WSMsgType.TEXT:
+                        break
+                    try:
+                        self.handle(json.loads(msg.data))
+                    except ChecksumError as err:
+                        await self._resubscribe(err.args[0])
+                self._ws = None
+
+    async def _resubscribe(self, chan_id):
+        chan = self.channels.pop(chan_id)
+        await self._ws.send_str(json.dumps({'event': 'unsubscribe', 'chanId': chan_id}))
+        await self._ws.send_str(json.dumps(chan['sub']))
+
+    def handle(self, msg):
+        """Process one decoded websocket message
+
+        Arguments:
+            msg {dict|list} -- Event dict or [chanId, payload, ...] list
+        """
+        if isinstance(msg, dict):
+            if msg.get('event') == 'subscribed':
+                sub = next((s for s in self.subscriptions
+                            if all(msg.get(k) == v for k, v in s.items() if k != 'event')), None)
+                # A channel nobody asked for (i.e. left over from a previous session) is ignored
+                if sub is not None:
+                    self.channels[msg['chanId']] = {'channel': msg['channel'], 'sub': sub}
+            return
+
+        chan = self.channels.get(msg[0])
+        if chan is None or msg[1] == 'hb':
+            return
+
+        channel, sub = chan['channel'], chan['sub']
+        if channel == 'book':
+            book = self.books[sub['symbol']]
+            if msg[1] == 'cs':
+                if book.checksum() != msg[2]:
+                    book.reset()
+                    raise ChecksumError(msg[0])
+            elif msg[1] and isinstance(msg[1][0], list):
+                book.load_snapshot(msg[1])
+            elif msg[1]:
+                book.update(*msg[1])
+        elif channel == 'ticker':
+            self.tickers[sub['symbol']] = dict(zip(TICKER_COLS, msg[1]))
+        elif channel == 'candles':
+            candles = self.candles.setdefault(sub['key'], {})
+            rows = msg[1] if msg[1] and isinstance(msg[1][0], list) else [msg[1]]
+            for row in rows:
+                candles[row[0]] = row
+            for ts in sorted(candles)[:-self.max_candles]:
+                del candles[ts]
+
+    def get_book(self, symbol):
+        return self.books[symbol]
+
+    def get_ticker(self, symbol):
+        return self.tickers.get(symbol, {})
+
+    def get_candles(self, freq, symbol):
+        """Candles received so far in the same shape as BFXV2.get_candles
+
+        Returns:
+            pandas.DataFrame -- DataFrame of candles
+        """
+        candles = self.candles.get(f'trade:{freq}:{symbol}', {})
+        df = pd.DataFrame([candles[ts] for ts in sorted(candles)], columns=CANDLE_COLS)
+        df['TS'] = pd.to_datetime(df['TS'], unit='ms')
+        return df
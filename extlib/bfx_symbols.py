@@ -0,0 +1,67 @@
+import threading
+
+import numpy as np
+
+
+def parse_symbol(symbol):
+    """Split a BFX symbol into its legs
+
+    Arguments:
+        symbol {str} -- 'tBTCUSD', 'tDUSK:USD', 'fUSD' etc.
+
+    Returns:
+        tuple -- (LLEG, RLEG, TYPE) i.e. ('BTC', 'USD', 't'), funding symbols have an empty RLEG
+    """
+    sym_type, pair = symbol[0], symbol[1:]
+    if sym_type == 'f':
+        return pair, '', sym_type
+    if ':' in pair:
+        lleg, rleg = pair.split(':', 1)
+        return lleg, rleg, sym_type
+    return pair[:3], pair[-3:], sym_type
+
+
+class SymbolRegistry:
+
+    def __init__(self):
+        """Process wide table of parsed BFX symbols
+
+        Notes:
+            Each symbol is parsed once. The leg arrays of a whole ticker universe are also kept per symbol list,
+            so repeated snapshots of the same universe reuse them as is.
+        """
+        self._symbols = {}
+        self._universes = {}
+        self._lock = threading.Lock()
+
+    def get(self, symbol):
+        parsed = self._symbols.get(symbol)
+        if parsed is None:
+            parsed = parse_symbol(symbol)
+            with self._lock:
+                self._symbols[symbol] = parsed
+        return parsed
+
+    def legs(self, symbols):
+        """LLEG and RLEG arrays for a list of symbols
+
+        Arguments:
+            symbols {list} -- ['tBTCUSD', 'tETHUSD' ...]
+
+        Returns:
+            tuple -- (numpy.ndarray of LLEG, numpy.ndarray of RLEG)
+        """
+        key = tuple(symbols)
+        legs = self._universes.get(key)
+        if legs is None:
+            parsed = [self.get(s) for s in symbols]
+            legs = (np.array([p[0] for p in parsed], dtype=object), np.array([p[1] for p in parsed], dtype=object))
+            with self._lock:
+                # Universes only change on listings, a handful of entries is plenty
+                if len(self._universes) >= 8:
+                    self._universes.clear()
+                self._universes[key] = legs
+        return legs
+
+
+SYMBOLS = SymbolRegistry()
@@ -1,33 +1,180 @@
+import copy
 import hashlib
 import hmac
 import json
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 import numpy as np
 import pandas as pd
 import requests
 
+from extlib.bfx_symbols import SYMBOLS
+from extlib.cache import TTLCache
+from extlib.candle_store import fetch_windows
+from extlib.columnar import ColumnWriter
+from extlib.scheduler import PRIORITY_BULK, PRIORITY_CRITICAL, PRIORITY_NORMAL, RateLimitScheduler
+from extlib.transport import get_session
+
+TRADE_COLS = ['SYMBOL', 'BID', 'BID_SIZE', 'ASK', 'ASK_SIZE', 'DAILY_CHANGE', 'DAILY_CHANGE_PERC',
+              'PX_LAST', 'VOLUME', 'HIGH', 'LOW']
+
+CANDLE_COLS = ['TS', 'OPEN', 'CLOSE', 'HIGH', 'LOW', 'VOLUME']
+MAX_CANDLES = 5000
+
+# Public data cached per process and shared by every BFXV2 instance, keyed by endpoint then request extension
+PUBLIC_CACHE = {
+    'tickers': TTLCache(ttl=5, maxsize=32),
+    'margin_inst': TTLCache(ttl=3600, maxsize=1),
+    'exchange_inst': TTLCache(ttl=3600, maxsize=1),
+    'margin_config': TTLCache(ttl=3600, maxsize=1),
+}
+
+# Calls per minute by endpoint, every authenticated endpoint of an api key shares its 'auth:<key hash>' bucket
+RATE_LIMITS = {'auth': 90, 'v2/tickers': 30, 'v2/candles': 30, 'v2/book': 30, 'v2/stats1': 30, 'v2/conf': 30,
+               'v2/calc': 30}
+
+# Path prefixes served ahead of (critical) or behind (bulk) everything else in the same bucket
+PRIORITIES = {
+    'v2/auth/r/positions': PRIORITY_CRITICAL,
+    'v2/auth/r/wallets': PRIORITY_CRITICAL,
+    'v2/auth/r/info/margin': PRIORITY_CRITICAL,
+    'v2/auth/r/trades/hist': PRIORITY_BULK,
+    'v2/auth/r/ledgers': PRIORITY_BULK,
+    'v2/candles': PRIORITY_BULK,
+}
+
+SCHEDULER = RateLimitScheduler(RATE_LIMITS)
+
+# On-disk layout of paginated chunks, strings are stored as variable length utf8 so none are truncated
+TRADE_DTYPES = {'ID': 'int64', 'PAIR': 'O', 'TS': 'int64', 'ORDER_ID': 'int64', 'AMOUNT': 'float64',
+                'PRICE': 'float64', 'TYPE': 'O', 'ORDER_PRICE': 'float64', 'MAKER': 'float64', 'FEE': 'float64',
+                'FEE_CCY': 'O'}
+LEDGER_DTYPES = {'ID': 'int64', 'CCY': 'O', 'TS': 'int64', 'AMOUNT': 'float64', 'BALANCE': 'float64', 'DESC': 'O'}
+
+
+class PaginationError(Exception):
+    pass
+
+
+_nonce_lock = threading.Lock()
+_last_nonce = 0
+# Held per api key from signing a request until its response arrives, see BFXV2._req
+_signing_locks = {}
+
+
+def get_freq_ms():
+    """Returns candle frequency in ms, '1M' is left out as months are not a fixed length"""
+    return {'1m': 60000, '5m': 300000, '15m': 900000, '30m': 1800000, '1h': 3600000, '3h': 10800000,
+            '6h': 21600000, '12h': 43200000, '1D': 86400000, '7D': 604800000, '14D': 1209600000}
+
 
 class BFXV2:
-    def __init__(self, key=None, secret=None):
+    def __init__(self, key=None, secret=None, session=None, use_cache=True, scheduler=None):
         """BFX V2 REST Public and Authenticated endpoints
 
         Keyword Arguments:
             key {str} -- api key generated from BFX (default: {None})
             secret {str} -- api secret generated from BFX (default: {None})
+            session {requests.Session} -- session to send requests through, shared pooled session if None (default: {None})
+            use_cache {bool} -- Serve public data from PUBLIC_CACHE while fresh (default: {True})
+            scheduler {RateLimitScheduler} -- queues calls under the BFX rate limits, shared SCHEDULER if None (default: {None})
         """
         self.url = 'https://api.bitfinex.com/'
         self.key = key
         self.secret = secret
+        # Authenticated limits are per api key, the bucket is named after a hash so stats never show the key
+        self.auth_bucket = f'auth:{hashlib.sha256(key.encode()).hexdigest()[:12]}' if key else 'auth'
+        self.session = session if session else get_session(self.url)
+        self.use_cache = use_cache
+        self.scheduler = scheduler if scheduler else SCHEDULER
+
+    def _bucket(self, path):
+        """Rate limit bucket of a request path, i.e. 'v2/candles/trade:1h:tBTCUSD/hist' -> 'v2/candles'"""
+        if path.startswith('v2/auth/'):
+            return self.auth_bucket
+        return '/'.join(path.split('?')[0].split('/')[:2])
+
+    @staticmethod
+    def _priority(path):
+        return next((p for prefix, p in PRIORITIES.items() if path.startswith(prefix)), PRIORITY_NORMAL)
+
+    def _schedule(self, path):
+        """Block until path may be sent under the rate limits"""
+        self.scheduler.acquire(self._bucket(path), self._priority(path))
+
+    def scheduler_stats(self):
+        """Queue depth and wait time metrics per rate limit bucket"""
+        return self.scheduler.stats()
+
+    def _get(self, extension, **kwargs):
+        self._schedule(extension)
+        return self.session.get(self.url + extension, **kwargs)
+
+    def _post(self, extension, **kwargs):
+        self._schedule(extension)
+        return self.session.post(self.url + extension, **kwargs)
+
+    @staticmethod
+    def cache_stats():
+        """Hit/miss counters of the public data cache
+
+        Returns:
+            dict -- {'tickers': {'hits': 3, 'misses': 1, 'size': 1, 'ttl': 5, 'maxsize': 32}, ...}
+        """
+        return {endpoint: cache.stats() for endpoint, cache in PUBLIC_CACHE.items()}
+
+    @staticmethod
+    def invalidate_cache(endpoint=None):
+        """Drop cached public data
+
+        Keyword Arguments:
+            endpoint {str} -- 'tickers', 'margin_inst', 'exchange_inst', 'margin_config' or None for all (default: {None})
+        """
+        endpoints = [endpoint] if endpoint else PUBLIC_CACHE.keys()
+        for ep in endpoints:
+            PUBLIC_CACHE[ep].invalidate()
+
+    def _get_public(self, endpoint, extension, **kwargs):
+        """GET a public endpoint through the cache
+
+        Notes:
+            Cached payloads are shared, callers must copy before mutating them
+
+        Arguments:
+            endpoint {str} -- Key of PUBLIC_CACHE
+            extension {str} -- Path and query of request (i.e. "v2/tickers?symbols=ALL")
+
+        Returns:
+            json -- Response payload
+        """
+        cache = PUBLIC_CACHE[endpoint] if self.use_cache else None
+        if cache:
+            data = cache.get(extension)
+            if data is not None:
+                return data
+
+        res = self._get(extension, **kwargs)
+        data = res.json()
+        if cache and res.status_code == 200:
+            cache.set(extension, data)
+        return data
 
     @staticmethod
     def _get_nonce():
         """Get a unique nonce based on time
 
+        Notes:
+            Nonces must strictly increase per api key, so two calls in the same 0.1ms are bumped apart
+
         Returns:
             str -- A nonce based on current time
         """
-        return str(int(round(time.time() * 10000)))
+        global _last_nonce
+        with _nonce_lock:
+            _last_nonce = max(int(round(time.time() * 10000)), _last_nonce + 1)
+            return str(_last_nonce)
 
     def _get_headers(self, body, path):
         """Get headers for authenticated endpoints
@@ -64,13 +211,22 @@ class BFXV2:
         Returns:
             requests.models.Response -- Data that is requested in JSON format
         """
+        # Wait for the rate limit before signing so a queued call never goes out with a stale nonce
+        self._schedule(path)
         params = params if params else {}
         raw_body = json.dumps(params)
-        headers = self._get_headers(raw_body, path)
         url = self.url + path
-        resp = requests.post(url, headers=headers, data=raw_body, verify=True)
+        # BFX rejects a nonce lower than one it has seen, so calls of one key are sent one at a time from signing
+        # to response, a later nonce can never reach the exchange first
+        with self._signing_lock():
+            headers = self._get_headers(raw_body, path)
+            resp = self.session.post(url, headers=headers, data=raw_body, verify=True)
         return resp
 
+    def _signing_lock(self):
+        with _nonce_lock:
+            return _signing_locks.setdefault(self.key, threading.Lock())
+
     def get_oi(self, symbol):
         """Get open interest of a symbol
 
@@ -82,11 +238,14 @@ class BFXV2:
         """
         oi = []
         for side in ['long', 'short']:
-            extension = f'v2/stats1/pos.size:1m:t{symbol}:{side}/last'
-            res = requests.get(self.url + extension)
+            res = self._get(self._oi_extension(symbol, side))
             oi.append(res.json())
         return oi
 
+    @staticmethod
+    def _oi_extension(symbol, side):
+        return f'v2/stats1/pos.size:1m:t{symbol}:{side}/last'
+
     def get_margin_inst(self):
         """Get a list of list of margin instruments
 
@@ -94,8 +253,7 @@ class BFXV2:
             list -- ['BABBTC', 'BABUSD', 'BSVBTC' ...]]
         """
         extension = f'v2/conf/pub:list:pair:margin'
-        res = requests.get(self.url + extension)
-        return res.json()[0]
+        return list(self._get_public('margin_inst', extension)[0])
 
     def get_exchange_inst(self):
         """Get a list of exchanged traded instruments
@@ -104,8 +262,7 @@ class BFXV2:
             list -- ['BABBTC', 'BABUSD', 'BSVBTC' ...]
         """
         extension = f'v2/conf/pub:list:pair:exchange'
-        res = requests.get(self.url + extension, timeout=10)
-        return res.json()
+        return copy.deepcopy(self._get_public('exchange_inst', extension, timeout=10))
 
     def get_margin_info(self, key):
         """Get account margin information (like P/L, Swaps, Margin Balance, Tradable Balance and others).
@@ -134,19 +291,27 @@ class BFXV2:
             pandas.DataFrame -- DataFrame of required trade ticker
         """
         extension = 'v2/tickers?symbols={}'.format(coin)
-        res = requests.get(self.url + extension)
-        trade_cols = ['SYMBOL', 'BID', 'BID_SIZE', 'ASK', 'ASK_SIZE', 'DAILY_CHANGE', 'DAILY_CHANGE_PERC',
-                      'PX_LAST', 'VOLUME', 'HIGH', 'LOW']
-        trade_data = (x for x in res.json() if x[0].startswith('t'))
-        df_tickers = pd.DataFrame(trade_data, columns=trade_cols)
-
-        df_tickers['LLEG'] = np.where(df_tickers['SYMBOL'].str.contains(':'),
-                                      df_tickers['SYMBOL'].str.split(':').str[0].str[1:],
-                                      df_tickers['SYMBOL'].str[1:4])
-
-        df_tickers['RLEG'] = np.where(df_tickers['SYMBOL'].str.contains(':'),
-                                      df_tickers['SYMBOL'].str.split(':').str[1],
-                                      df_tickers['SYMBOL'].str[-3:])
+        return self._parse_tickers(self._get_public('tickers', extension))
+
+    @staticmethod
+    def _parse_tickers(data):
+        """Parse raw v2/tickers response into the trade ticker DataFrame
+
+        Arguments:
+            data {list} -- Raw JSON response of v2/tickers
+
+        Returns:
+            pandas.DataFrame -- DataFrame of trade tickers with LLEG and RLEG
+        """
+        trade_data = [x for x in data if x[0][0] == 't']
+        symbols = [x[0] for x in trade_data]
+        values = np.array([x[1:len(TRADE_COLS)] for x in trade_data], dtype=float).reshape(-1, len(TRADE_COLS) - 1)
+
+        df_tickers = pd.DataFrame(values, columns=TRADE_COLS[1:])
+        df_tickers.insert(0, 'SYMBOL', symbols)
+        lleg, rleg = SYMBOLS.legs(symbols)
+        df_tickers['LLEG'] = lleg.copy()
+        df_tickers['RLEG'] = rleg.copy()
         return df_tickers
 
     def get_bfx_fx(self, ccy1, ccy2):
@@ -161,13 +326,13 @@ class BFXV2:
         """
         extension = 'v2/calc/fx'
         params = {'ccy1': ccy1, 'ccy2': ccy2}
-        res = requests.post(self.url + extension, params=params)
+        res = self._post(extension, params=params)
 
         fx_rate = res.json()
         output = {'LLEG': ccy1, 'RLEG': ccy2, 'FX_RATE': fx_rate[0]}
         return output
 
-    def get_candles(self, freq, coin, section, start=None, end=None, limit=20, sort=-1):
+    def get_candles(self, freq, coin, section, start=None, end=None, limit=20, sort=-1, store=None):
         """Calls BFX candles API to get candle data OHLCV
 
         Arguments:
@@ -180,19 +345,30 @@ class BFXV2:
             end {int} -- ms end time for candles (default: {None})
             limit {int} -- Number of candles requested (max: 5000) (default: {20})
             sort {int} -- If = 1 it sorts results returned with old > new (default: {-1})
+            store {CandleStore} -- Cache-through mode for 'hist' with a start: reads from the store and only pulls
+                                   bars after the last stored one, limit is ignored (default: {None})
 
         Returns:
             pandas.DataFrame -- DataFrame of candles
         """
+        if store is not None and section == 'hist' and start is not None:
+            step = get_freq_ms()[freq]
+            end = end if end is not None else int(time.time() * 1000)
+
+            def fetch(st, en):
+                def fetch_page(page_st, page_en):
+                    return self.get_candles(freq, coin, 'hist', start=page_st, end=page_en, limit=MAX_CANDLES, sort=1)
+                return fetch_windows(fetch_page, st, en, step * MAX_CANDLES)
+            return store.cache_through('bfx', coin, freq, start, end, step, fetch)
+
         extension = f'v2/candles/trade:{freq}:{coin}/{section}'
         params = {'limit': limit, 'sort': sort, 'start': start, 'end': end}
-        res = requests.get(self.url + extension, params=params, timeout=10)
+        res = self._get(extension, params=params, timeout=10)
 
         if not res.status_code == 500:
             # If data is 'last' then wrap it in a list to keep list in row format in DataFrame
             data = res.json() if section == 'hist' else [res.json()]
-            df = pd.DataFrame(data)
-            df.rename(columns=dict(zip(df.columns, ['TS', 'OPEN', 'CLOSE', 'HIGH', 'LOW', 'VOLUME'])), inplace=True)
+            df = pd.DataFrame(data, columns=CANDLE_COLS)
             df['TS'] = pd.to_datetime(df['TS'], unit='ms')
             df.sort_values('TS', inplace=True)
             return df
@@ -207,20 +383,44 @@ class BFXV2:
             pandas.DataFrame -- DataFrame of wallets
         """
         res = self._req(f'v2/auth/r/wallets')
-        df = pd.DataFrame(res.json())
-        df.rename(columns=dict(zip(df.columns, ['WALLET_TYPE', 'CURRENCY', 'BALANCE',
-                                                'UNSETTLED_INTEREST', 'BALANCE_AVAILABLE', '1', '2'])), inplace=True)
+        df = self._parse_wallets(res.json())
 
         if not df.empty:
             if wallet_type != 'all':
                 df = df[df['WALLET_TYPE'] == wallet_type]
+            df = self._value_wallets(df, self.get_trade_ticker_info())
+        return df
+
+    @staticmethod
+    def _parse_wallets(data):
+        """Parse raw wallets response
+
+        Arguments:
+            data {list} -- Raw JSON response of v2/auth/r/wallets
 
-            # Compute dollar value for the wallet
-            df_tickers = self.get_trade_ticker_info()
-            df_tickers = df_tickers[df_tickers['RLEG'] == 'USD']
-            df = df.merge(df_tickers[['LLEG', 'PX_LAST']], how='left', left_on='CURRENCY', right_on='LLEG')
-            df.loc[df['CURRENCY'] == 'USD', 'PX_LAST'] = 1
-            df['USD_VAL'] = df['BALANCE'].mul(df['PX_LAST'])
+        Returns:
+            pandas.DataFrame -- DataFrame of wallets
+        """
+        df = pd.DataFrame(data)
+        df.rename(columns=dict(zip(df.columns, ['WALLET_TYPE', 'CURRENCY', 'BALANCE',
+                                                'UNSETTLED_INTEREST', 'BALANCE_AVAILABLE', '1', '2'])), inplace=True)
+        return df
+
+    @staticmethod
+    def _value_wallets(df, df_tickers):
+        """Compute dollar value for the wallets
+
+        Arguments:
+            df {pandas.DataFrame} -- DataFrame of wallets from _parse_wallets
+            df_tickers {pandas.DataFrame} -- DataFrame of trade tickers
+
+        Returns:
+            pandas.DataFrame -- DataFrame of wallets with PX_LAST and USD_VAL
+        """
+        df_tickers = df_tickers[df_tickers['RLEG'] == 'USD']
+        df = df.merge(df_tickers[['LLEG', 'PX_LAST']], how='left', left_on='CURRENCY', right_on='LLEG')
+        df.loc[df['CURRENCY'] == 'USD', 'PX_LAST'] = 1
+        df['USD_VAL'] = df['BALANCE'].mul(df['PX_LAST'])
         return df
 
     def get_positions(self, adjusted_pnl=False):
@@ -238,17 +438,41 @@ class BFXV2:
         except requests.exceptions.HTTPError as err:
             return f'Error: {err}'
 
-        df = pd.DataFrame(res.json())
+        df = self._parse_positions(res.json())
+
+        if not df.empty and adjusted_pnl:
+            df = self._adjust_positions_pnl(df, self.get_trade_ticker_info())
+        return df
 
+    @staticmethod
+    def _parse_positions(data):
+        """Parse raw positions response
+
+        Arguments:
+            data {list} -- Raw JSON response of v2/auth/r/positions
+
+        Returns:
+            pandas.DataFrame -- DataFrame of positions
+        """
+        df = pd.DataFrame(data)
         if not df.empty:
             df.rename(
                 columns=dict(zip(df.columns, ['INST', 'STATUS', 'AMOUNT', 'BASE_PRICE', 'FUNDING', 'FUNDING_TYPE', 'PNL'])), inplace=True)
+        return df
+
+    @staticmethod
+    def _adjust_positions_pnl(df, df_tickers):
+        """Compute PnL off the current ticker price as BFX takes exit fees into account
 
-            if adjusted_pnl:
-                df_tickers = self.get_trade_ticker_info()
-                df = pd.merge(df, df_tickers[['SYMBOL', 'PX_LAST']], how='left', left_on='INST', right_on='SYMBOL')
-                df['ADJUSTED_PNL'] = (df['PX_LAST'] - df['BASE_PRICE']) * df['AMOUNT']
+        Arguments:
+            df {pandas.DataFrame} -- DataFrame of positions from _parse_positions
+            df_tickers {pandas.DataFrame} -- DataFrame of trade tickers
 
+        Returns:
+            pandas.DataFrame -- DataFrame of positions with PX_LAST and ADJUSTED_PNL
+        """
+        df = pd.merge(df, df_tickers[['SYMBOL', 'PX_LAST']], how='left', left_on='INST', right_on='SYMBOL')
+        df['ADJUSTED_PNL'] = (df['PX_LAST'] - df['BASE_PRICE']) * df['AMOUNT']
         return df
 
     def get_ledgers(self, ccy, start, end, category, limit=500):
@@ -304,6 +528,107 @@ class BFXV2:
         else:
             return pd.DataFrame()
 
+    def iter_trades(self, start, end, limit=1000, path=None):
+        """Walk trades from end back to start page by page
+
+        Notes:
+            See _paginate
+
+        Arguments:
+            start {int} -- ms start time
+            end {int} -- ms end time
+
+        Keyword Arguments:
+            limit {int} -- Page size (max: 1000) (default: {1000})
+            path {str} -- If set, chunks are also appended to a columnar store at path (default: {None})
+
+        Yields:
+            pandas.DataFrame -- DataFrame of trades, newest first
+        """
+        def fetch(st, en):
+            return self.get_trades(st, en, limit=limit)
+        return self._paginate(fetch, start, end, limit, path, TRADE_DTYPES)
+
+    def iter_ledgers(self, ccy, start, end, category, limit=500, path=None):
+        """Walk ledgers from end back to start page by page
+
+        Notes:
+            See _paginate
+
+        Arguments:
+            ccy {str} -- 'USD', 'BTC', 'ETH' etc.
+            start {int} -- ms start time
+            end {int} -- ms end time
+            category {int} -- 201 for Trading fees/31 for settlement fees/22 for positions closed
+
+        Keyword Arguments:
+            limit {int} -- Page size (max: 500) (default: {500})
+            path {str} -- If set, chunks are also appended to a columnar store at path (default: {None})
+
+        Yields:
+            pandas.DataFrame -- DataFrame of ledger entries, newest first
+        """
+        def fetch(st, en):
+            return self.get_ledgers(ccy, st, en, category, limit=limit)
+        return self._paginate(fetch, start, end, limit, path, LEDGER_DTYPES)
+
+    @staticmethod
+    def _paginate(fetch, start, end, limit, path=None, dtypes=None):
+        """Generic newest first cursor walk over a BFX history endpoint
+
+        Notes:
+            - Each page moves end back to the oldest TS seen. That TS is requested again so rows sharing the
+              millisecond are not lost, and the IDs already yielded at that TS are dropped.
+            - The endpoints only filter by ms, so a full page of one millisecond can't be paged through. Rather
+              than skip the rest of that millisecond, PaginationError is raised, retry with a larger limit.
+            - The next page is fetched in the background while the caller works on the current chunk.
+            - With path set, chunks are appended to a ColumnWriter as they arrive (TS in ms), see extlib.columnar.
+
+        Arguments:
+            fetch {function} -- fetch(start, end) returning a page DataFrame with ID and TS columns
+            start {int} -- ms start time
+            end {int} -- ms end time
+            limit {int} -- Page size, a shorter page ends the walk
+
+        Keyword Arguments:
+            path {str} -- Directory of the columnar store (default: {None})
+            dtypes {dict} -- Column dtypes of the columnar store (default: {None})
+
+        Raises:
+            PaginationError -- A full page shares one TS, the rows of that ms past the page can't be reached
+
+        Yields:
+            pandas.DataFrame -- Page of new rows
+        """
+        writer = ColumnWriter(path, dtypes) if path else None
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            future = executor.submit(fetch, start, end)
+            seen = set()
+            while future:
+                df = future.result()
+                future = None
+                if df.empty:
+                    break
+
+                ts = df['TS'].values.astype('datetime64[ms]').astype('int64')
+                oldest = int(ts.min())
+                is_new = ~df['ID'].isin(seen).values
+                if len(df.index) >= limit:
+                    if oldest == ts.max():
+                        raise PaginationError(f'{limit} rows at {oldest} ms fill a whole page, the rest of that '
+                                              'millisecond can not be reached, retry with a larger limit')
+                    future = executor.submit(fetch, start, oldest)
+                seen = set(df['ID'].values[ts == oldest])
+
+                df = df[is_new]
+                if df.empty:
+                    continue
+                if writer:
+                    df_disk = df[list(dtypes)].copy()
+                    df_disk['TS'] = df_disk['TS'].values.astype('datetime64[ms]').astype('int64')
+                    writer.append(df_disk)
+                yield df
+
     def get_margin_config(self):
         """Get margin settings from BFX
 
@@ -311,9 +636,7 @@ class BFXV2:
             pandas.DataFrame -- DataFrame margin and risk coefficients (1 - haircut)
         """
         extension = f'v2/conf/pub:spec:margin'
-        res = requests.get(self.url + extension, timeout=10)
-
-        data = res.json()[0]
+        data = self._get_public('margin_config', extension, timeout=10)[0]
         haircut_dict = data.get('conf')
         initial_dict = data.get('initial')
         mm_dict = data.get('minimum')
@@ -347,7 +670,7 @@ class BFXV2:
         """
         extension = f'v2/book/{symbol}/{precision}'
         params = {'len': depth}
-        res = requests.get(self.url + extension, params=params, timeout=10)
+        res = self._get(extension, params=params, timeout=10)
 
         df = pd.DataFrame(res.json(), columns=['PRICE', 'COUNT', 'AMOUNT'])
         df_bid = df[df['AMOUNT'] > 0].copy()
@@ -376,7 +699,18 @@ class BFXV2:
         Returns:
             list -- list of dictionary of positions
         """
-        df_cur_pos = self.get_positions(adjusted_pnl=True)
+        return self._format_cur_pos(self.get_positions(adjusted_pnl=True))
+
+    @staticmethod
+    def _format_cur_pos(df_cur_pos):
+        """Format adjusted positions into list of dictionary of positions
+
+        Arguments:
+            df_cur_pos {pandas.DataFrame} -- DataFrame of positions with ADJUSTED_PNL
+
+        Returns:
+            list -- list of dictionary of positions
+        """
         if len(df_cur_pos.index) == 0:
             cur_pos = {}
         else:
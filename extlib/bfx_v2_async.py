@@ -0,0 +1,150 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+import requests
+
+from extlib.bfx_v2 import BFXV2
+from extlib.transport import DEFAULT_POOL_SIZE
+
+
+class AsyncBFXV2:
+
+    def __init__(self, key=None, secret=None, session=None, max_workers=DEFAULT_POOL_SIZE, scheduler=None):
+        """asyncio BFX V2 REST client with the same public methods as BFXV2 as coroutines
+
+        Notes:
+            Requests go through the pooled BFXV2 session, scheduler and nonce on a thread pool. Composite methods
+            (get_oi, get_wallets, get_positions, get_aum, get_cur_pos) send their independent requests concurrently,
+            so their wall-clock time is set by the slowest request rather than the sum of them. Signed requests of
+            one api key are the exception, each holds the key's signing lock until its response arrives so nonces
+            reach BFX in order (see BFXV2._req).
+
+        Keyword Arguments:
+            key {str} -- api key generated from BFX (default: {None})
+            secret {str} -- api secret generated from BFX (default: {None})
+            session {requests.Session} -- session to send requests through, shared pooled session if None (default: {None})
+            max_workers {int} -- Max requests in flight, keep <= the session pool size (default: {DEFAULT_POOL_SIZE})
+            scheduler {RateLimitScheduler} -- queues calls under the BFX rate limits, shared SCHEDULER if None (default: {None})
+        """
+        self.bfx = BFXV2(key=key, secret=secret, session=session, scheduler=scheduler)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    async def _run(self, func, *args, **kwargs):
+        """Run a blocking call on the executor"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, partial(func, *args, **kwargs))
+
+    async def _req(self, path, params=None):
+        """Authenticated request, sent in nonce order with the other signed requests of the key
+
+        Arguments:
+            path {str} -- Path of request (i.e. "v2/auth/r/int/report")
+
+        Keyword Arguments:
+            params {dict} -- Option parameters sent through request (default: {None})
+
+        Returns:
+            requests.models.Response -- Data that is requested in JSON format
+        """
+        return await self._run(self.bfx._req, path, params)
+
+    async def _get_json(self, extension, **kwargs):
+        res = await self._run(self.bfx._get, extension, **kwargs)
+        return res.json()
+
+    async def get_oi(self, symbol):
+        return list(await asyncio.gather(*[self._get_json(self.bfx._oi_extension(symbol, side))
+                                           for side in ['long', 'short']]))
+
+    async def get_margin_inst(self):
+        return await self._run(self.bfx.get_margin_inst)
+
+    async def get_exchange_inst(self):
+        return await self._run(self.bfx.get_exchange_inst)
+
+    async def get_margin_info(self, key):
+        res = await self._req(f'v2/auth/r/info/margin/base')
+        return res.json()
+
+    async def get_trade_ticker_info(self, coin='ALL'):
+        return await self._run(self.bfx.get_trade_ticker_info, coin)
+
+    async def get_bfx_fx(self, ccy1, ccy2):
+        return await self._run(self.bfx.get_bfx_fx, ccy1, ccy2)
+
+    async def get_candles(self, freq, coin, section, start=None, end=None, limit=20, sort=-1):
+        return await self._run(self.bfx.get_candles, freq, coin, section, start=start, end=end, limit=limit, sort=sort)
+
+    async def get_wallets(self, wallet_type='all'):
+        res, df_tickers = await asyncio.gather(self._req(f'v2/auth/r/wallets'), self.get_trade_ticker_info())
+        df = self.bfx._parse_wallets(res.json())
+
+        if not df.empty:
+            if wallet_type != 'all':
+                df = df[df['WALLET_TYPE'] == wallet_type]
+            df = self.bfx._value_wallets(df, df_tickers)
+        return df
+
+    async def get_positions(self, adjusted_pnl=False):
+        if adjusted_pnl:
+            res, df_tickers = await asyncio.gather(self._req(f'v2/auth/r/positions'), self.get_trade_ticker_info())
+        else:
+            res = await self._req(f'v2/auth/r/positions')
+
+        try:
+            res.raise_for_status()
+        except requests.exceptions.HTTPError as err:
+            return f'Error: {err}'
+
+        df = self.bfx._parse_positions(res.json())
+
+        if not df.empty and adjusted_pnl:
+            df = self.bfx._adjust_positions_pnl(df, df_tickers)
+        return df
+
+    async def get_ledgers(self, ccy, start, end, category, limit=500):
+        return await self._run(self.bfx.get_ledgers, ccy, start, end, category, limit=limit)
+
+    async def get_trades(self, start, end, limit=1000, sort=-1):
+        return await self._run(self.bfx.get_trades, start, end, limit=limit, sort=sort)
+
+    async def get_margin_config(self):
+        return await self._run(self.bfx.get_margin_config)
+
+    async def get_order_books(self, symbol, precision='P0', depth=100):
+        return await self._run(self.bfx.get_order_books, symbol, precision=precision, depth=depth)
+
+    async def get_aum(self):
+        """Returns the aum of your margin account
+
+        Notes:
+            Positions, wallets and one shared ticker snapshot are fetched concurrently
+
+        Returns:
+            float -- how much dough you have duh
+        """
+        res_pos, res_wallets, df_tickers = await asyncio.gather(
+            self._req(f'v2/auth/r/positions'), self._req(f'v2/auth/r/wallets'), self.get_trade_ticker_info())
+        res_pos.raise_for_status()
+
+        df_cur_pos = self.bfx._parse_positions(res_pos.json())
+        if not df_cur_pos.empty:
+            df_cur_pos = self.bfx._adjust_positions_pnl(df_cur_pos, df_tickers)
+
+        df_margin_wallet = self.bfx._parse_wallets(res_wallets.json())
+        if not df_margin_wallet.empty:
+            df_margin_wallet = df_margin_wallet[df_margin_wallet['WALLET_TYPE'] == 'margin']
+            df_margin_wallet = self.bfx._value_wallets(df_margin_wallet, df_tickers)
+
+        gross_aum = df_margin_wallet['USD_VAL'].sum()
+        pnl = df_cur_pos['ADJUSTED_PNL'].sum()
+        aum = gross_aum + pnl
+        return aum
+
+    async def get_cur_pos(self):
+        return self.bfx._format_cur_pos(await self.get_positions(adjusted_pnl=True))
+
+    def close(self):
+        """Shut down the executor, the shared session is left open for other clients"""
+        self.executor.shutdown(wait=False)
@@ -1,33 +1,117 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
 import pandas as pd
-import requests
+
+from extlib.scheduler import RateLimitScheduler
+from extlib.transport import SERVER_ERROR_STATUSES, get_session
+from extlib.utils import split_range
+
+MAX_KLINES = 1000
+KLINE_COLS = ['TS', 'OPEN', 'HIGH', 'LOW', 'CLOSE', 'VOLUME', 'CLOSE_TS', 'QUOTE_VOLUME', 'TRADES',
+              'TAKER_BUY_VOLUME', 'TAKER_BUY_QUOTE_VOLUME']
+
+# Limits are in request weight per minute per IP, every call takes its weight out of the 'weight' bucket
+RATE_LIMITS = {'weight': 1200}
+SCHEDULER = RateLimitScheduler(RATE_LIMITS)
+WEIGHTS = {'v1/klines': 2}
+
+
+def get_interval_ms():
+    """Returns kline interval in ms, '1M' is left out as months are not a fixed length"""
+    minute = 60000
+    return {'1m': minute, '3m': 3 * minute, '5m': 5 * minute, '15m': 15 * minute, '30m': 30 * minute,
+            '1h': 60 * minute, '2h': 120 * minute, '4h': 240 * minute, '6h': 360 * minute, '8h': 480 * minute,
+            '12h': 720 * minute, '1d': 1440 * minute, '3d': 4320 * minute, '1w': 10080 * minute}
 
 
 class Bin:
 
-    def __init__(self):
-        """Binance exchange REST API"""
+    def __init__(self, session=None, scheduler=None):
+        """Binance exchange REST API
+
+        Notes:
+            Repeated 429s get the IP banned (418), so the session never re-sends a 429. Calls wait on the
+            scheduler's weight bucket instead and a 429 or 418 is raised to the caller.
+
+        Keyword Arguments:
+            session {requests.Session} -- session to send requests through, shared pooled session if None (default: {None})
+            scheduler {RateLimitScheduler} -- queues calls under the Binance weight limit, shared SCHEDULER if None (default: {None})
+        """
         self.base_url = 'https://api.binance.com/api/'
+        self.session = session if session else get_session(self.base_url, statuses=SERVER_ERROR_STATUSES)
+        self.scheduler = scheduler if scheduler else SCHEDULER
+
+    def _get(self, extension, **kwargs):
+        self.scheduler.acquire('weight', weight=WEIGHTS.get(extension, 1))
+        return self.session.get(self.base_url + extension, **kwargs)
 
-    def get_candles(self, coin, freq):
+    def get_candles(self, coin, freq, start=None, end=None, max_workers=4, store=None):
         """Get historical candles
 
+        Notes:
+            Without start only the latest 500 klines are returned. With start, [start, end] is split into
+            windows of 1000 klines fetched concurrently and stitched back together. Calls are queued under
+            RATE_LIMITS whatever max_workers is.
+
         Arguments:
-            coin {str} -- coin to pull candle data for (btc-usd)
-            start {datetime} -- date to start data pull for in iso 8601 format
-            end {datetime} -- date to end data pull for in iso 8601 format
+            coin {str} -- coin to pull candle data for (BTCUSDT)
+            freq {str} -- '1m', '5m', '1h', '1d' etc.
+
+        Keyword Arguments:
+            start {datetime} -- date to start data pull for (default: {None})
+            end {datetime} -- date to end data pull for, now if None (default: {None})
+            max_workers {int} -- windows in flight at once (default: {4})
+            store {CandleStore} -- Cache-through mode when start is given: read from the store and only pull
+                                   bars after the last stored one (default: {None})
 
         Returns:
             pandas.DataFrame -- DataFrame of candles
+                Columns: ['TS', 'OPEN', 'HIGH', 'LOW', 'CLOSE', 'VOLUME', 'CLOSE_TS', 'QUOTE_VOLUME', 'TRADES',
+                          'TAKER_BUY_VOLUME', 'TAKER_BUY_QUOTE_VOLUME']
         """
-        extension = f'v1/klines'
-        params = {'symbol': coin, 'interval': freq}
-        res = requests.get(self.base_url + extension, params=params, timeout=10)
-        df = pd.DataFrame(res.json())
-        df.rename(columns=dict(zip(df.columns, ['TS', 'LOW', 'HIGH', 'OPEN', 'CLOSE', 'VOLUME'])), inplace=True)
-        df['TS'] = pd.to_datetime(df['TS'], unit='ms')
+        if store is not None and start is not None:
+            def fetch(st, en):
+                return self.get_candles(coin, freq, pd.Timestamp(st, unit='ms'), pd.Timestamp(en, unit='ms'),
+                                        max_workers)
+            st_ms = int(pd.Timestamp(start).timestamp() * 1000)
+            en_ms = int((pd.Timestamp(end).timestamp() if end is not None else time.time()) * 1000)
+            return store.cache_through('binance', coin, freq, st_ms, en_ms, get_interval_ms()[freq], fetch)
+
+        if start is None:
+            pages = [self._get_kline_page(coin, freq)]
+        else:
+            st = int(pd.Timestamp(start).timestamp() * 1000)
+            en = int((pd.Timestamp(end).timestamp() if end is not None else time.time()) * 1000)
+            windows = split_range(st, en, get_interval_ms()[freq] * MAX_KLINES)
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                pages = list(executor.map(lambda w: self._get_kline_page(coin, freq, w[0], w[1]), windows))
+
+        data = np.concatenate(pages) if pages else np.empty((0, len(KLINE_COLS)))
+        df = pd.DataFrame(data, columns=KLINE_COLS)
+        for col in ['TS', 'CLOSE_TS']:
+            df[col] = pd.to_datetime(df[col].astype('int64'), unit='ms')
+        df['TRADES'] = df['TRADES'].astype('int64')
+        df.drop_duplicates('TS', keep='last', inplace=True)
         df.sort_values('TS', inplace=True)
+        df.reset_index(drop=True, inplace=True)
         return df
 
+    def _get_kline_page(self, coin, freq, start=None, end=None):
+        """One call of at most 1000 klines decoded into a float array, the trailing 'ignore' field is dropped"""
+        extension = f'v1/klines'
+        params = {'symbol': coin, 'interval': freq}
+        if start is not None:
+            params.update({'startTime': start, 'endTime': end, 'limit': MAX_KLINES})
+        res = self._get(extension, params=params, timeout=10)
+        res.raise_for_status()
+        data = res.json()
+        if not data:
+            return np.empty((0, len(KLINE_COLS)))
+        # Prices come back as strings, one vectorized parse of the whole page
+        return np.asarray([row[:len(KLINE_COLS)] for row in data]).astype(float)
+
 
 def get_candles_example():
     """Simple example to get candle data from api"""
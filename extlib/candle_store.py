@@ -0,0 +1,205 @@
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from extlib.columnar import ColumnWriter, read_column, read_meta
+from extlib.utils import split_range
+
+DEFAULT_ROOT = os.path.join(os.path.expanduser('~'), '.extlib', 'candles')
+INT_COLS = ['TRADES']
+
+
+def _is_ts(col):
+    """Columns named TS or ending in _TS hold datetimes, stored as int64 ms"""
+    return col == 'TS' or col.endswith('_TS')
+
+
+def to_ms(values):
+    return np.asarray(values).astype('datetime64[ms]').astype('int64')
+
+
+class CandleStore:
+
+    def __init__(self, root=DEFAULT_ROOT):
+        """On-disk candle history keyed by exchange/symbol/timeframe
+
+        Notes:
+            Each key is an append-only columnar store (see extlib.columnar) sorted by TS. Range reads binary
+            search the memory-mapped TS column and only copy the rows asked for.
+
+        Keyword Arguments:
+            root {str} -- Root directory of the store (default: {DEFAULT_ROOT})
+        """
+        self.root = root
+
+    def path(self, exchange, symbol, timeframe):
+        return os.path.join(self.root, exchange, symbol, str(timeframe))
+
+    def last_ts(self, exchange, symbol, timeframe):
+        """Last stored TS in ms, None if nothing is stored"""
+        path = self.path(exchange, symbol, timeframe)
+        meta = read_meta(path)
+        if not meta or meta['rows'] == 0:
+            return None
+        return int(read_column(path, 'TS', meta)[-1])
+
+    def first_ts(self, exchange, symbol, timeframe):
+        """First stored TS in ms, None if nothing is stored"""
+        path = self.path(exchange, symbol, timeframe)
+        meta = read_meta(path)
+        if not meta or meta['rows'] == 0:
+            return None
+        return int(read_column(path, 'TS', meta)[0])
+
+    def append(self, exchange, symbol, timeframe, df):
+        """Append candles newer than the last stored bar
+
+        Arguments:
+            exchange {str} -- 'bfx', 'coinbase', 'binance'
+            symbol {str} -- Exchange symbol
+            timeframe {str} -- Exchange timeframe ('1h', 3600 etc.)
+            df {pandas.DataFrame} -- Candles with a TS column, as returned by the client's get_candles
+
+        Returns:
+            int -- Number of bars appended
+        """
+        if df is None or df.empty:
+            return 0
+        df = df.copy()
+        for col in df.columns:
+            if _is_ts(col):
+                df[col] = to_ms(df[col].values)
+        df = df.drop_duplicates('TS', keep='last').sort_values('TS')
+
+        last = self.last_ts(exchange, symbol, timeframe)
+        if last is not None:
+            df = df[df['TS'] > last]
+        dtypes = {col: 'int64' if _is_ts(col) or col in INT_COLS else 'float64' for col in df.columns}
+        writer = ColumnWriter(self.path(exchange, symbol, timeframe), dtypes)
+        writer.append(df)
+        return len(df.index)
+
+    def read(self, exchange, symbol, timeframe, start=None, end=None):
+        """Read stored candles in [start, end]
+
+        Arguments:
+            exchange {str} -- 'bfx', 'coinbase', 'binance'
+            symbol {str} -- Exchange symbol
+            timeframe {str} -- Exchange timeframe
+
+        Keyword Arguments:
+            start {int} -- ms start time, from the first bar if None (default: {None})
+            end {int} -- ms end time (inclusive), to the last bar if None (default: {None})
+
+        Returns:
+            pandas.DataFrame -- Candles in the same shape as the client's get_candles
+        """
+        data = self._read_arrays(exchange, symbol, timeframe, start, end)
+        return pd.DataFrame(data) if data else pd.DataFrame()
+
+    def _read_arrays(self, exchange, symbol, timeframe, start=None, end=None):
+        """Column arrays of stored candles in [start, end], empty dict if nothing is stored"""
+        path = self.path(exchange, symbol, timeframe)
+        meta = read_meta(path)
+        if not meta or meta['rows'] == 0:
+            return {}
+
+        ts = read_column(path, 'TS', meta)
+        lo = 0 if start is None else np.searchsorted(ts, start, side='left')
+        hi = len(ts) if end is None else np.searchsorted(ts, end, side='right')
+
+        data = {}
+        for col in meta['dtypes']:
+            values = np.array(read_column(path, col, meta)[lo:hi])
+            data[col] = values.astype('datetime64[ms]').astype('datetime64[ns]') if _is_ts(col) else values
+        return data
+
+    def read_many(self, exchange, symbols, timeframe, start=None, end=None):
+        """Read stored candles of many symbols into one long DataFrame with a categorical SYMBOL column
+
+        Returns:
+            pandas.DataFrame -- Candles of every symbol stacked
+        """
+        arrays = [(symbol, self._read_arrays(exchange, symbol, timeframe, start, end)) for symbol in symbols]
+        arrays = [(symbol, data) for symbol, data in arrays if data]
+        if not arrays:
+            return pd.DataFrame()
+
+        # Stack column by column and build the frame once rather than concatenating one frame per symbol
+        cols = list(arrays[0][1])
+        data = {col: np.concatenate([d[col] for _, d in arrays]) for col in cols}
+        lengths = [len(d['TS']) for _, d in arrays]
+        data['SYMBOL'] = pd.Categorical.from_codes(np.repeat(np.arange(len(arrays)), lengths),
+                                                   categories=[symbol for symbol, _ in arrays])
+        return pd.DataFrame(data)
+
+    def cache_through(self, exchange, symbol, timeframe, start, end, step, fetch):
+        """Serve [start, end] from the store, fetching only what is missing
+
+        Notes:
+            Bars after the last stored one are fetched and appended up to end, from the last stored bar even when
+            start is later, so the store never holds gaps. Only closed bars are stored, so the bar still forming is
+            left out. Bars before the first stored one are fetched and returned but not stored, as the
+            store only grows forward.
+
+        Arguments:
+            exchange {str} -- 'bfx', 'coinbase', 'binance'
+            symbol {str} -- Exchange symbol
+            timeframe {str} -- Exchange timeframe
+            start {int} -- ms start time
+            end {int} -- ms end time (inclusive)
+            step {int} -- ms length of one bar
+            fetch {function} -- fetch(start_ms, end_ms) returning candles from the network, stopping early at a
+                                failed request rather than skipping it (see fetch_windows)
+
+        Returns:
+            pandas.DataFrame -- Candles in [start, end]
+        """
+        first = self.first_ts(exchange, symbol, timeframe)
+        last = self.last_ts(exchange, symbol, timeframe)
+        closed_end = min(end, int(time.time() * 1000) - step)
+
+        # The tail is fetched from the last stored bar, not from start, so the store never skips bars
+        tail_start = start if last is None else last + step
+        if tail_start <= closed_end:
+            df_tail = fetch(tail_start, closed_end)
+            if df_tail is not None and not df_tail.empty:
+                self.append(exchange, symbol, timeframe, df_tail[to_ms(df_tail['TS'].values) <= closed_end])
+
+        df = self.read(exchange, symbol, timeframe, start, end)
+        if first is not None and start < first:
+            df_head = fetch(start, min(end, first - step))
+            if df_head is not None and not df_head.empty:
+                head_ts = to_ms(df_head['TS'].values)
+                df_head = df_head[(head_ts >= start) & (head_ts <= min(end, first - step))]
+                df = pd.concat([df_head, df], ignore_index=True, sort=False)
+        return df
+
+
+def fetch_windows(fetch, start, end, step):
+    """Run fetch over [start, end] split into windows of step ms and stack the pages
+
+    Notes:
+        A window that fails (fetch returns None) ends the walk, only the windows before it are returned. The
+        bars after a failed window would otherwise be stored past a hole that CandleStore.append never fills,
+        stopping there leaves the rest to be fetched again on the next call.
+
+    Arguments:
+        fetch {function} -- fetch(start_ms, end_ms) returning one page DataFrame, None if the request failed
+        start {int} -- ms start time
+        end {int} -- ms end time (inclusive)
+        step {int} -- ms length of a window
+
+    Returns:
+        pandas.DataFrame -- Pages stacked in time order, up to the first failed window
+    """
+    pages = []
+    for st, en in split_range(start, end, step):
+        page = fetch(st, en)
+        if page is None:
+            break
+        if not page.empty:
+            pages.append(page)
+    return pd.concat(pages, ignore_index=True) if pages else pd.DataFrame()
@@ -1,35 +1,94 @@
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+import numpy as np
 import pandas as pd
-import requests
+
+from extlib.scheduler import RateLimitScheduler
+from extlib.transport import SERVER_ERROR_STATUSES, get_session
+from extlib.utils import split_range
+
+MAX_CANDLES = 300
+CANDLE_COLS = ['TS', 'LOW', 'HIGH', 'OPEN', 'CLOSE', 'VOLUME']
+
+# Public endpoints allow 3 calls per second per IP with bursts of 6
+RATE_LIMITS = {'public': (180, 6)}
+SCHEDULER = RateLimitScheduler(RATE_LIMITS)
 
 
 class CoinBase:
 
-    def __init__(self):
-        """Coinbase exchange REST API"""
+    def __init__(self, session=None, scheduler=None):
+        """Coinbase exchange REST API
+
+        Keyword Arguments:
+            session {requests.Session} -- session to send requests through, shared pooled session if None (default: {None})
+            scheduler {RateLimitScheduler} -- queues calls under the Coinbase rate limits, shared SCHEDULER if None (default: {None})
+        """
         self.base_url = 'https://api.pro.coinbase.com/'
+        # 429s are not re-sent by the session, every call goes through the scheduler instead
+        self.session = session if session else get_session(self.base_url, statuses=SERVER_ERROR_STATUSES)
+        self.scheduler = scheduler if scheduler else SCHEDULER
+
+    def _get(self, extension, **kwargs):
+        self.scheduler.acquire('public')
+        return self.session.get(self.base_url + extension, **kwargs)
 
-    def get_candles(self, coin, start, end):
+    def get_candles(self, coin, start, end, granularity=86400, max_workers=3, store=None):
         """Get historical candles
 
+        Notes:
+            Coinbase returns at most 300 candles per call, longer ranges are split into windows of 300
+            fetched concurrently and stitched back together. Calls are queued under RATE_LIMITS whatever
+            max_workers is.
+
         Arguments:
             coin {str} -- coin to pull candle data for (btc-usd)
             start {datetime} -- date to start data pull for in iso 8601 format
             end {datetime} -- date to end data pull for in iso 8601 format
 
+        Keyword Arguments:
+            granularity {int} -- candle length in seconds: 60, 300, 900, 3600, 21600, 86400 (default: {86400})
+            max_workers {int} -- windows in flight at once, throughput is capped by the scheduler (default: {3})
+            store {CandleStore} -- Cache-through mode: read from the store and only pull bars after the last
+                                   stored one (default: {None})
+
         Returns:
             pandas.DataFrame -- DataFrame of candles
         """
-        extension = f'products/{coin}/candles'
-        params = {'start': start, 'end': end, 'granularity': 86400}
-        res = requests.get(self.base_url + extension, params=params, timeout=10)
-        df = pd.DataFrame(res.json())
-        df.rename(columns=dict(zip(df.columns, ['TS', 'LOW', 'HIGH', 'OPEN', 'CLOSE', 'VOLUME'])), inplace=True)
-        df['TS'] = pd.to_datetime(df['TS'], unit='s')
+        if store is not None:
+            def fetch(st, en):
+                return self.get_candles(coin, pd.Timestamp(st, unit='ms').isoformat(),
+                                        pd.Timestamp(en, unit='ms').isoformat(), granularity, max_workers)
+            st_ms = int(pd.Timestamp(start).timestamp() * 1000)
+            en_ms = int(pd.Timestamp(end).timestamp() * 1000)
+            return store.cache_through('coinbase', coin, granularity, st_ms, en_ms, granularity * 1000, fetch)
+
+        st = int(pd.Timestamp(start).timestamp())
+        en = int(pd.Timestamp(end).timestamp())
+        windows = split_range(st, en, granularity * MAX_CANDLES)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            pages = list(executor.map(lambda w: self._get_candle_page(coin, w[0], w[1], granularity), windows))
+
+        pages = [p for p in pages if len(p)]
+        data = np.concatenate(pages) if pages else np.empty((0, len(CANDLE_COLS)))
+        df = pd.DataFrame(data, columns=CANDLE_COLS)
+        df['TS'] = pd.to_datetime(df['TS'].astype('int64'), unit='s')
+        df.drop_duplicates('TS', keep='last', inplace=True)
         df.sort_values('TS', inplace=True)
+        df.reset_index(drop=True, inplace=True)
         return df
 
+    def _get_candle_page(self, coin, start, end, granularity):
+        """One call of at most 300 candles decoded into a float array [[time, low, high, open, close, volume]]"""
+        extension = f'products/{coin}/candles'
+        params = {'start': datetime.utcfromtimestamp(start).isoformat(),
+                  'end': datetime.utcfromtimestamp(end).isoformat(), 'granularity': granularity}
+        res = self._get(extension, params=params, timeout=10)
+        res.raise_for_status()
+        return np.array(res.json(), dtype=float).reshape(-1, 6)
+
 
 def get_candles_example():
     """Simple example to get candle data from api"""
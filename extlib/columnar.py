@@ -0,0 +1,165 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+META_FILE = '_meta.json'
+
+
+class ColumnWriter:
+
+    def __init__(self, path, dtypes):
+        """Append-only columnar store, one raw binary file per column plus a small json meta file
+
+        Notes:
+            The meta file holds the committed row count and is rewritten after each append,
+            so a crash mid-append is rolled back to the last committed row on the next open.
+
+        Arguments:
+            path {str} -- Directory of the store, created if missing
+            dtypes {dict} -- Column name to numpy dtype {'TS': 'int64', 'CLOSE': 'float64', 'DESC': 'O'},
+                             'S' columns are stored utf8 encoded and truncated to their width, 'O' columns hold
+                             strings of any length as utf8 bytes plus an int64 end offset per row
+        """
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        meta = read_meta(path)
+        if meta:
+            if list(meta['dtypes']) != list(dtypes):
+                raise ValueError(f'{path} holds columns {list(meta["dtypes"])}, not {list(dtypes)}')
+            self.dtypes = {col: np.dtype(dtype) for col, dtype in meta['dtypes'].items()}
+            self.rows = meta['rows']
+        else:
+            self.dtypes = {col: np.dtype(dtype) for col, dtype in dtypes.items()}
+            self.rows = 0
+        self._truncate()
+        self._write_meta()
+
+    def _col_path(self, col):
+        return os.path.join(self.path, f'{col}.bin')
+
+    def _truncate(self):
+        """Drop anything past the committed row count left behind by an interrupted append"""
+        self._ends = {}
+        for col, dtype in self.dtypes.items():
+            if dtype.kind == 'O':
+                with open(_offsets_path(self.path, col), 'a+b') as f:
+                    f.truncate(self.rows * 8)
+                    f.seek(max(self.rows - 1, 0) * 8)
+                    last = f.read(8)
+                self._ends[col] = int(np.frombuffer(last, dtype='int64')[0]) if self.rows else 0
+                size = self._ends[col]
+            else:
+                size = self.rows * dtype.itemsize
+            with open(self._col_path(col), 'ab') as f:
+                f.truncate(size)
+
+    def _write_meta(self):
+        tmp = os.path.join(self.path, META_FILE + '.tmp')
+        with open(tmp, 'w') as f:
+            json.dump({'dtypes': {col: dtype.str for col, dtype in self.dtypes.items()}, 'rows': self.rows}, f)
+        os.replace(tmp, os.path.join(self.path, META_FILE))
+
+    def append(self, df):
+        """Append rows of a DataFrame holding every column of the store
+
+        Arguments:
+            df {pandas.DataFrame} -- rows to append
+        """
+        if len(df.index) == 0:
+            return
+        for col, dtype in self.dtypes.items():
+            if dtype.kind == 'O':
+                self._append_strings(col, df[col])
+                continue
+            values = df[col].astype(str).str.encode('utf8') if dtype.kind == 'S' else df[col]
+            with open(self._col_path(col), 'ab') as f:
+                f.write(np.ascontiguousarray(values.to_numpy(dtype=dtype)).tobytes())
+        self.rows += len(df.index)
+        self._write_meta()
+
+    def _append_strings(self, col, values):
+        encoded = [value.encode('utf8') for value in values.astype(str)]
+        ends = self._ends[col] + np.cumsum([len(value) for value in encoded], dtype='int64')
+        with open(self._col_path(col), 'ab') as f:
+            f.write(b''.join(encoded))
+        with open(_offsets_path(self.path, col), 'ab') as f:
+            f.write(ends.tobytes())
+        self._ends[col] = int(ends[-1])
+
+    def last(self, col):
+        """Last committed value of a column, None if the store is empty"""
+        if self.rows == 0:
+            return None
+        return read_column(self.path, col)[-1]
+
+
+def _offsets_path(path, col):
+    return os.path.join(path, f'{col}.off')
+
+
+def read_meta(path):
+    """Read the meta of a columnar store
+
+    Arguments:
+        path {str} -- Directory of the store
+
+    Returns:
+        dict -- {'dtypes': {...}, 'rows': int}, empty if no store exists at path
+    """
+    meta_path = os.path.join(path, META_FILE)
+    if not os.path.exists(meta_path):
+        return {}
+    with open(meta_path) as f:
+        return json.load(f)
+
+
+def read_column(path, col, meta=None):
+    """Memory-map one committed column of a columnar store
+
+    Arguments:
+        path {str} -- Directory of the store
+        col {str} -- Column to read
+
+    Keyword Arguments:
+        meta {dict} -- Meta already read from the store (default: {None})
+
+    Returns:
+        numpy.ndarray -- Read-only view of the column, 'O' columns are decoded into an array of str
+    """
+    meta = meta if meta else read_meta(path)
+    if not meta or meta['rows'] == 0:
+        return np.empty(0, dtype=meta['dtypes'][col] if meta else 'float64')
+    if np.dtype(meta['dtypes'][col]).kind == 'O':
+        ends = np.fromfile(_offsets_path(path, col), dtype='int64', count=meta['rows'])
+        with open(os.path.join(path, f'{col}.bin'), 'rb') as f:
+            data = f.read(int(ends[-1]))
+        starts = np.r_[0, ends[:-1]]
+        values = np.empty(meta['rows'], dtype=object)
+        values[:] = [data[st:en].decode('utf8') for st, en in zip(starts, ends)]
+        return values
+    return np.memmap(os.path.join(path, f'{col}.bin'), dtype=meta['dtypes'][col], mode='r', shape=(meta['rows'],))
+
+
+def read_columns(path, columns=None):
+    """Read a columnar store into a DataFrame
+
+    Arguments:
+        path {str} -- Directory of the store
+
+    Keyword Arguments:
+        columns {list} -- Subset of columns to read, all if None (default: {None})
+
+    Returns:
+        pandas.DataFrame -- DataFrame of the committed rows
+    """
+    meta = read_meta(path)
+    if not meta:
+        return pd.DataFrame()
+    columns = columns if columns else list(meta['dtypes'])
+    df = pd.DataFrame({col: np.array(read_column(path, col, meta)) for col in columns})
+    for col in columns:
+        if np.dtype(meta['dtypes'][col]).kind == 'S':
+            df[col] = df[col].str.decode('utf8', 'ignore')
+    return df
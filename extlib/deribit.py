@@ -1,14 +1,56 @@
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 import pandas as pd
-import requests
+
+from extlib.scheduler import RateLimitScheduler
+from extlib.transport import SERVER_ERROR_STATUSES, get_session
+
+# Public (non matching engine) limits, 20 calls per second sustained with bursts of 50
+RATE_LIMITS = {'public': (1200, 50)}
+SCHEDULER = RateLimitScheduler(RATE_LIMITS)
+TOO_MANY_REQUESTS = 10028
+RATE_LIMIT_RETRIES = 5
+RATE_LIMIT_BACKOFF = 0.5
 
 
 class Deribit():
 
-    def __init__(self):
-        """Deribit exchange REST API"""
+    def __init__(self, session=None, scheduler=None):
+        """Deribit exchange REST API
+
+        Keyword Arguments:
+            session {requests.Session} -- session to send requests through, shared pooled session if None (default: {None})
+            scheduler {RateLimitScheduler} -- queues calls under the Deribit rate limits, shared SCHEDULER if None (default: {None})
+        """
         self.base_url = 'https://deribit.com/api/v2/'
+        # 429s are handled in _get only, so every send takes a scheduler token
+        self.session = session if session else get_session(self.base_url, statuses=SERVER_ERROR_STATUSES)
+        self.scheduler = scheduler if scheduler else SCHEDULER
+
+    def _get(self, extension):
+        """GET a public endpoint under the rate limit and return its result
+
+        Notes:
+            A call rejected for going over the limit (HTTP 429 or error 10028) is sent again after
+            RATE_LIMIT_BACKOFF * 2 ** retry seconds, up to RATE_LIMIT_RETRIES times. The session does not re-send
+            429s itself, so each attempt waits on the scheduler.
+
+        Raises:
+            RuntimeError -- Any other error returned by Deribit, or the limit still hit after the retries
+        """
+        for retry in range(RATE_LIMIT_RETRIES + 1):
+            self.scheduler.acquire('public')
+            r = self.session.get(f'{self.base_url}{extension}')
+            if r.status_code != 429:
+                data = r.json()
+                error = data.get('error')
+                if not error:
+                    return data['result']
+                if error.get('code') != TOO_MANY_REQUESTS:
+                    raise RuntimeError(f'Deribit error {error.get("code")} on {extension}: {error.get("message")}')
+            time.sleep(RATE_LIMIT_BACKOFF * 2 ** retry)
+        raise RuntimeError(f'Deribit rate limit hit on {extension} after {RATE_LIMIT_RETRIES} retries')
 
     def get_all_insts_data(self, instruments, type='option'):
         """Get all instruments traded on the exchange
@@ -26,16 +68,76 @@ class Deribit():
                         'kind', 'is_active', 'instrument_name', 'expiration_timestamp',
                         'creation_timestamp', 'contract_size', 'base_currency', 'expiration', 'mste', 'ste', 'dte']
         """
-        df_data = pd.DataFrame()
-        for coin in instruments:
-            r = requests.get(f'{self.base_url}public/get_instruments?currency={coin}&kind={type}&expired=false')
-            df = pd.DataFrame(r.json()['result'])
-            df['expiration'] = pd.to_datetime(df['expiration_timestamp'], unit='ms')
-            df['mste'] = df['expiration_timestamp'] - time.time() * 1000
-            df['ste'] = df['mste'] / 1000
-            df['dte'] = df['ste'] / 86400
-            df_data = pd.concat([df_data, df])
-        return df_data
+        if not instruments:
+            return pd.DataFrame()
+        with ThreadPoolExecutor(max_workers=len(instruments)) as executor:
+            dfs = list(executor.map(self._get_instruments, instruments, [type] * len(instruments)))
+        return self._add_expiry(pd.concat(dfs))
+
+    def _get_instruments(self, coin, kind):
+        return pd.DataFrame(self._get(f'public/get_instruments?currency={coin}&kind={kind}&expired=false'))
+
+    def _get_book_summary(self, coin, kind):
+        return pd.DataFrame(self._get(f'public/get_book_summary_by_currency?currency={coin}&kind={kind}'))
+
+    @staticmethod
+    def _add_expiry(df):
+        """Add expiration, mste, ste and dte computed off expiration_timestamp"""
+        df['expiration'] = pd.to_datetime(df['expiration_timestamp'], unit='ms')
+        df['mste'] = df['expiration_timestamp'] - time.time() * 1000
+        df['ste'] = df['mste'] / 1000
+        df['dte'] = df['ste'] / 86400
+        return df
+
+    def get_chain(self, instruments, type='option', depth=False, max_workers=10):
+        """Snapshot of a whole chain: instrument specs joined with their book summaries in one table
+
+        Notes:
+            Specs and book summaries are pulled in bulk per currency (2 calls each, all concurrent) rather than
+            once per instrument. Per instrument order books are only pulled when depth is True, at most max_workers
+            at once and under the rate limit (see _get).
+
+        Arguments:
+            instruments {list} -- List of instruments ['BTC', 'ETH']
+
+        Keyword Arguments:
+            type {str} -- 'option' or 'future' (default: {'option'})
+            depth {bool} -- Also pull every order book for greeks, ivs and best bid/ask amounts (default: {False})
+            max_workers {int} -- Requests in flight at once (default: {10})
+
+        Returns:
+            pandas.DataFrame -- One row per instrument, columns of get_all_insts_data plus the book summary
+                                ('mark_price', 'mark_iv', 'bid_price', 'ask_price', 'underlying_price', 'open_interest',
+                                'volume' ...) and with depth ('best_bid_amount', 'best_ask_amount', 'bid_iv', 'ask_iv',
+                                'delta', 'gamma', 'vega', 'theta', 'rho')
+        """
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            specs = [executor.submit(self._get_instruments, coin, type) for coin in instruments]
+            summaries = [executor.submit(self._get_book_summary, coin, type) for coin in instruments]
+            df_specs = pd.concat([f.result() for f in specs]) if specs else pd.DataFrame()
+            df_summary = pd.concat([f.result() for f in summaries]) if summaries else pd.DataFrame()
+
+            if df_specs.empty:
+                return df_specs
+            # No summaries (i.e. a currency with no live books) leaves df_summary without an instrument_name column
+            if not df_summary.empty:
+                df = df_specs.merge(df_summary, how='left', on='instrument_name', suffixes=('', '_summary'))
+            else:
+                df = df_specs.copy()
+            df = self._add_expiry(df)
+
+            if depth:
+                books = list(executor.map(self.get_order_book, df['instrument_name']))
+                df_books = pd.DataFrame([{
+                    'instrument_name': b['instrument_name'],
+                    'best_bid_amount': b.get('best_bid_amount'),
+                    'best_ask_amount': b.get('best_ask_amount'),
+                    'bid_iv': b.get('bid_iv'),
+                    'ask_iv': b.get('ask_iv'),
+                    **b.get('greeks', {}),
+                } for b in books])
+                df = df.merge(df_books, how='left', on='instrument_name')
+        return df.reset_index(drop=True)
 
     def get_inst_summary(self, instrument):
         """Get instrument summary
@@ -51,8 +153,7 @@ class Deribit():
                 'change_id', 'bids', 'bid_iv', 'best_bid_price', 'best_bid_amount', 'best_ask_price',
                 'best_ask_amount', 'asks', 'ask_iv']
         """
-        r = requests.get(f'{self.base_url}public/get_order_book?depth=5&instrument_name={instrument}')
-        return r.json()['result']
+        return self._get(f'public/get_order_book?depth=5&instrument_name={instrument}')
 
     def get_order_book(self, instrument):
         """Get order book
@@ -63,9 +164,7 @@ class Deribit():
         Returns:
             json -- Response includdes bids, ask, bid_iv, ask_iv etc.
         """
-        r = requests.get(
-            f'{self.base_url}public/get_order_book?depth=5&instrument_name={instrument}')
-        return r.json()['result']
+        return self._get(f'public/get_order_book?depth=5&instrument_name={instrument}')
 
     def get_latest_trade(self, instrument):
         """Get latest trade
@@ -76,6 +175,4 @@ class Deribit():
         Returns:
             json -- Price, iv, instrument_name, index_price, direction, amount
         """
-        r = requests.get(
-            f'{self.base_url}public/get_last_trades_by_instrument?count=1&instrument_name={instrument}')
-        return r.json()['result']
+        return self._get(f'public/get_last_trades_by_instrument?count=1&instrument_name={instrument}')
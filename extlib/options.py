@@ -0,0 +1,245 @@
+import numpy as np
+import pandas as pd
+
+SQRT_2PI = np.sqrt(2 * np.pi)
+MIN_VOL = 1e-4
+MAX_VOL = 10.0
+YEAR_SECONDS = 365 * 86400
+
+
+def norm_pdf(x):
+    return np.exp(-0.5 * x * x) / SQRT_2PI
+
+
+def norm_cdf(x):
+    """Vectorized standard normal CDF, Hart (1968) double precision approximation as given by West (2005)
+
+    Arguments:
+        x {numpy.array} -- values
+
+    Returns:
+        numpy.array -- P(X <= x)
+    """
+    x = np.asarray(x, dtype=float)
+    ax = np.abs(x)
+    e = np.exp(-0.5 * ax * ax)
+
+    num = 3.52624965998911e-02 * ax + 0.700383064443688
+    for c in [6.37396220353165, 33.912866078383, 112.079291497871, 221.213596169931, 220.206867912376]:
+        num = num * ax + c
+    den = 8.83883476483184e-02 * ax + 1.75566716318264
+    for c in [16.064177579207, 86.7807322029461, 296.564248779674, 637.333633378831, 793.826512519948,
+              440.413735824752]:
+        den = den * ax + c
+    near = e * num / den
+
+    frac = ax + 0.65
+    for c in [4, 3, 2, 1]:
+        frac = ax + c / frac
+    far = e / frac / SQRT_2PI
+
+    tail = np.where(ax < 7.07106781186547, near, far)
+    tail = np.where(ax > 37, 0.0, tail)
+    return np.where(x > 0, 1 - tail, tail)
+
+
+def black_price(fwd, strike, t, vol, is_call, rate=0.0):
+    """Black-76 price on a forward
+
+    Arguments:
+        fwd {numpy.array} -- Forward (Deribit underlying_price)
+        strike {numpy.array} -- Strikes
+        t {numpy.array} -- Years to expiry
+        vol {numpy.array} -- Annualised vols
+        is_call {numpy.array} -- True for calls, False for puts
+
+    Keyword Arguments:
+        rate {float} -- Discount rate (default: {0.0})
+
+    Returns:
+        numpy.array -- Option prices in the forward's currency
+    """
+    sig_t = vol * np.sqrt(t)
+    d1 = (np.log(fwd / strike) + 0.5 * sig_t * sig_t) / sig_t
+    d2 = d1 - sig_t
+    sign = np.where(is_call, 1.0, -1.0)
+    return np.exp(-rate * t) * sign * (fwd * norm_cdf(sign * d1) - strike * norm_cdf(sign * d2))
+
+
+def implied_vol(price, fwd, strike, t, is_call, rate=0.0, tol=1e-8, max_iter=100):
+    """Batched implied vol, Newton steps safeguarded by a bisection bracket
+
+    Notes:
+        Each option keeps a [lo, hi] bracket. A Newton step that leaves it, or a vanishing vega, falls back to
+        bisection, so every option converges whatever its moneyness. Prices outside no-arbitrage bounds give NaN.
+
+    Arguments:
+        price {numpy.array} -- Option prices in the forward's currency
+        fwd {numpy.array} -- Forward
+        strike {numpy.array} -- Strikes
+        t {numpy.array} -- Years to expiry
+        is_call {numpy.array} -- True for calls, False for puts
+
+    Keyword Arguments:
+        rate {float} -- Discount rate (default: {0.0})
+        tol {float} -- Relative price tolerance (default: {1e-8})
+        max_iter {int} -- Max iterations (default: {100})
+
+    Returns:
+        numpy.array -- Annualised implied vols
+    """
+    price, fwd, strike, t = [np.asarray(a, dtype=float) for a in np.broadcast_arrays(price, fwd, strike, t)]
+    is_call = np.broadcast_to(np.asarray(is_call, dtype=bool), price.shape)
+    df = np.exp(-rate * t)
+    intrinsic = df * np.maximum(np.where(is_call, fwd - strike, strike - fwd), 0)
+    upper = df * np.where(is_call, fwd, strike)
+    valid = (price > intrinsic) & (price < upper) & (t > 0)
+
+    lo = np.full(price.shape, MIN_VOL)
+    hi = np.full(price.shape, MAX_VOL)
+    vol = np.full(price.shape, 0.5)
+    sqrt_t = np.sqrt(np.where(t > 0, t, 1))
+
+    # Only the options still unconverged are carried into the next iteration
+    idx = np.flatnonzero(valid)
+    for _ in range(max_iter):
+        if idx.size == 0:
+            break
+        f, k, tt, c, p, sq, v = fwd[idx], strike[idx], t[idx], is_call[idx], price[idx], sqrt_t[idx], vol[idx]
+        diff = black_price(f, k, tt, v, c, rate) - p
+        l = np.where(diff < 0, v, lo[idx])
+        h = np.where(diff > 0, v, hi[idx])
+        lo[idx] = l
+        hi[idx] = h
+        keep = (np.abs(diff) > tol * p) & (h - l > tol * 1e-4)
+
+        sig_t = v * sq
+        d1 = (np.log(f / k) + 0.5 * sig_t * sig_t) / sig_t
+        vega = df[idx] * f * norm_pdf(d1) * sq
+        with np.errstate(divide='ignore', invalid='ignore'):
+            newton = v - diff / vega
+        newton = np.where((newton > l) & (newton < h) & (vega > 1e-12), newton, 0.5 * (l + h))
+        vol[idx] = np.where(keep, newton, v)
+        idx = idx[keep]
+
+    return np.where(valid, vol, np.nan)
+
+
+def black_greeks(fwd, strike, t, vol, is_call, rate=0.0):
+    """Black-76 greeks in Deribit conventions
+
+    Arguments:
+        fwd {numpy.array} -- Forward
+        strike {numpy.array} -- Strikes
+        t {numpy.array} -- Years to expiry
+        vol {numpy.array} -- Annualised vols
+        is_call {numpy.array} -- True for calls, False for puts
+
+    Keyword Arguments:
+        rate {float} -- Discount rate (default: {0.0})
+
+    Returns:
+        dict -- delta, gamma, vega (per 1 vol point), theta (per day), rho (per 1%) as numpy.array
+    """
+    sqrt_t = np.sqrt(t)
+    sig_t = vol * sqrt_t
+    d1 = (np.log(fwd / strike) + 0.5 * sig_t * sig_t) / sig_t
+    d2 = d1 - sig_t
+    sign = np.where(is_call, 1.0, -1.0)
+    df = np.exp(-rate * t)
+    pdf = norm_pdf(d1)
+    price = df * sign * (fwd * norm_cdf(sign * d1) - strike * norm_cdf(sign * d2))
+    return {
+        'delta': df * sign * norm_cdf(sign * d1),
+        'gamma': df * pdf / (fwd * sig_t),
+        'vega': df * fwd * pdf * sqrt_t / 100,
+        'theta': (-df * fwd * pdf * vol / (2 * sqrt_t) + rate * price) / 365,
+        'rho': -t * price / 100,
+    }
+
+
+def chain_greeks(df_chain, price_col='mark_price', fwd_col='underlying_price', inverse=True, rate=0.0):
+    """Implied vols and greeks for a whole chain in one pass
+
+    Arguments:
+        df_chain {pandas.DataFrame} -- Chain from Deribit.get_chain or get_all_insts_data merged with prices,
+                                       needs 'strike', 'option_type', 'ste', price_col and fwd_col
+
+    Keyword Arguments:
+        price_col {str} -- Column of option prices (default: {'mark_price'})
+        fwd_col {str} -- Column of forwards (default: {'underlying_price'})
+        inverse {bool} -- Prices are quoted in the base coin as on Deribit, converted with the forward (default: {True})
+        rate {float} -- Discount rate (default: {0.0})
+
+    Returns:
+        pandas.DataFrame -- df_chain with 'iv', 'delta', 'gamma', 'vega', 'theta', 'rho' (suffixed '_bs') added
+    """
+    fwd = df_chain[fwd_col].to_numpy(dtype=float)
+    strike = df_chain['strike'].to_numpy(dtype=float)
+    t = df_chain['ste'].to_numpy(dtype=float) / YEAR_SECONDS
+    is_call = (df_chain['option_type'] == 'call').to_numpy()
+    price = df_chain[price_col].to_numpy(dtype=float)
+    price = price * fwd if inverse else price
+
+    iv = implied_vol(price, fwd, strike, t, is_call, rate)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        greeks = black_greeks(fwd, strike, t, iv, is_call, rate)
+
+    df = df_chain.copy()
+    df['iv_bs'] = iv
+    for name, values in greeks.items():
+        df[f'{name}_bs'] = values
+    return df
+
+
+def iv_surface(df_greeks, strikes=None, dtes=None):
+    """Implied vol surface by expiry and strike from the out-of-the-money options of a chain
+
+    Notes:
+        Each expiry is interpolated linearly across strike, flat beyond its quoted strikes.
+        With dtes, the surface is interpolated linearly in total variance (iv^2 * t) across expiries, flat in vol
+        outside the quoted expiries.
+
+    Arguments:
+        df_greeks {pandas.DataFrame} -- Output of chain_greeks
+
+    Keyword Arguments:
+        strikes {numpy.array} -- Strike grid, every quoted strike if None (default: {None})
+        dtes {numpy.array} -- Days to expiry grid, the quoted expiries if None (default: {None})
+
+    Returns:
+        pandas.DataFrame -- Annualised iv, index expiration (or dte) and columns strike
+    """
+    otm = np.where(df_greeks['option_type'] == 'call', df_greeks['strike'] >= df_greeks['underlying_price'],
+                   df_greeks['strike'] < df_greeks['underlying_price'])
+    df = df_greeks.loc[otm & df_greeks['iv_bs'].notna() & (df_greeks['ste'] > 0),
+                       ['expiration', 'ste', 'strike', 'iv_bs']]
+    df = df.sort_values(['expiration', 'strike'])
+    strikes = np.unique(df['strike']) if strikes is None else np.asarray(strikes, dtype=float)
+
+    expiries, ts, total_var = [], [], []
+    for expiry, grp in df.groupby('expiration', sort=True):
+        t = grp['ste'].iloc[0] / YEAR_SECONDS
+        iv = np.interp(strikes, grp['strike'].to_numpy(), grp['iv_bs'].to_numpy())
+        expiries.append(expiry)
+        ts.append(t)
+        total_var.append(iv * iv * t)
+
+    if not expiries:
+        return pd.DataFrame(columns=strikes)
+    ts = np.array(ts)
+    total_var = np.array(total_var)
+    if dtes is None:
+        return pd.DataFrame(np.sqrt(total_var / ts[:, None]), index=pd.Index(expiries, name='expiration'),
+                            columns=strikes)
+
+    # Every strike shares the same expiry grid, so the interpolation weights are computed once for all columns
+    tq = np.asarray(dtes, dtype=float) / 365
+    tc = np.clip(tq, ts[0], ts[-1])
+    hi = np.clip(np.searchsorted(ts, tc), 1, max(len(ts) - 1, 1)) if len(ts) > 1 else np.zeros(len(tq), dtype=int)
+    lo = np.maximum(hi - 1, 0)
+    span = np.where(ts[hi] > ts[lo], ts[hi] - ts[lo], 1)
+    w = ((tc - ts[lo]) / span)[:, None]
+    var_c = (1 - w) * total_var[lo] + w * total_var[hi]
+    surface = np.sqrt(var_c / tc[:, None])
+    return pd.DataFrame(surface, index=pd.Index(dtes, name='dte'), columns=strikes)
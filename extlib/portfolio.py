@@ -1,8 +1,14 @@
 import math
 
+import numpy as np
 import pandas as pd
 from pandas.tseries.offsets import MonthEnd
 
+from extlib.utils import get_benchmark_dates
+
+PERIODS = ['DTD', 'WTD', 'MTD', 'YTD']
+CALENDAR_UNITS = {'M': 'datetime64[M]', 'Y': 'datetime64[Y]'}
+
 
 def get_tf_multiplier():
     """Returns timeframe multiplier"""
@@ -94,3 +100,418 @@ def get_daily_stats(df):
             'max_upday': max_upday,
             'max_downday': max_downday,
             }
+
+
+def _pct_change(values):
+    """Period returns of each column against its previous non-NaN NAV, as if each column were passed alone"""
+    prev = pd.DataFrame(values).shift(1).ffill().to_numpy()
+    rets = values / prev - 1
+    rets[np.isnan(values)] = np.nan
+    return rets
+
+
+def _daily_nav(df_nav):
+    """Last non-NaN NAV of each calendar day and column, a column with a NaN closing row keeps its day"""
+    return df_nav.groupby(pd.DatetimeIndex(df_nav.index).normalize()).last()
+
+
+def batch_daily_stats(df_nav):
+    """get_daily_stats of every column at once
+
+    Arguments:
+        df_nav {pandas.DataFrame} -- NAV with datetime as the index and one column per strategy
+
+    Returns:
+        pandas.DataFrame -- get_daily_stats keys as columns, one row per strategy
+    """
+    perf = _pct_change(_daily_nav(df_nav).to_numpy(dtype=float))
+    up, down = perf > 0, perf < 0
+    no_updays, no_downdays = up.sum(axis=0), down.sum(axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return pd.DataFrame({
+            'no_updays': no_updays,
+            'no_downdays': no_downdays,
+            'win_loss_day_ratio': no_updays / no_downdays,
+            'ave_updays': np.where(up, perf, 0).sum(axis=0) / no_updays,
+            'ave_downdays': np.where(down, perf, 0).sum(axis=0) / no_downdays,
+            'max_upday': np.where(no_updays > 0, np.where(up, perf, -np.inf).max(axis=0), np.nan),
+            'max_downday': np.where(no_downdays > 0, np.where(down, perf, np.inf).min(axis=0), np.nan),
+        }, index=df_nav.columns)
+
+
+def batch_perf_stats(df_nav, timeframe='1D'):
+    """Performance stats of many strategies in one pass over a NAV panel
+
+    Notes:
+        Each column is measured over its own non-NaN NAVs, the same as passing it alone with its NaNs dropped to
+        annualised_return (with periods the number of return periods), annualised_vol, sharpe_ratio,
+        high_water_mark, max_drawdown and get_daily_stats.
+
+    Arguments:
+        df_nav {pandas.DataFrame} -- NAV with datetime as the index and one column per strategy
+
+    Keyword Arguments:
+        timeframe {str} -- '1D', '4H', '1H', the NAV sampling (default: {'1D'})
+
+    Returns:
+        pandas.DataFrame -- One row per strategy, one column per stat
+    """
+    nav = df_nav.to_numpy(dtype=float)
+    valid = ~np.isnan(nav)
+    rows = np.arange(len(nav))[:, None]
+    first = np.where(valid, rows, len(nav)).min(axis=0)
+    last = np.where(valid, rows, -1).max(axis=0)
+    cols = np.arange(nav.shape[1])
+    has = last >= 0
+
+    tot_ret = np.where(has, nav[np.where(has, last, 0), cols] / nav[np.where(has, first, 0), cols] - 1, np.nan)
+    periods = valid.sum(axis=0) - 1
+    rets = _pct_change(nav)
+    hwm = np.fmax.accumulate(nav, axis=0)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ann_ret = (1 + tot_ret) ** ((365 * get_tf_multiplier().get(timeframe)) / periods) - 1
+        ann_vol = np.nanstd(rets, axis=0, ddof=1) * math.sqrt(365 * get_tf_multiplier().get(timeframe))
+        df = pd.DataFrame({
+            'tot_ret': tot_ret,
+            'periods': periods,
+            'ann_ret': ann_ret,
+            'ann_vol': ann_vol,
+            'sharpe': sharpe_ratio(ann_ret, ann_vol),
+            'hwm': np.nanmax(np.where(valid, nav, -np.inf), axis=0),
+            'max_dd': np.nanmin(np.where(valid, nav / hwm - 1, np.inf), axis=0),
+        }, index=df_nav.columns)
+    df.loc[~has, ['hwm', 'max_dd']] = np.nan
+    return df.join(batch_daily_stats(df_nav))
+
+
+def _asof_rows(index, times):
+    """Position of the last row at or before each time, -1 before the first row, index must be sorted"""
+    return np.searchsorted(index.values.astype('datetime64[ns]'), np.asarray(times, dtype='datetime64[ns]'),
+                           side='right') - 1
+
+
+def period_returns(df_nav, cur_date=None):
+    """DTD, WTD, MTD and YTD returns of every column as of cur_date
+
+    Notes:
+        Period starts are those of utils.get_benchmark_dates. Each return is the NAV at cur_date over the NAV at the
+        period start, both taken from the last non-NaN NAV at or before that time. NaN if the column has no NAV
+        at or before the period start.
+
+    Arguments:
+        df_nav {pandas.DataFrame} -- NAV with a sorted datetime index and one column per strategy
+
+    Keyword Arguments:
+        cur_date {datetime} -- Date to measure to, the last row if None (default: {None})
+
+    Returns:
+        pandas.DataFrame -- One row per strategy, columns PERIODS
+    """
+    cur_date = pd.Timestamp(df_nav.index[-1] if cur_date is None else cur_date)
+    times = [cur_date] + list(get_benchmark_dates(cur_date))
+    pos = _asof_rows(df_nav.index, times)
+    nav = df_nav.ffill().to_numpy(dtype=float)[np.maximum(pos, 0)]
+    nav[pos < 0] = np.nan
+    return pd.DataFrame((nav[0] / nav[1:] - 1).T, index=df_nav.columns, columns=PERIODS)
+
+
+def _period_end_nav(df_nav, freq):
+    """Period end dates and the NAV of their last row, for the period ends the NAV has a row on"""
+    index = pd.DatetimeIndex(df_nav.index)
+    days = index.values.astype('datetime64[D]')
+    periods = np.unique(days.astype(CALENDAR_UNITS[freq]))
+    ends = (periods + 1).astype('datetime64[D]') - 1
+    pos = _asof_rows(index, (ends + 1).astype('datetime64[ns]') - np.timedelta64(1, 'ns'))
+    # Periods whose last day has no row fall back to an earlier day and are dropped, as in perf_per_month
+    observed = days[np.maximum(pos, 0)] == ends
+    nav = df_nav.to_numpy(dtype=float)[pos[observed]]
+    return pd.DatetimeIndex(ends[observed]), nav
+
+
+def calendar_returns(df_nav, freq='M'):
+    """Monthly or yearly returns of every column
+
+    Notes:
+        Same returns as perf_per_month: the last NAV of each period end date, for period ends with a NAV, against
+        the previous one. Each column skips its own NaNs.
+
+    Arguments:
+        df_nav {pandas.DataFrame} -- NAV with a sorted datetime index and one column per strategy
+
+    Keyword Arguments:
+        freq {str} -- 'M' monthly or 'Y' yearly (default: {'M'})
+
+    Returns:
+        pandas.DataFrame -- Returns indexed by period end date, one column per strategy
+    """
+    dates, nav = _period_end_nav(df_nav, freq)
+    return pd.DataFrame(_pct_change(nav), index=dates, columns=df_nav.columns)
+
+
+def calendar_returns_json(df_nav, freq='M'):
+    """calendar_returns of every column in the json shape of perf_per_month
+
+    Arguments:
+        df_nav {pandas.DataFrame} -- NAV with a sorted datetime index and one column per strategy
+
+    Keyword Arguments:
+        freq {str} -- 'M' monthly ('m_rets') or 'Y' yearly ('y_rets') (default: {'M'})
+
+    Returns:
+        dict -- Strategy to json of returns with the period end date as the index
+    """
+    dates, nav = _period_end_nav(df_nav, freq)
+    rets = _pct_change(nav)
+    valid = ~np.isnan(nav)
+    key = f'{freq.lower()}_rets'
+    dates = dates.date
+    return {col: pd.DataFrame({key: rets[valid[:, i], i]}, index=dates[valid[:, i]]).to_json(orient='index')
+            for i, col in enumerate(df_nav.columns)}
+
+
+def _as_frame(df):
+    return df.to_frame() if isinstance(df, pd.Series) else df
+
+
+def _like(values, df):
+    """Wrap an array shaped like df back into df's type"""
+    if isinstance(df, pd.Series):
+        return pd.Series(values[:, 0], index=df.index, name=df.name)
+    return pd.DataFrame(values, index=df.index, columns=df.columns)
+
+
+def rolling_vol(df_rets, window, timeframe='1D'):
+    """Rolling annualised vol of every column, streaming running moments
+
+    Arguments:
+        df_rets {pandas.DataFrame} -- Returns, one column per strategy
+        window {int} -- Window in periods
+
+    Keyword Arguments:
+        timeframe {str} -- '1D', '4H', '1H', the returns sampling (default: {'1D'})
+
+    Returns:
+        pandas.DataFrame -- Annualised vol
+    """
+    return df_rets.rolling(window=window).std() * math.sqrt(365 * get_tf_multiplier().get(timeframe))
+
+
+def rolling_sharpe(df_nav, window, timeframe='1D'):
+    """Rolling sharpe ratio of every column, annualised_return over annualised_vol of each window
+
+    Arguments:
+        df_nav {pandas.DataFrame} -- NAV, one column per strategy
+        window {int} -- Window in periods
+
+    Keyword Arguments:
+        timeframe {str} -- '1D', '4H', '1H', the NAV sampling (default: {'1D'})
+
+    Returns:
+        pandas.DataFrame -- Sharpe ratio
+    """
+    ann_ret = annualised_return(df_nav / df_nav.shift(window) - 1, window, timeframe)
+    ann_vol = rolling_vol(df_nav / df_nav.shift(1) - 1, window, timeframe)
+    return sharpe_ratio(ann_ret, ann_vol)
+
+
+def rolling_max_drawdown(df_nav, window):
+    """Max drawdown within each trailing window of every column, in O(n) whatever the window
+
+    Notes:
+        Windows are split on blocks of window rows (van Herk/Gil-Werman). A window spanning two blocks combines the
+        best drop in the suffix of the first block, the best drop in the prefix of the second, and the drop from the
+        suffix's peak to the prefix's trough, all precomputed with running max/min over log NAV. A window holding a
+        NaN gives NaN.
+
+    Arguments:
+        df_nav {pandas.DataFrame} -- NAV, one column per strategy
+        window {int} -- Window in periods
+
+    Returns:
+        pandas.DataFrame -- Max drawdown (<= 0), NaN for the first window - 1 rows
+    """
+    x = np.log(_as_frame(df_nav).to_numpy(dtype=float))
+    n, k = x.shape
+    n_blocks = -(-n // window)
+    blocks = np.concatenate([x, np.full((n_blocks * window - n, k), np.nan)]).reshape(n_blocks, window, k)
+
+    pre_max = np.maximum.accumulate(blocks, axis=1)
+    pre_min = np.minimum.accumulate(blocks, axis=1)
+    pre_drop = np.minimum.accumulate(blocks - pre_max, axis=1)
+    rev = blocks[:, ::-1]
+    suf_max = np.maximum.accumulate(rev, axis=1)[:, ::-1]
+    suf_min = np.minimum.accumulate(rev, axis=1)
+    suf_drop = np.minimum.accumulate(suf_min - rev, axis=1)[:, ::-1]
+    pre_max, pre_min, pre_drop, suf_max, suf_drop = [a.reshape(-1, k)[:n]
+                                                     for a in [pre_max, pre_min, pre_drop, suf_max, suf_drop]]
+
+    drop = np.full((n, k), np.nan)
+    end = np.arange(window - 1, n)
+    start = end - window + 1
+    aligned = (start % window == 0)[:, None]
+    spanning = np.minimum(np.minimum(suf_drop[start], pre_drop[end]), pre_min[end] - suf_max[start])
+    drop[end] = np.where(aligned, suf_drop[start], spanning)
+    return _like(np.expm1(drop), df_nav)
+
+
+def expanding_max_drawdown(df_nav):
+    """Max drawdown to date of every column"""
+    return get_df_dd(df_nav).cummin()
+
+
+def time_under_water(df_nav):
+    """Periods since each column's last high water mark, 0 at a new high
+
+    Arguments:
+        df_nav {pandas.DataFrame} -- NAV, one column per strategy
+
+    Returns:
+        pandas.DataFrame -- Periods under water, NaN where the NAV is NaN
+    """
+    nav = _as_frame(df_nav).to_numpy(dtype=float)
+    rows = np.arange(len(nav))[:, None]
+    at_high = nav >= np.fmax.accumulate(nav, axis=0)
+    last_high = np.maximum.accumulate(np.where(at_high, rows, -1), axis=0)
+    return _like(np.where(np.isnan(nav), np.nan, rows - last_high), df_nav)
+
+
+def _ratio(num, den):
+    return num / den if den else math.nan
+
+
+class PerfTracker:
+
+    # State kept by to_dict, everything else is derived from it
+    FIELDS = ['first_ts', 'first_nav', 'last_ts', 'last_nav', 'hwm', 'max_dd', 'n_rets', 'ret_mean', 'ret_m2', 'day',
+              'day_nav', 'prev_day_nav', 'no_updays', 'no_downdays', 'sum_updays', 'sum_downdays', 'max_upday',
+              'max_downday']
+
+    def __init__(self):
+        """Live performance of one fund updated one NAV at a time in O(1)
+
+        Notes:
+            Keeps the running high water mark, current and max drawdown, moments of the point to point returns
+            (Welford) and the get_daily_stats counts, sums and extremes. A day's return is taken from the last NAV
+            of each calendar day, the day in progress counts provisionally. The state is a flat dict of numbers
+            (to_dict/from_dict) so it can be kept in a Redis hash and resumed without replaying history.
+        """
+        self.first_ts = self.last_ts = None
+        self.first_nav = self.last_nav = self.hwm = math.nan
+        self.max_dd = 0.0
+        self.n_rets = 0
+        self.ret_mean = self.ret_m2 = 0.0
+        self.day = None
+        self.day_nav = self.prev_day_nav = math.nan
+        self.no_updays = self.no_downdays = 0
+        self.sum_updays = self.sum_downdays = 0.0
+        self.max_upday = self.max_downday = math.nan
+
+    def update(self, nav, ts):
+        """Add one NAV point, points must arrive in time order
+
+        Arguments:
+            nav {float} -- NAV
+            ts {datetime} -- Time of the NAV
+
+        Returns:
+            float -- Current drawdown
+        """
+        if nav is None or math.isnan(nav):
+            return self.drawdown
+        ts = pd.Timestamp(ts)
+        day = ts.toordinal()
+
+        if self.first_ts is None:
+            self.first_ts, self.first_nav = int(ts.value // 10 ** 6), nav
+        else:
+            ret = nav / self.last_nav - 1
+            self.n_rets += 1
+            delta = ret - self.ret_mean
+            self.ret_mean += delta / self.n_rets
+            self.ret_m2 += delta * (ret - self.ret_mean)
+
+        if self.day is not None and day != self.day:
+            self._close_day()
+        self.day, self.day_nav = day, nav
+
+        self.last_ts, self.last_nav = int(ts.value // 10 ** 6), nav
+        self.hwm = nav if math.isnan(self.hwm) else max(self.hwm, nav)
+        self.max_dd = min(self.max_dd, self.drawdown)
+        return self.drawdown
+
+    def _close_day(self):
+        """Fold the finished day's return into the daily stats"""
+        if not math.isnan(self.prev_day_nav):
+            self._add_day(self.day_nav / self.prev_day_nav - 1)
+        self.prev_day_nav = self.day_nav
+
+    def _add_day(self, perf):
+        if perf > 0:
+            self.no_updays += 1
+            self.sum_updays += perf
+            self.max_upday = perf if math.isnan(self.max_upday) else max(self.max_upday, perf)
+        elif perf < 0:
+            self.no_downdays += 1
+            self.sum_downdays += perf
+            self.max_downday = perf if math.isnan(self.max_downday) else min(self.max_downday, perf)
+
+    @property
+    def drawdown(self):
+        return self.last_nav / self.hwm - 1 if self.hwm else math.nan
+
+    def daily_stats(self):
+        """get_daily_stats of every NAV seen so far, the day in progress included
+
+        Returns:
+            dict -- dictionary of daily stats
+        """
+        days = PerfTracker.from_dict(self.to_dict())
+        if not math.isnan(days.prev_day_nav):
+            days._add_day(days.day_nav / days.prev_day_nav - 1)
+        return {'no_updays': days.no_updays,
+                'no_downdays': days.no_downdays,
+                'win_loss_day_ratio': _ratio(days.no_updays, days.no_downdays),
+                'ave_updays': _ratio(days.sum_updays, days.no_updays),
+                'ave_downdays': _ratio(days.sum_downdays, days.no_downdays),
+                'max_upday': days.max_upday,
+                'max_downday': days.max_downday,
+                }
+
+    def stats(self):
+        """Current performance stats
+
+        Returns:
+            dict -- hwm, drawdown, max_dd, tot_ret, ret_mean, ret_std and the daily stats
+        """
+        return dict({'hwm': self.hwm,
+                     'drawdown': self.drawdown,
+                     'max_dd': self.max_dd,
+                     'tot_ret': self.last_nav / self.first_nav - 1,
+                     'ret_mean': self.ret_mean if self.n_rets else math.nan,
+                     'ret_std': math.sqrt(self.ret_m2 / (self.n_rets - 1)) if self.n_rets > 1 else math.nan,
+                     }, **self.daily_stats())
+
+    def to_dict(self):
+        """Compact state, numbers only, None as NaN"""
+        return {field: math.nan if getattr(self, field) is None else getattr(self, field) for field in self.FIELDS}
+
+    @classmethod
+    def from_dict(cls, data):
+        """Resume from to_dict output, values may be strings as read back from a Redis hash
+
+        Arguments:
+            data {dict} -- State from to_dict
+
+        Returns:
+            PerfTracker -- Tracker carrying on from the state
+        """
+        tracker = cls()
+        for field in cls.FIELDS:
+            value = float(data[field])
+            if field in ['first_ts', 'last_ts', 'day']:
+                value = None if math.isnan(value) else int(value)
+            elif field in ['n_rets', 'no_updays', 'no_downdays']:
+                value = int(value)
+            setattr(tracker, field, value)
+        return tracker
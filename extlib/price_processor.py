@@ -1,21 +1,63 @@
-import json
 import math
+from functools import lru_cache
 
 import numpy as np
 import pandas as pd
-import redis
+from pandas.tseries.frequencies import to_offset
 
 from extlib.bfx_v2 import BFXV2
+from extlib.redis_prices import get_px_client, read_px_redis
+
+# Days of hourly prices read by get_px_hr_redis when sampling
+SAMPLE_DAYS = 180
+OHLC_AGG = {'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last'}
+# PriceProcessor method computing each panel
+PANEL_PROCESS = {'open': 'process_open', 'high': 'process_high', 'low': 'process_low', 'close': 'process_close',
+                 'rets': 'process_returns', 'std': '_process_std', 'exp_std': '_process_exp_std'}
+# Merge of a bucket's stored aggregate with the aggregate of newly arrived bars of the same bucket
+OHLC_COMBINE = {
+    'first': lambda old, new: np.where(np.isnan(old), new, old),
+    'last': lambda old, new: np.where(np.isnan(new), old, new),
+    'max': np.fmax,
+    'min': np.fmin,
+}
+# Annualisation of the expo. std, 4H differs from annualise_mult but is kept so df_exp_std matches its history
+EXPO_STD_MULT = {'1D': 365, '4H': 365 * 8, '1H': 365 * 24}
+
+
+def _panel(name):
+    """Property of a panel computed by its PANEL_PROCESS method on first access"""
+    def getter(self):
+        if name not in self._panels:
+            getattr(self, PANEL_PROCESS[name])()
+        return self._panels[name]
+
+    def setter(self, df):
+        self._panels[name] = df
+        self._buffers = None
+
+    return property(getter, setter, doc=f'{name} panel, computed on first access')
 
 
 class PriceProcessor:
 
-    def __init__(self, insts, df_prices, vol_window, rebal_hr, timeframe='1D', hr_offset=0):
+    df_open = _panel('open')
+    df_high = _panel('high')
+    df_low = _panel('low')
+    df_close = _panel('close')
+    df_rets = _panel('rets')
+    df_std = _panel('std')
+    df_exp_std = _panel('exp_std')
+
+    def __init__(self, insts, df_prices, vol_window, rebal_hr, timeframe='1D', hr_offset=0, lazy=True,
+                 dtype='float64'):
         """Process price data into standard DataFrame formats
 
         Notes:
             Currently only take in hourly data to be process.
             More granular data will require code adjustments
+            Panels are computed on first access unless lazy is False, so only the panels read cost time and memory.
+            A categorical or integer coded 'coin' column in df_prices is read through its codes.
 
         Arguments:
             insts {list} -- All instruments used for analysis
@@ -27,63 +69,60 @@ class PriceProcessor:
             timeframe {str} -- '1D', '4H', '1H' etc. (default: {'1D'})
             hr_offset {int} -- 4 hour intervals will start 0, 4, 8...
                                 1 here will offset to 1, 5, 9 (default: {0})
+            lazy {bool} -- False computes every panel up front (default: {True})
+            dtype {str} -- dtype of the panels, 'float32' halves their memory (default: {'float64'})
         """
         self.insts = insts
         self.timeframe = timeframe
         self.vol_window = vol_window
         self.rebal_hr = rebal_hr
         self.origin = f'2000-01-01 0{hr_offset}:00:00'
-        self.df_open = pd.DataFrame()
-        self.df_high = pd.DataFrame()
-        self.df_low = pd.DataFrame()
-        self.df_close = pd.DataFrame()
-        self.df_rets = pd.DataFrame()
-        self.df_std = pd.DataFrame()
-        self.df_exp_std = pd.DataFrame()
+        self.dtype = np.dtype(dtype)
         self.df_prices = df_prices
+        self._panels = {}
+        self._buffers = None
+
+        # The last bucket may still be forming, append needs its raw aggregates and the last bar before it
+        self._raw_last, self._prev_row, self._prev_val = {}, {}, {}
 
         self.label = 'left'
         if self.timeframe == '1D':
             self.label = 'right'
 
-        self.process_open()
-        self.process_high()
-        self.process_low()
-        self.process_close()
-        self.process_returns()
-        self.process_std()
+        if not lazy:
+            self.process_ohlc()
+            self.process_returns()
+            self.process_std()
+
+    def _process_fields(self, fields):
+        """Resample fields of df_prices in one pass into their panels"""
+        panels = resample_panels(self.df_prices, self.insts, self.timeframe, self.label, self.origin,
+                                 agg={field: OHLC_AGG[field] for field in fields}, interpolate=False)
+        for field, df in panels.items():
+            values = df.to_numpy()
+            self._raw_last[field] = values[-1].copy() if len(values) else np.full(len(self.insts), np.nan)
+            self._prev_row[field], self._prev_val[field] = _last_valid(values[:-1])
+            setattr(self, f'df_{field}', df.interpolate().astype(self.dtype, copy=False))
+
+    def process_ohlc(self):
+        """Process open, high, low and close prices in a single pass over df_prices"""
+        self._process_fields(list(OHLC_AGG))
 
     def process_close(self):
         """Process closing prices"""
-        for inst in self.insts:
-            _df = self.df_prices[self.df_prices['coin'] == inst]['close'].rename(inst)
-            _df = _df.resample(self.timeframe, label=self.label, origin=self.origin).agg('last')
-            self.df_close = pd.concat([self.df_close, _df], axis=1, sort=True)
-            self.df_close.interpolate(inplace=True)
+        self._process_fields(['close'])
 
     def process_open(self):
         """Process open prices"""
-        for inst in self.insts:
-            _df = self.df_prices[self.df_prices['coin'] == inst]['open'].rename(inst)
-            _df = _df.resample(self.timeframe, label=self.label, origin=self.origin).agg('first')
-            self.df_open = pd.concat([self.df_open, _df], axis=1, sort=True)
-            self.df_open.interpolate(inplace=True)
+        self._process_fields(['open'])
 
     def process_high(self):
         """Process high prices"""
-        for inst in self.insts:
-            _df = self.df_prices[self.df_prices['coin'] == inst]['high'].rename(inst)
-            _df = _df.resample(self.timeframe, label=self.label, origin=self.origin).agg('max')
-            self.df_high = pd.concat([self.df_high, _df], axis=1, sort=True)
-            self.df_high.interpolate(inplace=True)
+        self._process_fields(['high'])
 
     def process_low(self):
         """Process low prices"""
-        for inst in self.insts:
-            _df = self.df_prices[self.df_prices['coin'] == inst]['low'].rename(inst)
-            _df = _df.resample(self.timeframe, label=self.label, origin=self.origin).agg('min')
-            self.df_low = pd.concat([self.df_low, _df], axis=1, sort=True)
-            self.df_low.interpolate(inplace=True)
+        self._process_fields(['low'])
 
     def process_returns(self):
         """Process returns"""
@@ -91,27 +130,282 @@ class PriceProcessor:
 
     def process_std(self):
         """Process standard std and expo. std"""
-        self.df_std = self.df_rets.rolling(window=self.vol_window).std() * std_mult(self.timeframe)
-        self.df_exp_std = self.df_rets.rolling(window=self.vol_window).apply(
-            weighted_expo_std, args=[self.vol_window, self.timeframe], raw=True)
+        self._process_std()
+        self._process_exp_std()
+
+    def _process_std(self):
+        std = self.df_rets.rolling(window=self.vol_window).std() * std_mult(self.timeframe)
+        self.df_std = std.astype(self.dtype, copy=False)
+
+    def _process_exp_std(self):
+        exp_std = rolling_expo_std(self.df_rets, self.vol_window, self.timeframe)
+        self.df_exp_std = exp_std.astype(self.dtype, copy=False)
+
+    def append(self, df_bars):
+        """Update the panels with newly arrived hourly bars, recomputing only the tail rows they touch
+
+        Notes:
+            Bars of the last bucket are merged into it, later bars open new buckets. Bars of older buckets are
+            dropped. A coin's rows are only rewritten back to its previous bar, so per bar the cost is about
+            O(insts * vol_window) whatever the history length. df_prices is not extended.
+
+        Arguments:
+            df_bars {pandas.DataFrame} -- New bars in the df_prices format
+
+        Returns:
+            int -- Number of buckets added
+        """
+        if self.df_close.empty:
+            raise ValueError('PriceProcessor holds no prices to append to')
+        if self._buffers is None:
+            self._init_buffers()
+
+        labels, cols, df_agg = bin_prices(df_bars, self.insts, self.timeframe, self.label, self.origin)
+        step = to_offset(self.timeframe).nanos
+        last_label = self._index[self._rows - 1].astype('datetime64[ns]').astype('int64')
+        keep = labels >= last_label
+        if not keep.any():
+            return 0
+        offsets = (labels[keep] - last_label) // step
+        n_new = int(offsets.max())
+
+        start = self._rows - 1
+        self._reserve(self._rows + n_new)
+        new_labels = last_label + step * np.arange(1, n_new + 1)
+        self._index[self._rows:self._rows + n_new] = new_labels.astype('datetime64[ns]').astype(self._index.dtype)
+        self._rows += n_new
+
+        for field, how in OHLC_AGG.items():
+            new = np.full((n_new + 1, len(self.insts)), np.nan)
+            new[offsets, cols[keep]] = df_agg[field].to_numpy(dtype=float)[keep]
+            new[0] = OHLC_COMBINE[how](self._raw_last[field], new[0])
+            start = min(start, self._fill_tail(field, new))
+
+        self._update_stats(start)
+        self._set_views()
+        return n_new
+
+    def _init_buffers(self):
+        """Copy the panels into buffers with room to grow, so appends do not copy the history"""
+        missing = [field for field in OHLC_AGG if field not in self._panels]
+        if missing:
+            self._process_fields(missing)
+        self._rows = len(self.df_close.index)
+        self._index = self.df_close.index.to_numpy()
+        frames = {'open': self.df_open, 'high': self.df_high, 'low': self.df_low, 'close': self.df_close,
+                  'rets': self.df_rets, 'std': self.df_std, 'exp_std': self.df_exp_std}
+        self._buffers = {name: df.to_numpy() for name, df in frames.items()}
+        self._reserve(2 * self._rows)
+
+    def _reserve(self, rows):
+        """Grow the buffers to hold at least rows, doubling"""
+        capacity = len(self._index)
+        if rows <= capacity:
+            return
+        capacity = max(rows, 2 * capacity)
+        index = np.empty(capacity, dtype=self._index.dtype)
+        index[:self._rows] = self._index[:self._rows]
+        self._index = index
+        for name, values in self._buffers.items():
+            buffer = np.full((capacity, len(self.insts)), np.nan, dtype=values.dtype)
+            buffer[:self._rows] = values[:self._rows]
+            self._buffers[name] = buffer
+
+    def _fill_tail(self, field, raw):
+        """Interpolate the raw aggregates of the tail buckets into the field's panel
+
+        Arguments:
+            field {str} -- 'open', 'high', 'low' or 'close'
+            raw {numpy.array} -- Raw aggregates from the previously last bucket to the new last bucket
+
+        Returns:
+            int -- First row of the panel that changed
+        """
+        panel = self._buffers[field]
+        end = self._rows
+        tail = end - len(raw)
+        prev_row, prev_val = self._prev_row[field], self._prev_val[field]
+
+        # Coins without a new bar carry their last price forward, NaN if they have none yet
+        has_new = (~np.isnan(raw)).any(axis=0)
+        panel[tail:end, ~has_new] = prev_val[~has_new]
+
+        # Coins with one are interpolated from their previous bar, rewriting any gap since then
+        cols = np.flatnonzero(has_new)
+        starts = np.where(prev_row[cols] >= 0, prev_row[cols], tail)
+        start = min(starts.min(), tail) if len(cols) else tail
+        block = np.full((end - start, len(cols)), np.nan)
+        block[tail - start:] = raw[:, cols]
+        with_prev = prev_row[cols] >= 0
+        block[prev_row[cols][with_prev] - start, np.flatnonzero(with_prev)] = prev_val[cols][with_prev]
+        block = pd.DataFrame(block).interpolate().to_numpy()
+        rows = np.arange(start, end)[:, None]
+        panel[start:end, cols] = np.where(rows >= starts, block, panel[start:end, cols])
+
+        # The new last bucket may still be forming, remember it and the last bar before it
+        rows, vals = _last_valid(raw[:-1])
+        has = rows >= 0
+        prev_row[has] = tail + rows[has]
+        prev_val[has] = vals[has]
+        self._raw_last[field] = raw[-1].copy()
+        return start
+
+    def _update_stats(self, start):
+        """Recompute returns, std and expo. std from row start onwards"""
+        end = self._rows
+        close, rets = self._buffers['close'], self._buffers['rets']
+        first = max(start, 1)
+        rets[first:end] = close[first:end] / close[first - 1:end - 1] - 1
+
+        lookback = max(start - self.vol_window + 1, 0)
+        std = _rolling_weighted_std(rets[lookback:end], np.ones(self.vol_window)) * std_mult(self.timeframe)
+        exp_std = _rolling_weighted_std(rets[lookback:end], weighted_expo_wgts(std_wind=self.vol_window))
+        self._buffers['std'][start:end] = std[start - lookback:]
+        self._buffers['exp_std'][start:end] = exp_std[start - lookback:] * math.sqrt(EXPO_STD_MULT[self.timeframe])
+
+    def _set_views(self):
+        """Point the DataFrame attributes at the filled part of the buffers without copying"""
+        index = pd.DatetimeIndex(self._index[:self._rows])
+        for name, values in self._buffers.items():
+            self._panels[name] = pd.DataFrame(values[:self._rows], index=index, columns=self.insts, copy=False)
+
+
+def resample_panels(df_prices, insts, timeframe, label, origin, agg=OHLC_AGG, interpolate=True):
+    """Resample long format prices into one wide panel per field, grouping by coin once
+
+    Notes:
+        Each coin's bins run from its first to its last bar as with a per-coin resample, and the panel index is the
+        union of them. Panels are interpolated once, leading NaNs are left before a coin's first bar.
+
+    Arguments:
+        df_prices {pandas.DataFrame} -- DataFrame of prices indexed by time with a 'coin' column
+        insts {list} -- Instruments, the panel columns in this order
+        timeframe {str} -- '1D', '4H', '1H' etc.
+        label {str} -- Bin edge to label bins with, 'left' or 'right'
+        origin {str} -- Timestamp bins are aligned to
+
+    Keyword Arguments:
+        agg {dict} -- Field to aggregation (default: {OHLC_AGG})
+        interpolate {bool} -- False leaves empty bins as NaN (default: {True})
+
+    Returns:
+        dict -- Field to pandas.DataFrame, index time and columns insts
+    """
+    labels, cols, df_agg = bin_prices(df_prices, insts, timeframe, label, origin, agg)
+    if not len(labels):
+        index = pd.DatetimeIndex([]).astype(df_prices.index.dtype)
+        return {field: pd.DataFrame(index=index, columns=insts, dtype=float) for field in agg}
+
+    # Keep only the bins inside at least one coin's [first, last] range, as the union of per-coin resamples would
+    step = to_offset(timeframe).nanos
+    first_label = labels.min()
+    agg_bins = (labels - first_label) // step
+    bounds = pd.Series(agg_bins).groupby(cols).agg(['min', 'max'])
+    edges = np.zeros(agg_bins.max() + 2, dtype=int)
+    np.add.at(edges, bounds['min'].to_numpy(), 1)
+    np.add.at(edges, bounds['max'].to_numpy() + 1, -1)
+    covered = np.flatnonzero(np.cumsum(edges)[:-1] > 0)
+    index = pd.DatetimeIndex((first_label + covered * step).astype('datetime64[ns]')).astype(df_prices.index.dtype)
+
+    rows = np.searchsorted(covered, agg_bins)
+    panels = {}
+    for field in agg:
+        values = np.full((len(index), len(insts)), np.nan)
+        values[rows, cols] = df_agg[field].to_numpy(dtype=float)
+        panels[field] = pd.DataFrame(values, index=index, columns=insts)
+        if interpolate:
+            panels[field] = panels[field].interpolate()
+    return panels
+
+
+def bin_prices(df_prices, insts, timeframe, label, origin, agg=OHLC_AGG):
+    """Aggregate long format prices per coin and bin of the timeframe grid
+
+    Arguments:
+        df_prices {pandas.DataFrame} -- DataFrame of prices indexed by time with a 'coin' column
+        insts {list} -- Instruments, coins outside of it are dropped
+        timeframe {str} -- '1D', '4H', '1H' etc.
+        label {str} -- Bin edge to label bins with, 'left' or 'right'
+        origin {str} -- Timestamp bins are aligned to
 
+    Keyword Arguments:
+        agg {dict} -- Field to aggregation (default: {OHLC_AGG})
 
-def get_px_hr_redis(insts, sample=True, host='localhost', port=6379):
+    Returns:
+        tuple -- Bin labels in ns, positions in insts and pandas.DataFrame of aggregates, one row per coin and bin
+    """
+    cols = _inst_positions(df_prices['coin'], insts)
+    keep = cols >= 0
+    cols = cols[keep]
+    ts = df_prices.index.values[keep].astype('datetime64[ns]').astype('int64')
+    df = pd.DataFrame({field: df_prices[field].to_numpy()[keep] for field in agg})
+    if not len(ts):
+        return np.empty(0, dtype='int64'), np.empty(0, dtype=int), pd.DataFrame(columns=list(agg), dtype=float)
+
+    # first/last take rows in order within a group, so each coin's bars must be in time order
+    if (pd.Series(ts).groupby(cols).diff() < 0).any():
+        order = np.argsort(ts, kind='mergesort')
+        df, ts, cols = df.iloc[order].reset_index(drop=True), ts[order], cols[order]
+
+    # Bin every bar on the timeframe grid aligned to origin and group on one integer (coin, bin) key
+    step = to_offset(timeframe).nanos
+    bins = (ts - pd.Timestamp(origin).value) // step
+    first_bin = bins.min()
+    n_bins = bins.max() - first_bin + 1
+    df_agg = df[list(agg)].groupby(cols * n_bins + bins - first_bin).agg(agg)
+    agg_cols, agg_bins = np.divmod(df_agg.index.to_numpy(), n_bins)
+    labels = (first_bin + agg_bins + (label == 'right')) * step + pd.Timestamp(origin).value
+    return labels, agg_cols, df_agg.reset_index(drop=True)
+
+
+def _inst_positions(coins, insts):
+    """Position of each row's coin in insts, -1 for coins outside it, through the codes of a categorical column"""
+    if isinstance(coins.dtype, pd.CategoricalDtype):
+        codes = coins.cat.codes.to_numpy()
+        positions = pd.Index(insts).get_indexer(coins.cat.categories)
+        return np.where(codes >= 0, positions[codes], -1)
+    return pd.Index(insts).get_indexer(coins)
+
+
+def _last_valid(values):
+    """Row and value of the last non-NaN of each column, -1 and NaN for columns without one"""
+    rows = np.full(values.shape[1], -1)
+    vals = np.full(values.shape[1], np.nan)
+    if len(values):
+        valid = ~np.isnan(values)
+        has = valid.any(axis=0)
+        last = len(values) - 1 - np.argmax(valid[::-1], axis=0)
+        rows[has] = last[has]
+        vals[has] = values[last[has], np.flatnonzero(has)]
+    return rows, vals
+
+
+def get_px_hr_redis(insts, sample=True, host='localhost', port=6379, start=None, end=None):
     """Get prices from redis
 
+    Notes:
+        Only the requested coins and range are read, from the per-coin binary layout of extlib.redis_prices.
+        sample=True used to return the curated 'prices-sample' blob. It now returns the last SAMPLE_DAYS of bars of
+        insts, a window that moves with the clock, so the dates differ from the old sample. Pass sample=False with
+        start and end for a fixed range.
+
     Arguments:
         insts {list} -- List of instruments to be read from csv
 
     Keyword Arguments:
-        sample {bool} -- True will return sample prices from redis rather than entire history (default: {True})
+        sample {bool} -- True will return the last SAMPLE_DAYS of prices topped up with the latest BFX candle
+                         rather than entire history (default: {True})
         host {string} -- Host of redis (default: {localhost})
         port {int} -- Port of redis (default: {6379})
+        start {datetime} -- Start time when not sampling, from the first bar if None (default: {None})
+        end {datetime} -- End time when not sampling, to the last bar if None (default: {None})
 
     Returns:
         pandas.DataFrame -- DataFrame of prices
     """
-    df = _get_px_redis(sample=sample, host=host, timeframe='1h')
-    df = df[df['coin'].isin(insts)]
+    if sample:
+        start, end = pd.Timestamp.now('UTC').tz_localize(None) - pd.Timedelta(days=SAMPLE_DAYS), None
+    df = read_px_redis(insts, timeframe='1h', start=start, end=end, r=get_px_client(host=host, port=port))
     df = df[['open', 'close', 'high', 'low', 'volume', 'coin', 'timeframe']]
 
     if sample:
@@ -123,32 +417,17 @@ def get_px_hr_redis(insts, sample=True, host='localhost', port=6379):
             df_price.columns = map(str.lower, df_price.columns)
             df_price.set_index('ts', inplace=True)
             df = pd.concat([df, df_price], sort=True)
+        df['coin'] = pd.Categorical(df['coin'], categories=insts)
     return df
 
 
-def _get_px_redis(sample=True, host='localhost', port=6379, timeframe='1h'):
-    """Private - Get prices from redis and return
-
-    Keyword Arguments:
-        sample {bool} -- True then csv file will be smaller - used for algo trading. Else for backtesting (default: {True})
-        host {string} -- Host of redis (default: {localhost})
-        port {int} -- Port of redis (default: {6379})
-        timeframe {str} -- Timeframe to pull (default: {'1h'})
-
-    Returns:
-        pandas.DataFrame -- DataFrame of prices
-    """
-    r = redis.Redis(host=host)
-    filename = f'prices-sample_{timeframe}' if sample else f'prices-all_{timeframe}'
-    df = pd.DataFrame(json.loads(r.get(filename)))
-    df['dateTime'] = pd.to_datetime(df['dateTime'], unit='ms')
-    df.set_index(df['dateTime'], inplace=True)
-    return df
-
-
+@lru_cache(maxsize=32)
 def weighted_expo_wgts(std_wind):
     """Calculates the exponential weighting based on the length of the std. window
 
+    Notes:
+        Cached per window, the returned array is read-only
+
     Arguments:
         std_wind {int} -- Rolling standard deviation lookback window. This determines how many data points in-between
                             the expo function is needed
@@ -157,11 +436,9 @@ def weighted_expo_wgts(std_wind):
         numpy.array -- Exponential weighting between -3 and +3
     """
     x = np.linspace(-3, 3, std_wind)
-    upper_func = np.vectorize(lambda t: (1 - math.exp(-t) / 2) + 0.5)
-    lower_func = np.vectorize(lambda t: (math.exp(t) / 2) + 0.5)
-    upper = x[x >= 0]
-    lower = x[x < 0]
-    return np.append(lower_func(lower), upper_func(upper))
+    wgts = np.where(x >= 0, (1 - np.exp(-x) / 2) + 0.5, (np.exp(x) / 2) + 0.5)
+    wgts.setflags(write=False)
+    return wgts
 
 
 def weighted_expo_std(df_ret, std_wind, timeframe):
@@ -176,12 +453,43 @@ def weighted_expo_std(df_ret, std_wind, timeframe):
     Returns:
         numpy.array -- Exponetially weighted standard deviation values
     """
-    mult_dict = {'1D': 365, '4H': 365 * 8, '1H': 365 * 24}
     expo_wgts = weighted_expo_wgts(std_wind=std_wind)
     weighted_ave = np.sum(df_ret * expo_wgts) / np.sum(expo_wgts)
     return np.sqrt(
         np.sum(np.power(df_ret - weighted_ave, 2) * expo_wgts) / (std_wind - 1)) * math.sqrt(
-        mult_dict[timeframe])
+        EXPO_STD_MULT[timeframe])
+
+
+def rolling_expo_std(df_rets, std_wind, timeframe):
+    """Rolling exponentially weighted standard deviation of every column at once
+
+    Notes:
+        Same values as df_rets.rolling(std_wind).apply(weighted_expo_std, raw=True), a window holding a NaN gives NaN.
+        The weighted sums are built one lag at a time over the whole returns matrix, so memory stays at a few
+        copies of df_rets whatever the window.
+
+    Arguments:
+        df_rets {pandas.DataFrame} -- DataFrame of returns data
+        std_wind {int} -- Rolling standard deviation lookback window
+        timeframe {str} -- '1D', '1H' etc. used to annualise the std.
+
+    Returns:
+        pandas.DataFrame -- Exponetially weighted standard deviation, same shape as df_rets
+    """
+    std = _rolling_weighted_std(df_rets.to_numpy(dtype=float), weighted_expo_wgts(std_wind=std_wind))
+    return pd.DataFrame(std * math.sqrt(EXPO_STD_MULT[timeframe]), index=df_rets.index, columns=df_rets.columns)
+
+
+def _rolling_weighted_std(rets, wgts):
+    """Rolling weighted std of a returns matrix over len(wgts) rows, NaN for the first rows and windows with a NaN"""
+    std_wind = len(wgts)
+    n = len(rets) - std_wind + 1
+    std = np.full(rets.shape, np.nan)
+    if n > 0:
+        weighted_ave = sum(wgt * rets[lag:lag + n] for lag, wgt in enumerate(wgts)) / np.sum(wgts)
+        var = sum(wgt * np.power(rets[lag:lag + n] - weighted_ave, 2) for lag, wgt in enumerate(wgts))
+        std[std_wind - 1:] = np.sqrt(var / (std_wind - 1))
+    return std
 
 
 def annualise_mult():
@@ -0,0 +1,187 @@
+import json
+
+import numpy as np
+import pandas as pd
+import redis
+
+PX_FIELDS = ['open', 'high', 'low', 'close', 'volume']
+PX_DTYPES = dict({'ts': '<i8'}, **{field: '<f8' for field in PX_FIELDS})
+
+
+def _chunk(ts):
+    """Month chunk (YYYYMM) of ms timestamps"""
+    months = np.asarray(ts, dtype='int64').astype('datetime64[ms]').astype('datetime64[M]').astype('int64')
+    return (1970 + months // 12) * 100 + months % 12 + 1
+
+
+def _chunks_key(coin, timeframe):
+    return f'prices_{timeframe}:{coin}:chunks'
+
+
+def _col_key(coin, timeframe, chunk, col):
+    return f'prices_{timeframe}:{coin}:{chunk}:{col}'
+
+
+def get_px_client(host='localhost', port=6379):
+    return redis.Redis(host=host, port=port)
+
+
+def _last_ts(r, coin, timeframe, watch=False):
+    """Last stored bar time in ms, WATCHing the chunk list and then the last chunk's ts column before reading them"""
+    key = _chunks_key(coin, timeframe)
+    if watch:
+        r.watch(key)
+    chunks = r.zrevrange(key, 0, 0)
+    if not chunks:
+        return None
+    ts_key = _col_key(coin, timeframe, int(chunks[0]), 'ts')
+    if watch:
+        r.watch(ts_key)
+    last = r.getrange(ts_key, -8, -1)
+    return int(np.frombuffer(last, dtype=PX_DTYPES['ts'])[0]) if last else None
+
+
+def last_px_ts(coin, timeframe='1h', r=None):
+    """Last stored bar time of a coin in ms, None if nothing is stored
+
+    Arguments:
+        coin {str} -- Coin (i.e. 'BTCUSD')
+
+    Keyword Arguments:
+        timeframe {str} -- Timeframe (default: {'1h'})
+        r {redis.Redis} -- Redis client, localhost if None (default: {None})
+
+    Returns:
+        int -- ms time of the last bar
+    """
+    r = r if r else get_px_client()
+    return _last_ts(r, coin, timeframe)
+
+
+def append_px_redis(df, coin, timeframe='1h', r=None):
+    """Append bars of one coin, bars at or before the last stored one are dropped
+
+    Notes:
+        Each coin, timeframe and month is one chunk holding one little-endian binary string per column. New bars are
+        APPENDed to the chunk columns in one MULTI/EXEC, so history is never rewritten and the columns stay aligned.
+        The chunk list and the last chunk's ts column are WATCHed while the last bar is read, if another writer
+        appends first the EXEC fails and the append is retried from its new last bar.
+
+    Arguments:
+        df {pandas.DataFrame} -- Bars indexed by time with PX_FIELDS columns
+        coin {str} -- Coin (i.e. 'BTCUSD')
+
+    Keyword Arguments:
+        timeframe {str} -- Timeframe (default: {'1h'})
+        r {redis.Redis} -- Redis client, localhost if None (default: {None})
+
+    Returns:
+        int -- Number of bars appended
+    """
+    r = r if r else get_px_client()
+    df = df[~df.index.duplicated(keep='last')].sort_index()
+    ts_all = df.index.values.astype('datetime64[ms]').astype('int64')
+
+    with r.pipeline(transaction=True) as pipe:
+        while True:
+            try:
+                last = _last_ts(pipe, coin, timeframe, watch=True)
+                keep = ts_all > last if last is not None else np.ones(len(ts_all), dtype=bool)
+                if not keep.any():
+                    pipe.unwatch()
+                    return 0
+                pipe.multi()
+                _queue_append(pipe, df[keep], ts_all[keep], coin, timeframe)
+                pipe.execute()
+                return int(keep.sum())
+            except redis.WatchError:
+                # Another writer appended since the last bar was read, read it again so no bar is stored twice
+                continue
+
+
+def _queue_append(pipe, df, ts, coin, timeframe):
+    """Queue the APPENDs of bars after the last stored one on a MULTI pipeline, chunk by chunk"""
+    cols = dict({'ts': ts}, **{field: df[field].to_numpy() for field in PX_FIELDS})
+    chunks = _chunk(ts)
+    bounds = np.flatnonzero(np.diff(chunks)) + 1
+    for lo, hi in zip(np.r_[0, bounds], np.r_[bounds, len(ts)]):
+        chunk = int(chunks[lo])
+        for col, values in cols.items():
+            pipe.append(_col_key(coin, timeframe, chunk, col), values[lo:hi].astype(PX_DTYPES[col]).tobytes())
+        pipe.zadd(_chunks_key(coin, timeframe), {chunk: chunk})
+
+
+def read_px_redis(insts, timeframe='1h', start=None, end=None, r=None):
+    """Read bars of the requested coins and date range
+
+    Notes:
+        Two pipelined round trips whatever the number of coins, one for the chunk lists and one for the column
+        chunks. Columns are decoded with np.frombuffer over the returned bytes.
+
+    Arguments:
+        insts {list} -- Coins to read
+
+    Keyword Arguments:
+        timeframe {str} -- Timeframe (default: {'1h'})
+        start {datetime} -- Start time, from the first bar if None (default: {None})
+        end {datetime} -- End time (inclusive), to the last bar if None (default: {None})
+        r {redis.Redis} -- Redis client, localhost if None (default: {None})
+
+    Returns:
+        pandas.DataFrame -- Prices indexed by dateTime with PX_FIELDS, a categorical 'coin' and 'timeframe' columns
+    """
+    r = r if r else get_px_client()
+    start_ms = None if start is None else int(pd.Timestamp(start).value // 10 ** 6)
+    end_ms = None if end is None else int(pd.Timestamp(end).value // 10 ** 6)
+    lo = '-inf' if start_ms is None else int(_chunk(start_ms))
+    hi = '+inf' if end_ms is None else int(_chunk(end_ms))
+
+    pipe = r.pipeline(transaction=False)
+    for coin in insts:
+        pipe.zrangebyscore(_chunks_key(coin, timeframe), lo, hi)
+    coin_chunks = [[int(chunk) for chunk in chunks] for chunks in pipe.execute()]
+
+    pipe = r.pipeline(transaction=False)
+    for coin, chunks in zip(insts, coin_chunks):
+        for chunk in chunks:
+            for col in PX_DTYPES:
+                pipe.get(_col_key(coin, timeframe, chunk, col))
+    raw = iter(pipe.execute())
+
+    frames = []
+    for i, (coin, chunks) in enumerate(zip(insts, coin_chunks)):
+        if not chunks:
+            continue
+        parts = [{col: np.frombuffer(next(raw) or b'', dtype=dtype) for col, dtype in PX_DTYPES.items()}
+                 for _ in chunks]
+        cols = {col: parts[0][col] if len(parts) == 1 else np.concatenate([p[col] for p in parts])
+                for col in PX_DTYPES}
+
+        # Only the first and last chunks can hold bars outside [start, end]
+        ts = cols['ts']
+        first = 0 if start_ms is None else np.searchsorted(ts, start_ms, side='left')
+        last = len(ts) if end_ms is None else np.searchsorted(ts, end_ms, side='right')
+        df = pd.DataFrame({field: cols[field][first:last] for field in PX_FIELDS},
+                          index=pd.DatetimeIndex(ts[first:last].astype('datetime64[ms]'), name='dateTime'))
+        df['coin'] = pd.Categorical.from_codes(np.full(len(df.index), i), categories=list(insts))
+        df['timeframe'] = timeframe
+        frames.append(df)
+    if not frames:
+        return pd.DataFrame(columns=PX_FIELDS + ['coin', 'timeframe'], index=pd.DatetimeIndex([], name='dateTime'))
+    return pd.concat(frames)
+
+
+def migrate_px_redis(timeframe='1h', r=None):
+    """One-off copy of the prices-all JSON blob into the per-coin binary layout
+
+    Keyword Arguments:
+        timeframe {str} -- Timeframe (default: {'1h'})
+        r {redis.Redis} -- Redis client, localhost if None (default: {None})
+
+    Returns:
+        dict -- Coin to number of bars appended
+    """
+    r = r if r else get_px_client()
+    df = pd.DataFrame(json.loads(r.get(f'prices-all_{timeframe}')))
+    df.index = pd.to_datetime(df['dateTime'], unit='ms')
+    return {coin: append_px_redis(df_coin, coin, timeframe, r) for coin, df_coin in df.groupby('coin')}
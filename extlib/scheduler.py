@@ -0,0 +1,113 @@
+import heapq
+import itertools
+import threading
+import time
+
+PRIORITY_CRITICAL = 0
+PRIORITY_NORMAL = 1
+PRIORITY_BULK = 2
+
+
+class TokenBucket:
+
+    def __init__(self, calls_per_min, burst=None):
+        """Token bucket refilled continuously at calls_per_min
+
+        Arguments:
+            calls_per_min {int} -- Sustained calls allowed per minute
+
+        Keyword Arguments:
+            burst {int} -- Max tokens held, calls_per_min if None (default: {None})
+        """
+        self.rate = calls_per_min / 60
+        self.capacity = burst if burst else calls_per_min
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, tokens=1):
+        """Seconds until tokens are available, 0 if they are available now"""
+        self.refill()
+        return 0 if self.tokens >= tokens else (tokens - self.tokens) / self.rate
+
+
+class RateLimitScheduler:
+
+    def __init__(self, limits, default_limit=30):
+        """Blocks callers until their endpoint has a token, serving waiters by priority then arrival
+
+        Notes:
+            A bucket 'name:id' (i.e. 'auth:<api key id>') has its own tokens and the limit of 'name'.
+
+        Arguments:
+            limits {dict} -- Bucket name to calls per minute, or (calls per minute, burst)
+                             {'auth': 90, 'v2/candles': 30, 'public': (1200, 50)}
+
+        Keyword Arguments:
+            default_limit {int} -- Calls per minute for buckets not in limits (default: {30})
+        """
+        self.limits = limits
+        self.default_limit = default_limit
+        self.buckets = {}
+        self.queues = {}
+        self.metrics = {}
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+
+    def _bucket(self, name):
+        if name not in self.buckets:
+            limit = self.limits.get(name, self.limits.get(name.split(':')[0], self.default_limit))
+            self.buckets[name] = TokenBucket(*limit) if isinstance(limit, tuple) else TokenBucket(limit)
+            self.queues[name] = []
+            self.metrics[name] = {'calls': 0, 'queued': 0, 'total_wait': 0.0, 'max_wait': 0.0}
+        return self.buckets[name]
+
+    def acquire(self, name, priority=PRIORITY_NORMAL, weight=1):
+        """Block until a call on bucket name may be sent
+
+        Arguments:
+            name {str} -- Bucket name
+
+        Keyword Arguments:
+            priority {int} -- Lower is served first, PRIORITY_CRITICAL/NORMAL/BULK (default: {PRIORITY_NORMAL})
+            weight {int} -- Tokens the call costs, for weight based limits (i.e. Binance) (default: {1})
+
+        Returns:
+            float -- Seconds spent waiting
+        """
+        st = time.monotonic()
+        ticket = (priority, next(self._seq))
+        with self._cond:
+            bucket = self._bucket(name)
+            queue = self.queues[name]
+            heapq.heappush(queue, ticket)
+            while True:
+                wait = bucket.wait_time(weight)
+                if queue[0] == ticket and wait == 0:
+                    break
+                self._cond.wait(timeout=wait if wait else None)
+            heapq.heappop(queue)
+            bucket.tokens -= weight
+            self._cond.notify_all()
+
+            waited = time.monotonic() - st
+            metrics = self.metrics[name]
+            metrics['calls'] += 1
+            metrics['queued'] += waited > 0.001
+            metrics['total_wait'] += waited
+            metrics['max_wait'] = max(metrics['max_wait'], waited)
+        return waited
+
+    def stats(self):
+        """Queue depth and wait time metrics per bucket
+
+        Returns:
+            dict -- {'auth': {'depth': 2, 'calls': 10, 'queued': 3, 'total_wait': 1.2, 'max_wait': 0.7, 'ave_wait': 0.12}}
+        """
+        with self._cond:
+            return {name: dict(m, depth=len(self.queues[name]), ave_wait=m['total_wait'] / m['calls'] if m['calls'] else 0)
+                    for name, m in self.metrics.items()}
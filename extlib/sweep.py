@@ -0,0 +1,151 @@
+import itertools
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from extlib.price_processor import OHLC_AGG, PriceProcessor
+
+# Prices attached by each worker process, see _init_worker
+_PRICES = None
+_SHM = []
+
+
+class SharedPrices:
+
+    def __init__(self, df_prices, fields=tuple(OHLC_AGG)):
+        """Raw price columns of df_prices copied once into shared memory for worker processes to read
+
+        Notes:
+            Workers rebuild df_prices as a DataFrame over the shared buffers, so no worker holds its own copy.
+            Needs python >= 3.8. Use as a context manager, or call close, to free the shared memory.
+
+        Arguments:
+            df_prices {pandas.DataFrame} -- DataFrame of prices indexed by time with a 'coin' column
+
+        Keyword Arguments:
+            fields {tuple} -- Price columns to share (default: {('open', 'high', 'low', 'close')})
+        """
+        codes, coins = pd.factorize(df_prices['coin'])
+        arrays = {
+            'index': df_prices.index.values.astype('datetime64[ns]').astype('int64'),
+            'coin': codes.astype('int32'),
+            'values': np.stack([df_prices[field].to_numpy(dtype='float64') for field in fields]),
+        }
+        self.blocks = {}
+        for name, array in arrays.items():
+            block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[:] = array
+            self.blocks[name] = block
+        self.spec = {
+            'names': {name: block.name for name, block in self.blocks.items()},
+            'rows': len(df_prices.index),
+            'fields': list(fields),
+            'coins': list(coins),
+        }
+
+    def close(self):
+        for block in self.blocks.values():
+            block.close()
+            block.unlink()
+        self.blocks = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def attach_prices(spec):
+    """Rebuild df_prices over the shared buffers described by SharedPrices.spec
+
+    Arguments:
+        spec {dict} -- SharedPrices.spec
+
+    Returns:
+        tuple -- pandas.DataFrame of prices and the SharedMemory blocks to keep open while it is in use
+    """
+    blocks = {name: shared_memory.SharedMemory(name=shm_name) for name, shm_name in spec['names'].items()}
+
+    rows = spec['rows']
+    index = np.ndarray(rows, dtype='int64', buffer=blocks['index'].buf).view('datetime64[ns]')
+    codes = np.ndarray(rows, dtype='int32', buffer=blocks['coin'].buf)
+    values = np.ndarray((len(spec['fields']), rows), dtype='float64', buffer=blocks['values'].buf)
+
+    df = pd.DataFrame(values.T, index=pd.DatetimeIndex(index), columns=spec['fields'], copy=False)
+    df['coin'] = pd.Categorical.from_codes(codes, categories=spec['coins'])
+    return df, list(blocks.values())
+
+
+def _init_worker(spec):
+    global _PRICES, _SHM
+    _PRICES, _SHM = attach_prices(spec)
+
+
+def _run_task(task):
+    """Build one PriceProcessor per (timeframe, hr_offset) and reuse its panels across vol windows"""
+    insts, rebal_hr, timeframe, hr_offset, vol_windows, func = task
+    pp = PriceProcessor(insts, _PRICES, vol_windows[0], rebal_hr, timeframe=timeframe, hr_offset=hr_offset)
+    results = []
+    for vol_window in vol_windows:
+        if vol_window != pp.vol_window:
+            pp.vol_window = vol_window
+            pp.process_std()
+        results.append(((vol_window, timeframe, hr_offset), func(pp)))
+    return results
+
+
+def last_stats(pp):
+    """Default sweep output, the last close, std and expo. std of every instrument
+
+    Arguments:
+        pp {PriceProcessor} -- Processor of one parameter set
+
+    Returns:
+        numpy.array -- Shape (3, len(insts))
+    """
+    return np.stack([pp.df_close.iloc[-1].to_numpy(), pp.df_std.iloc[-1].to_numpy(),
+                     pp.df_exp_std.iloc[-1].to_numpy()])
+
+
+def run_sweep(insts, df_prices, vol_windows, timeframes=('1D',), hr_offsets=(0,), rebal_hr=None, func=last_stats,
+              max_workers=None):
+    """Run PriceProcessor over a parameter grid on a process pool reading prices from shared memory
+
+    Notes:
+        Each task builds the OHLC panels of one (timeframe, hr_offset) once and loops over a chunk of vol windows,
+        the grid is split into about two tasks per worker. func runs in the workers and must be picklable, a
+        module level function, and should return compact numpy arrays rather than DataFrames.
+
+    Arguments:
+        insts {list} -- All instruments used for analysis
+        df_prices {pandas.DataFrame} -- DataFrame of prices
+        vol_windows {list} -- Volatility windows
+
+    Keyword Arguments:
+        timeframes {list} -- Timeframes (default: {('1D',)})
+        hr_offsets {list} -- Hour offsets (default: {(0,)})
+        rebal_hr {list} -- Rebalancing hours passed to PriceProcessor (default: {None})
+        func {function} -- func(PriceProcessor) giving the result of one parameter set (default: {last_stats})
+        max_workers {int} -- Worker processes, the cpu count if None (default: {None})
+
+    Returns:
+        dict -- (vol_window, timeframe, hr_offset) to func's result
+    """
+    max_workers = max_workers if max_workers else os.cpu_count()
+    groups = list(itertools.product(timeframes, hr_offsets))
+    chunk = max(1, math.ceil(len(vol_windows) * len(groups) / (2 * max_workers)))
+    tasks = [(insts, rebal_hr, timeframe, hr_offset, list(vol_windows[i:i + chunk]), func)
+             for timeframe, hr_offset in groups for i in range(0, len(vol_windows), chunk)]
+
+    results = {}
+    with SharedPrices(df_prices) as prices:
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                                 initargs=(prices.spec,)) as executor:
+            for task_results in executor.map(_run_task, tasks):
+                results.update(task_results)
+    return results
@@ -0,0 +1,91 @@
+import threading
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DEFAULT_POOL_SIZE = 10
+DEFAULT_TIMEOUT = 10
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 0.3
+SERVER_ERROR_STATUSES = (500, 502, 503, 504)
+RETRY_STATUSES = (429,) + SERVER_ERROR_STATUSES
+
+_sessions = {}
+_lock = threading.Lock()
+
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+
+    def __init__(self, *args, timeout=DEFAULT_TIMEOUT, **kwargs):
+        """HTTPAdapter that applies a default timeout to every request sent through it
+
+        Keyword Arguments:
+            timeout {float} -- seconds to wait for the server before giving up (default: {DEFAULT_TIMEOUT})
+        """
+        self.timeout = timeout
+        super().__init__(*args, **kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = self.timeout
+        return super().send(request, **kwargs)
+
+
+def build_session(pool_size=DEFAULT_POOL_SIZE, timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES,
+                  backoff=DEFAULT_BACKOFF, statuses=RETRY_STATUSES):
+    """Build a keep-alive session with a connection pool per host
+
+    Notes:
+        Only idempotent methods are retried. Authenticated BFX calls are POSTs signed with a nonce,
+        replaying them would be rejected by the exchange so they are never retried here. Clients sending calls
+        through a RateLimitScheduler pass SERVER_ERROR_STATUSES, a 429 re-sent here would not take a scheduler token.
+
+    Keyword Arguments:
+        pool_size {int} -- Max connections kept alive per host (default: {DEFAULT_POOL_SIZE})
+        timeout {float} -- Default timeout in seconds for each request (default: {DEFAULT_TIMEOUT})
+        retries {int} -- Number of retries on connection errors and statuses (default: {DEFAULT_RETRIES})
+        backoff {float} -- Backoff factor between retries, sleeps backoff * 2 ** (retry - 1) (default: {DEFAULT_BACKOFF})
+        statuses {tuple} -- Response statuses retried (default: {RETRY_STATUSES})
+
+    Returns:
+        requests.Session -- Session with pooled adapters mounted on http and https
+    """
+    retry = Retry(total=retries, backoff_factor=backoff, status_forcelist=statuses,
+                  raise_on_status=False)
+    adapter = TimeoutHTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry,
+                                 timeout=timeout)
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def get_session(url, **kwargs):
+    """Get the process wide session for the host of url, creating it on first use
+
+    Arguments:
+        url {str} -- Base url of the exchange (i.e. 'https://api.bitfinex.com/')
+
+    Keyword Arguments:
+        kwargs -- Passed to build_session the first time the host is seen
+
+    Returns:
+        requests.Session -- Shared session for that host
+    """
+    host = urlparse(url).netloc
+    with _lock:
+        session = _sessions.get(host)
+        if session is None:
+            session = build_session(**kwargs)
+            _sessions[host] = session
+    return session
+
+
+def close_sessions():
+    """Close every shared session and drop its pooled connections"""
+    with _lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
@@ -46,3 +46,17 @@ def snake_to_camel(snake_str):
     # We capitalize the first letter of each component except the first one
     # with the 'title' method and join them together.
     return components[0] + ''.join(x.title() for x in components[1:])
+
+
+def split_range(start, end, step):
+    """Split [start, end] into consecutive windows of at most step
+
+    Args:
+        start {int} -- start of range
+        end {int} -- end of range (inclusive)
+        step {int} -- max length of each window
+
+    Returns:
+        list -- [(window_start, window_end), ...] non overlapping and in order
+    """
+    return [(st, min(st + step - 1, end)) for st in range(start, end + 1, step)]
@@ -59,3 +59,31 @@ def get_tgt_wgt_redis(strat, host, port):
         return data
     else:
         return {}
+
+
+def get_fund_perf_state_redis(fund, host, port):
+    """Get the live performance state of a fund from redis
+
+    Arguments:
+        fund {str} -- fund name to pull the state for
+        host {str} -- redis host
+        port {int} -- redis port
+
+    Returns:
+        dict -- PerfTracker.to_dict state as strings, empty if none is stored
+    """
+    r = Redis(host=host, port=port, decode_responses=True)
+    return r.hgetall(f'{fund}_perf_state')
+
+
+def set_fund_perf_state_redis(fund, state, host, port):
+    """Store the live performance state of a fund in redis
+
+    Arguments:
+        fund {str} -- fund name to store the state for
+        state {dict} -- PerfTracker.to_dict state
+        host {str} -- redis host
+        port {int} -- redis port
+    """
+    r = Redis(host=host, port=port, decode_responses=True)
+    r.hset(f'{fund}_perf_state', mapping=state)
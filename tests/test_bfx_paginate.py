@@ -0,0 +1,60 @@
+import pandas as pd
+import pytest
+
+from extlib.bfx_v2 import BFXV2, LEDGER_DTYPES, PaginationError
+from extlib.columnar import ColumnWriter, read_columns
+
+
+def _history(ts):
+    """Ledger rows at the given ms times, IDs ascending with time"""
+    ts = sorted(ts)
+    return pd.DataFrame({'ID': range(1, len(ts) + 1), 'CCY': 'USD', 'TS': pd.to_datetime(ts, unit='ms'),
+                         'AMOUNT': 1.0, 'BALANCE': 1.0, 'DESC': [f'Trading fees for {i}' for i in range(len(ts))]})
+
+
+def _fetcher(df, limit):
+    """fetch(start, end) of an endpoint returning at most limit rows in [start, end], newest first"""
+    def fetch(start, end):
+        ts = df['TS'].values.astype('datetime64[ms]').astype('int64')
+        page = df[(ts >= start) & (ts <= end)].sort_values(['TS', 'ID'], ascending=False)
+        return page.head(limit).reset_index(drop=True)
+    return fetch
+
+
+def test_rows_sharing_a_millisecond_across_pages_are_kept():
+    df = _history([100, 200, 300, 300, 400, 500])
+    pages = list(BFXV2._paginate(_fetcher(df, 3), 0, 1000, 3))
+    ids = pd.concat(pages)['ID'].tolist()
+    assert sorted(ids) == df['ID'].tolist()
+    assert len(ids) == len(set(ids))
+
+
+def test_rows_at_start_past_a_full_page_are_kept():
+    df = _history([100, 100, 200, 300])
+    pages = list(BFXV2._paginate(_fetcher(df, 3), 100, 1000, 3))
+    assert sorted(pd.concat(pages)['ID']) == [1, 2, 3, 4]
+
+
+def test_full_page_of_one_millisecond_raises():
+    df = _history([100, 300, 300, 300, 300, 400])
+    with pytest.raises(PaginationError):
+        list(BFXV2._paginate(_fetcher(df, 3), 0, 1000, 3))
+
+
+def test_spooled_strings_are_not_truncated(tmp_path):
+    df = _history(range(100, 1100, 100))
+    df.loc[3, 'DESC'] = 'Settlement @ 9000.5 on wallet margin ' * 20
+    df.loc[4, 'DESC'] = 'Übertrag'
+    path = str(tmp_path / 'ledgers')
+    list(BFXV2._paginate(_fetcher(df, 4), 0, 2000, 4, path, LEDGER_DTYPES))
+
+    stored = read_columns(path).sort_values('ID').reset_index(drop=True)
+    assert stored['DESC'].tolist() == df['DESC'].tolist()
+    assert stored['CCY'].tolist() == ['USD'] * 10
+
+    # An interrupted append past the committed rows is rolled back on the next open
+    writer = ColumnWriter(path, LEDGER_DTYPES)
+    with open(tmp_path / 'ledgers' / 'DESC.bin', 'ab') as f:
+        f.write(b'partial')
+    assert ColumnWriter(path, LEDGER_DTYPES).last('DESC') == writer.last('DESC')
+    assert read_columns(path)['DESC'].tolist() == stored.sort_values('ID', ascending=False)['DESC'].tolist()
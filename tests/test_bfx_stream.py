@@ -0,0 +1,120 @@
+import asyncio
+import json
+import os
+
+import numpy as np
+import pytest
+from aiohttp import web
+
+from extlib.bfx_stream import BFXStream, ChecksumError, OrderBook
+
+with open(os.path.join(os.path.dirname(__file__), 'data', 'bfx_ws_book.json')) as f:
+    RECORDING = json.load(f)
+SESSION = RECORDING['session']
+CHECKSUM_OK = SESSION.index([17, 'cs', 998786938])
+
+
+def _stream():
+    stream = BFXStream()
+    stream.subscribe_book('tBTCUSD')
+    stream.subscribe_ticker('tETHUSD')
+    return stream
+
+
+def _replay(stream, messages):
+    for msg in messages:
+        stream.handle(msg)
+
+
+def test_snapshot():
+    book = OrderBook()
+    book.load_snapshot(SESSION[5][1])
+    np.testing.assert_array_equal(book.snapshot('bid'), [[9000, 1, 0.5], [8999, 2, 1.25]])
+    np.testing.assert_array_equal(book.snapshot('ask'), [[9001, 1, -0.4], [9002, 3, -2]])
+    np.testing.assert_array_equal(book.depth('ask'), [0.4, 2.4])
+
+
+def test_incremental_updates_match_checksum():
+    stream = _stream()
+    _replay(stream, SESSION[:CHECKSUM_OK + 1])
+    book = stream.get_book('tBTCUSD')
+    np.testing.assert_array_equal(book.snapshot('bid'), [[9000.5, 1, 0.3], [9000, 1, 0.5]])
+    np.testing.assert_array_equal(book.snapshot('ask'), [[9001, 2, -0.9], [9002, 3, -2]])
+    np.testing.assert_allclose(book.depth('bid'), [0.3, 0.8])
+
+
+def test_heartbeats_are_ignored():
+    stream = _stream()
+    _replay(stream, SESSION[:6])
+    before = stream.get_book('tBTCUSD').snapshot('bid')
+    stream.handle([17, 'hb'])
+    stream.handle([5, 'hb'])
+    np.testing.assert_array_equal(stream.get_book('tBTCUSD').snapshot('bid'), before)
+    assert stream.get_ticker('tETHUSD') == {}
+
+
+def test_unmatched_subscribed_event_is_ignored():
+    stream = _stream()
+    _replay(stream, SESSION[:CHECKSUM_OK + 4])
+    assert 9 not in stream.channels
+    assert stream.get_ticker('tETHUSD')['PX_LAST'] == 9000.7
+
+
+def test_checksum_mismatch_raises_and_resets():
+    stream = _stream()
+    _replay(stream, SESSION[:-1])
+    with pytest.raises(ChecksumError) as err:
+        stream.handle(SESSION[-1])
+    assert err.value.args[0] == 17
+    assert len(stream.get_book('tBTCUSD').snapshot('bid')) == 0
+
+
+async def _serve_recording(received):
+    """Local websocket stand-in replaying the recording, the second part once the book is resubscribed"""
+    async def handler(request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        for msg in SESSION:
+            await ws.send_str(json.dumps(msg))
+        async for msg in ws:
+            received.append(json.loads(msg.data))
+            book_subs = [m for m in received if m.get('event') == 'subscribe' and m.get('channel') == 'book']
+            if len(book_subs) == 2:
+                break
+        for msg in RECORDING['resubscribed']:
+            await ws.send_str(json.dumps(msg))
+        await ws.close()
+        return ws
+
+    app = web.Application()
+    app.router.add_get('/ws', handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f'ws://127.0.0.1:{port}/ws'
+
+
+def test_replay_resubscribes_on_checksum_mismatch():
+    received = []
+
+    async def main():
+        runner, url = await _serve_recording(received)
+        stream = _stream()
+        stream.url = url
+        try:
+            await asyncio.wait_for(stream.run(), 10)
+        finally:
+            await runner.cleanup()
+        return stream
+
+    stream = asyncio.run(main())
+    assert received[0] == {'event': 'conf', 'flags': 131072}
+    assert {'event': 'unsubscribe', 'chanId': 17} in received
+    assert received[-1] == stream.subscriptions[0]
+    assert set(stream.channels) == {5, 18}
+    book = stream.get_book('tBTCUSD')
+    np.testing.assert_array_equal(book.snapshot('bid'), [[9100, 1, 1]])
+    np.testing.assert_array_equal(book.snapshot('ask'), [[9101, 1, -1]])
+    assert stream.get_ticker('tETHUSD')['PX_LAST'] == 9000.7
@@ -0,0 +1,52 @@
+import asyncio
+import threading
+import time
+
+from extlib.bfx_v2_async import AsyncBFXV2
+from extlib.scheduler import RateLimitScheduler
+
+
+class _Response:
+
+    def __init__(self, status_code, text):
+        self.status_code = status_code
+        self.text = text
+
+
+class _Exchange:
+    """Session stand-in that checks nonces the way BFX does, the earlier a request is sent the slower its trip"""
+
+    def __init__(self, delays):
+        self.delays = list(delays)
+        self.last_nonce = 0
+        self.received = []
+        self._lock = threading.Lock()
+
+    def post(self, url, headers=None, data=None, verify=True):
+        with self._lock:
+            delay = self.delays.pop(0) if self.delays else 0
+        time.sleep(delay)
+        nonce = int(headers['bfx-nonce'])
+        with self._lock:
+            self.received.append(nonce)
+            if nonce <= self.last_nonce:
+                return _Response(500, '["error",10114,"nonce: small"]')
+            self.last_nonce = nonce
+        return _Response(200, '[]')
+
+
+def test_concurrent_signed_calls_reach_the_exchange_in_nonce_order():
+    exchange = _Exchange([0.2, 0.15, 0.1, 0.05])
+    client = AsyncBFXV2(key='key', secret='secret', session=exchange,
+                        scheduler=RateLimitScheduler({'auth': 6000}))
+
+    async def main():
+        return await asyncio.gather(*[client._req('v2/auth/r/wallets') for _ in range(6)])
+
+    try:
+        responses = asyncio.run(main())
+    finally:
+        client.close()
+    assert [res.status_code for res in responses] == [200] * 6
+    assert exchange.received == sorted(exchange.received)
+    assert len(exchange.received) == 6
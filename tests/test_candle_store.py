@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from extlib.candle_store import CandleStore, fetch_windows
+
+HOUR = 3600 * 1000
+
+
+def _bars(start, end):
+    ts = np.arange(start, end + 1, HOUR)
+    return pd.DataFrame({'TS': pd.to_datetime(ts, unit='ms'), 'CLOSE': ts / HOUR})
+
+
+@pytest.fixture
+def store(tmp_path):
+    return CandleStore(str(tmp_path))
+
+
+def test_cache_through_fills_gap_after_last(store):
+    calls = []
+
+    def fetch(st, en):
+        calls.append((st, en))
+        return _bars(st, en)
+
+    store.cache_through('bfx', 'tBTCUSD', '1h', 0, 10 * HOUR, HOUR, fetch)
+    store.cache_through('bfx', 'tBTCUSD', '1h', 20 * HOUR, 30 * HOUR, HOUR, fetch)
+    assert calls[-1] == (11 * HOUR, 30 * HOUR)
+
+    df = store.cache_through('bfx', 'tBTCUSD', '1h', 0, 30 * HOUR, HOUR, fetch)
+    assert len(df) == 31
+    assert (np.diff(df['TS'].values.astype('datetime64[ms]').astype('int64')) == HOUR).all()
+
+
+def test_cache_through_head_stops_at_end(store):
+    store.cache_through('bfx', 'tBTCUSD', '1h', 100 * HOUR, 110 * HOUR, HOUR, _bars)
+    df = store.cache_through('bfx', 'tBTCUSD', '1h', 0, 5 * HOUR, HOUR, lambda st, en: _bars(0, 99 * HOUR))
+    assert len(df) == 6
+    assert df['TS'].max() == pd.Timestamp(5 * HOUR, unit='ms')
+
+
+def test_failed_window_leaves_no_gap(store):
+    failing = {10 * HOUR}
+
+    def fetch_page(st, en):
+        # None as BFXV2.get_candles returns on an HTTP 500
+        return None if st in failing else _bars(st, en)
+
+    def fetch(st, en):
+        return fetch_windows(fetch_page, st, en, 10 * HOUR)
+
+    df = store.cache_through('bfx', 'tBTCUSD', '1h', 0, 39 * HOUR, HOUR, fetch)
+    assert len(df) == 10
+    assert store.last_ts('bfx', 'tBTCUSD', '1h') == 9 * HOUR
+
+    failing.clear()
+    df = store.cache_through('bfx', 'tBTCUSD', '1h', 0, 39 * HOUR, HOUR, fetch)
+    assert len(df) == 40
+    assert (np.diff(df['TS'].values.astype('datetime64[ms]').astype('int64')) == HOUR).all()
@@ -0,0 +1,45 @@
+import os
+
+import pytest
+
+os.environ.setdefault('MONGODB_CLIENT', 'mongodb://localhost:27017')
+os.environ.setdefault('RYO_DB', 'ryo_test_indexes')
+os.environ.setdefault('SLACK_KEY', '')
+
+pytest.importorskip('pymongo')
+
+from db_models import connect_ryo  # noqa: E402
+
+URI = 'mongodb://localhost:27017'
+
+
+@pytest.fixture(autouse=True)
+def clients():
+    connect_ryo.close_clients()
+    yield
+    connect_ryo.close_clients()
+
+
+def test_client_is_shared_and_keeps_its_options():
+    client = connect_ryo.get_client(URI, pool_size=50, read_preference='secondaryPreferred')
+    assert connect_ryo.get_client(URI) is client
+    assert connect_ryo.get_client(URI, pool_size=50) is client
+    assert client.options.pool_options.max_pool_size == 50
+    assert client.read_preference.mongos_mode == 'secondaryPreferred'
+
+
+def test_other_options_for_a_built_client_raise():
+    connect_ryo.get_client(URI)
+    with pytest.raises(ValueError, match='pool_size'):
+        connect_ryo.get_client(URI, pool_size=50)
+    with pytest.raises(ValueError, match='socket_timeout_ms'):
+        connect_ryo.get_client(URI, socket_timeout_ms=1000)
+    assert connect_ryo.get_client(URI, pool_size=connect_ryo.DEFAULT_POOL_SIZE) is connect_ryo.get_client(URI)
+
+    connect_ryo.close_clients()
+    assert connect_ryo.get_client(URI, pool_size=50).options.pool_options.max_pool_size == 50
+
+
+def test_unknown_options_raise():
+    with pytest.raises(TypeError):
+        connect_ryo.get_client(URI, poolsize=50)
@@ -0,0 +1,104 @@
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from extlib import deribit
+from extlib.deribit import Deribit
+from extlib.scheduler import RateLimitScheduler
+from extlib.transport import close_sessions
+
+INSTRUMENTS = [{'instrument_name': f'BTC-26JUN20-{strike}-C', 'strike': strike, 'expiration_timestamp': 1593158400000}
+               for strike in [8000, 9000, 10000]]
+
+
+class _Response:
+
+    def __init__(self, status_code, data):
+        self.status_code = status_code
+        self.data = data
+
+    def json(self):
+        return self.data
+
+
+class _Session:
+    """Deribit public endpoints from canned results, order books rejected for the rate limit `rejects` times"""
+
+    def __init__(self, summaries, rejects=0):
+        self.summaries = summaries
+        self.rejects = rejects
+        self.calls = []
+
+    def get(self, url):
+        path, query = urlparse(url).path.split('/')[-1], parse_qs(urlparse(url).query)
+        self.calls.append(path)
+        if path == 'get_instruments':
+            return _Response(200, {'result': INSTRUMENTS})
+        if path == 'get_book_summary_by_currency':
+            return _Response(200, {'result': self.summaries})
+        if self.rejects:
+            self.rejects -= 1
+            if self.rejects % 2:
+                return _Response(429, None)
+            return _Response(400, {'error': {'code': 10028, 'message': 'too_many_requests'}})
+        name = query['instrument_name'][0]
+        return _Response(200, {'result': {'instrument_name': name, 'best_bid_amount': 1.0, 'bid_iv': 50.0,
+                                          'greeks': {'delta': 0.5}}})
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(deribit, 'RATE_LIMIT_BACKOFF', 0)
+
+
+def _client(session):
+    return Deribit(session=session, scheduler=RateLimitScheduler({'public': 6000}))
+
+
+def test_chain_without_summaries_keeps_the_specs():
+    df = _client(_Session([])).get_chain(['BTC'])
+    assert df['instrument_name'].tolist() == [i['instrument_name'] for i in INSTRUMENTS]
+    assert 'dte' in df.columns
+
+
+def test_chain_depth_retries_rate_limited_books():
+    summaries = [{'instrument_name': i['instrument_name'], 'mark_price': 0.1} for i in INSTRUMENTS]
+    session = _Session(summaries, rejects=4)
+    df = _client(session).get_chain(['BTC'], depth=True, max_workers=2)
+    assert df['mark_price'].tolist() == [0.1] * 3
+    assert df['delta'].tolist() == [0.5] * 3
+    assert session.calls.count('get_order_book') == 3 + 4
+
+
+def test_rate_limit_gives_up_after_retries(monkeypatch):
+    monkeypatch.setattr(deribit, 'RATE_LIMIT_RETRIES', 2)
+    with pytest.raises(RuntimeError):
+        _client(_Session([], rejects=3)).get_order_book('BTC-26JUN20-9000-C')
+
+
+def test_calls_are_throttled():
+    scheduler = RateLimitScheduler(deribit.RATE_LIMITS)
+    client = Deribit(session=_Session([]), scheduler=scheduler)
+    for _ in range(3):
+        client.get_order_book('BTC-26JUN20-9000-C')
+    assert scheduler.stats()['public']['calls'] == 3
+    assert scheduler.buckets['public'].capacity == 50
+
+
+def test_other_errors_are_raised():
+    class _Rejecting(_Session):
+        def get(self, url):
+            self.calls.append(url)
+            return _Response(400, {'error': {'code': 10004, 'message': 'order_not_found'}})
+
+    session = _Rejecting([])
+    with pytest.raises(RuntimeError, match='10004'):
+        _client(session).get_order_book('BTC-26JUN20-9000-C')
+    assert len(session.calls) == 1
+
+
+def test_session_leaves_429_to_get():
+    close_sessions()
+    retry = Deribit().session.get_adapter('https://deribit.com/').max_retries
+    assert 429 not in retry.status_forcelist
+    close_sessions()
@@ -0,0 +1,89 @@
+import os
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+os.environ.setdefault('MONGODB_CLIENT', 'mongodb://localhost:27017')
+os.environ.setdefault('RYO_DB', 'ryo_test_indexes')
+os.environ.setdefault('SLACK_KEY', '')
+
+from db_models.frames import cursor_to_df, projection  # noqa: E402
+
+DT = datetime(2020, 1, 1)
+
+
+def _docs():
+    """Seven documents in batches of two: 'fee' missing from the second batch, 'note' first seen in the third"""
+    docs = [{'coin': coin, 'dateTime': DT + timedelta(hours=i), 'px': 100.0 + i, 'qty': i, 'fee': 0.1}
+            for i, coin in enumerate(['BTC', 'ETH', 'BTC', 'XRP', 'ETH', 'BTC', 'LTC'])]
+    for doc in docs[2:4]:
+        del doc['fee']
+    docs[4]['note'] = 'rebalance'
+    docs[6]['note'] = None
+    return docs
+
+
+@pytest.mark.parametrize('batch_size', [1, 2, 3, 100])
+def test_matches_a_frame_of_every_document(batch_size):
+    docs = _docs()
+    df = cursor_to_df(iter(docs), batch_size=batch_size)
+    pd.testing.assert_frame_equal(df, pd.DataFrame(docs))
+    assert list(df.columns) == ['coin', 'dateTime', 'px', 'qty', 'fee', 'note']
+
+
+def test_fields_keep_their_order_and_missing_ones_are_nan():
+    docs = _docs()
+    df = cursor_to_df(iter(docs), fields=['note', 'px', 'fee', 'absent'], batch_size=2)
+    pd.testing.assert_frame_equal(df, pd.DataFrame(docs, columns=['note', 'px', 'fee', 'absent']))
+
+
+def test_typed_fields():
+    docs = _docs()
+    dtypes = {'dateTime': 'datetime64[ns]', 'px': 'float32', 'qty': 'int64'}
+    df = cursor_to_df(iter(docs), fields=list(dtypes), dtypes=dtypes, batch_size=2)
+    assert dict(df.dtypes.astype(str)) == dtypes
+    pd.testing.assert_frame_equal(df, pd.DataFrame(docs).astype(dtypes)[list(dtypes)])
+
+
+@pytest.mark.parametrize('batch_size', [2, 100])
+def test_int_with_a_missing_value_falls_back_to_float64(batch_size):
+    docs = _docs()
+    docs[1]['qty'] = None
+    del docs[5]['qty']
+    df = cursor_to_df(iter(docs), fields=['qty'], dtypes={'qty': 'int64'}, batch_size=batch_size)
+    assert df['qty'].dtype == np.float64
+    np.testing.assert_array_equal(df['qty'].to_numpy(), [0, np.nan, 2, 3, 4, np.nan, 6])
+
+    # Rows a batch does not cover at all are missing too
+    docs = _docs()
+    df = cursor_to_df(iter(docs), fields=['fee'], dtypes={'fee': 'int64'}, batch_size=2)
+    np.testing.assert_array_equal(df['fee'].to_numpy(), [0, 0, np.nan, np.nan, 0, 0, 0])
+
+
+def test_category_codes_span_batches():
+    docs = _docs()
+    docs[3]['coin'] = None
+    df = cursor_to_df(iter(docs), dtypes={'coin': 'category', 'note': 'category'}, batch_size=2)
+    assert isinstance(df['coin'].dtype, pd.CategoricalDtype)
+    assert list(df['coin'].cat.categories) == ['BTC', 'ETH', 'LTC']
+    assert df['coin'].isna().tolist() == [False, False, False, True, False, False, False]
+    assert df['coin'].dropna().tolist() == [doc['coin'] for doc in docs if doc['coin'] is not None]
+    assert df['note'].isna().tolist() == [True, True, True, True, False, True, True]
+    assert list(df['note'].cat.categories) == ['rebalance']
+
+
+def test_empty_cursor_keeps_the_fields():
+    df = cursor_to_df(iter([]), fields=['coin', 'px'])
+    assert df.empty
+    assert list(df.columns) == ['coin', 'px']
+
+
+def test_mongo_cursor_with_projection():
+    mongomock = pytest.importorskip('mongomock')
+    collection = mongomock.MongoClient().db.prices
+    collection.insert_many(_docs())
+    df = cursor_to_df(collection.find({}, projection(['coin', 'px'])).sort('dateTime', 1), fields=['coin', 'px'],
+                      batch_size=3)
+    pd.testing.assert_frame_equal(df, pd.DataFrame(_docs(), columns=['coin', 'px']))
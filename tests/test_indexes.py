@@ -0,0 +1,107 @@
+import os
+from datetime import datetime
+
+import pytest
+
+os.environ.setdefault('MONGODB_CLIENT', 'mongodb://localhost:27017')
+os.environ.setdefault('RYO_DB', 'ryo_test_indexes')
+os.environ.setdefault('SLACK_KEY', '')
+
+mongomock = pytest.importorskip('mongomock')
+pymongo = pytest.importorskip('pymongo')
+
+from db_models import aum, backtest, balances, funding, modelperf, prices, settings, subred, trades  # noqa: E402
+from db_models.indexes import QUERY_SHAPES, check_query_plans, ensure_indexes  # noqa: E402
+
+DT = datetime(2020, 1, 10, 23, 59, 30)
+DOCS = {
+    'aum': [{'fund': 'FUND', 'dateTime': DT}],
+    'backtest': [{'strat': 'STRAT'}],
+    'balances': [{'strat': 'STRAT', 'dateTime': DT}],
+    'funding': [{'strat': 'STRAT', 'dateTime': DT}],
+    'fundperf': [{'fund': 'FUND', 'dateTime': DT}],
+    'modelperf': [{'strat': 'STRAT', 'dateTime': DT}],
+    'prices': [{'timeframe': '1h', 'dateTime': DT, 'coin': 'BTC'}],
+    'settings': [{'fund': 'FUND'}, {'strategy': 'STRAT'}, {'key': 'FUND_INFO'}, {'key': 'STRAT_INFO'},
+                 {'key': 'PUBLIC_PULLER'}],
+    'subred': [{'strat': 'STRAT', 'dateTime': DT}],
+    'trades': [{'strat': 'STRAT', 'dateTime': DT}],
+}
+
+# Each reader against the QUERY_SHAPES entry it must run, called with the shapes' sample arguments
+READERS = {
+    'aum.get_latest_aum_db': lambda: aum.get_latest_aum_db('FUND'),
+    'backtest.get_bt_db': lambda: backtest.get_bt_db('STRAT'),
+    'balances.get_latest_balances_db': lambda: balances.get_latest_balances_db('STRAT'),
+    'balances.get_balances_eod_db': lambda: balances.get_balances_eod_db(datetime(2020, 1, 1), datetime(2020, 2, 1),
+                                                                         'STRAT'),
+    'funding.get_funding_db': lambda: funding.get_funding_db('STRAT', ['dateTime']),
+    'modelperf.model_perf_db': lambda: modelperf.delete_all_model_perf_db('STRAT'),
+    'modelperf.get_model_perf_db': lambda: modelperf.get_model_perf_db(['STRAT', 'STRAT_2']),
+    'modelperf.get_latest_modelperf_db': lambda: modelperf.get_latest_modelperf_db('STRAT'),
+    'prices.get_prices_eod_db': lambda: prices.get_prices_eod_db(datetime(2020, 1, 1), datetime(2020, 2, 1)),
+    'settings.get_fund_info_db': lambda: settings.get_fund_info_db('FUND'),
+    'settings.get_all_fund_info_db': settings.get_all_fund_info_db,
+    'settings.get_strat_info_db': lambda: settings.get_strat_info_db('STRAT'),
+    'settings.get_all_strats_db': settings.get_all_strats_db,
+    'settings.get_public_puller_info': settings.get_public_puller_info,
+    'subred.get_subred_db': lambda: subred.get_subred_db('STRAT'),
+    'trades.get_trades_db_by_dt': lambda: trades.get_trades_db_by_dt('STRAT', datetime(2020, 1, 1),
+                                                                     datetime(2020, 2, 1)),
+    'trades.get_all_trades_db': lambda: trades.get_all_trades_db('STRAT'),
+}
+
+
+@pytest.fixture
+def recorded(monkeypatch):
+    """Readers pointed at a mongomock db holding DOCS, every find/aggregate/delete_many call recorded"""
+    db = mongomock.MongoClient()['ryo']
+    for name, docs in DOCS.items():
+        db[name].insert_many([dict(doc) for doc in docs])
+    for module in [aum, backtest, balances, funding, modelperf, prices, settings, subred, trades]:
+        monkeypatch.setattr(module, 'get_mongo_client', lambda: db)
+
+    # mongomock calls find itself from aggregate and delete_many, only the outer call is the reader's
+    calls, depth = [], [0]
+    for method in ['find', 'aggregate', 'delete_many']:
+        def spy(self, *args, _method=getattr(mongomock.Collection, method), **kwargs):
+            if not depth[0]:
+                calls.append(dict(kwargs, collection=self.name))
+            depth[0] += 1
+            try:
+                return _method(self, *args, **kwargs)
+            finally:
+                depth[0] -= 1
+        monkeypatch.setattr(mongomock.Collection, method, spy)
+    return calls
+
+
+@pytest.mark.parametrize('name', sorted(READERS))
+def test_readers_run_their_query_shape(recorded, name):
+    READERS[name]()
+    queries = [{key: value for key, value in call.items() if key != 'projection'} for call in recorded]
+    assert queries == [QUERY_SHAPES[name]]
+
+
+def _mongod():
+    client = pymongo.MongoClient(os.environ['MONGODB_CLIENT'], serverSelectionTimeoutMS=500)
+    try:
+        client.admin.command('ping')
+    except pymongo.errors.PyMongoError:
+        pytest.skip('no mongod at MONGODB_CLIENT')
+    return client
+
+
+def test_query_plans_use_indexes():
+    client = _mongod()
+    db = client['ryo_test_indexes']
+    try:
+        for name, docs in DOCS.items():
+            db[name].insert_many([dict(doc) for _ in range(50) for doc in docs])
+        ensure_indexes(db)
+        plans = check_query_plans(db)
+        assert set(plans) == set(QUERY_SHAPES)
+        assert all('IXSCAN' in stages for stages in plans.values()), plans
+    finally:
+        client.drop_database(db.name)
+        client.close()
@@ -0,0 +1,88 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from extlib import portfolio
+
+
+@pytest.fixture
+def panel():
+    """Hourly NAV of strategies with a late start, a 100 hour gap mid-day and scattered NaNs"""
+    rng = np.random.default_rng(7)
+    index = pd.date_range('2020-01-01', periods=24 * 400, freq=pd.Timedelta(hours=1))
+    nav = pd.DataFrame(np.exp(np.cumsum(rng.normal(0, 0.01, (len(index), 3)), axis=0)), index=index,
+                       columns=['FULL', 'LATE', 'GAPPY'])
+    nav.iloc[:24 * 30 + 5, 1] = np.nan
+    nav.iloc[24 * 50 + 7:24 * 50 + 107, 2] = np.nan
+    nav.iloc[rng.choice(len(index), 200, replace=False), 2] = np.nan
+    return nav
+
+
+def _alone(panel, col):
+    return panel[col].dropna().rename('nav')
+
+
+def test_batch_perf_stats_matches_the_scalar_functions(panel):
+    df = portfolio.batch_perf_stats(panel, timeframe='1H')
+    for col in panel.columns:
+        s = _alone(panel, col)
+        tot_ret = s.iloc[-1] / s.iloc[0] - 1
+        ann_ret = portfolio.annualised_return(tot_ret, len(s) - 1, '1H')
+        ann_vol = portfolio.annualised_vol(s.pct_change(), s.index[0], s.index[-1], '1H')
+        expected = dict({'tot_ret': tot_ret, 'periods': len(s) - 1, 'ann_ret': ann_ret, 'ann_vol': ann_vol,
+                         'sharpe': portfolio.sharpe_ratio(ann_ret, ann_vol), 'hwm': portfolio.high_water_mark(s),
+                         'max_dd': portfolio.max_drawdown(s)}, **portfolio.get_daily_stats(s))
+        for stat, value in expected.items():
+            assert df.loc[col, stat] == pytest.approx(value, rel=1e-9), (col, stat)
+
+
+def test_day_closing_on_nan_keeps_its_last_nav(panel):
+    s = _alone(panel, 'GAPPY')
+    assert np.isnan(panel['GAPPY'].iloc[24 * 50 + 23])
+    stats = portfolio.batch_daily_stats(panel[['GAPPY']]).loc['GAPPY']
+    assert stats['no_updays'] + stats['no_downdays'] == len(np.unique(s.index.date)) - 1
+
+
+def test_rolling_max_drawdown_matches_brute_force(panel):
+    nav = panel.iloc[:500].ffill().bfill()
+    for window in [1, 7, 24]:
+        expected = nav.rolling(window).apply(lambda w: (w / np.maximum.accumulate(w) - 1).min(), raw=True)
+        pd.testing.assert_frame_equal(portfolio.rolling_max_drawdown(nav, window), expected, atol=1e-12)
+
+
+def test_time_under_water():
+    nav = pd.Series([1, 2, 1.5, 1.8, 2.5, np.nan, 2.4], dtype=float)
+    np.testing.assert_array_equal(portfolio.time_under_water(nav).values, [0, 0, 1, 2, 0, np.nan, 2])
+
+
+def test_perf_tracker_matches_the_batch_stats_and_resumes(panel):
+    s = _alone(panel, 'GAPPY')
+    tracker = portfolio.PerfTracker()
+    for i, (ts, nav) in enumerate(s.items()):
+        if i == len(s) // 2:
+            tracker = portfolio.PerfTracker.from_dict({k: str(v) for k, v in tracker.to_dict().items()})
+        tracker.update(nav, ts)
+
+    stats = tracker.stats()
+    rets = s.pct_change()
+    assert stats['hwm'] == pytest.approx(portfolio.high_water_mark(s))
+    assert stats['max_dd'] == pytest.approx(portfolio.max_drawdown(s))
+    assert stats['ret_std'] == pytest.approx(rets.std())
+    for stat, value in portfolio.get_daily_stats(s).items():
+        assert stats[stat] == pytest.approx(value), stat
+
+
+def test_calendar_returns_are_month_end_to_month_end(panel):
+    daily = panel.groupby(panel.index.normalize()).last()
+    df = portfolio.calendar_returns(daily, 'M')
+    tables = portfolio.calendar_returns_json(daily, 'M')
+    for col in panel.columns:
+        s = _alone(daily, col)
+        month_ends = s[s.index == s.index + pd.offsets.MonthEnd(0)]
+        expected = month_ends / month_ends.shift(1) - 1
+        result, expected = df[col].dropna(), expected.dropna()
+        assert list(result.index.date) == list(expected.index.date)
+        np.testing.assert_allclose(result.values, expected.values, rtol=1e-12)
+        assert len(json.loads(tables[col])) == len(month_ends)
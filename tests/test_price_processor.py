@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from extlib.price_processor import OHLC_AGG, PriceProcessor, resample_panels
+
+PANELS = ['open', 'high', 'low', 'close', 'rets', 'std', 'exp_std']
+
+
+def _bars(coin, start, periods, seed):
+    """Hourly bars of one coin in the df_prices format"""
+    rng = np.random.default_rng(seed)
+    index = pd.date_range(start, periods=periods, freq=pd.Timedelta(hours=1))
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, periods)))
+    return pd.DataFrame({'open': close * (1 + rng.normal(0, 0.002, periods)), 'high': close * 1.01,
+                         'low': close * 0.99, 'close': close, 'coin': coin}, index=index)
+
+
+@pytest.fixture
+def df_prices():
+    """Three coins, one listing late and one with a missing day of bars"""
+    gappy = _bars('GAPPY', '2020-01-01', 24 * 40, 2)
+    gappy = gappy[(gappy.index < '2020-01-12') | (gappy.index >= '2020-01-13 05:00')]
+    return pd.concat([_bars('FULL', '2020-01-01', 24 * 40, 1), _bars('LATE', '2020-01-25 07:00', 24 * 15, 3), gappy])
+
+
+def per_coin_panels(df_prices, insts, timeframe, label, origin):
+    """The per-coin resample, concat and interpolate loops PriceProcessor used before resample_panels"""
+    panels = {}
+    for field, how in OHLC_AGG.items():
+        panel = pd.DataFrame()
+        for inst in insts:
+            _df = df_prices[df_prices['coin'] == inst][field].rename(inst)
+            _df = _df.resample(timeframe, label=label, origin=origin).agg(how)
+            panel = pd.concat([panel, _df], axis=1, sort=True)
+            panel.interpolate(inplace=True)
+        panels[field] = panel
+    return panels
+
+
+def _assert_panels_equal(result, expected):
+    for name in PANELS:
+        df, exp = getattr(result, f'df_{name}'), getattr(expected, f'df_{name}')
+        assert list(df.index) == list(exp.index), name
+        assert list(df.columns) == list(exp.columns), name
+        np.testing.assert_allclose(df.to_numpy(), exp.to_numpy(), rtol=1e-9, atol=1e-12, err_msg=name)
+
+
+@pytest.mark.parametrize('label', ['right', 'left'])
+def test_single_pass_panels_match_the_per_coin_loops(df_prices, label):
+    insts = ['FULL', 'LATE', 'GAPPY']
+    timeframe, origin = '1D', '2000-01-01 00:00:00'
+    panels = resample_panels(df_prices, insts, timeframe, label, origin)
+    expected = per_coin_panels(df_prices, insts, timeframe, label, origin)
+    for field in OHLC_AGG:
+        assert list(panels[field].index) == list(expected[field].index), field
+        np.testing.assert_allclose(panels[field].to_numpy(), expected[field][insts].to_numpy(), err_msg=field)
+
+
+def test_categorical_coins_give_the_same_panels(df_prices):
+    insts = ['FULL', 'LATE', 'GAPPY']
+    pp = PriceProcessor(insts, df_prices, 5, [0], lazy=False)
+    coded = df_prices.assign(coin=pd.Categorical(df_prices['coin'], categories=['LATE', 'OTHER', 'GAPPY', 'FULL']))
+    _assert_panels_equal(PriceProcessor(insts, coded, 5, [0]), pp)
+
+
+@pytest.mark.parametrize('hr_offset', [0, 5])
+def test_append_in_chunks_matches_a_fresh_processor(df_prices, hr_offset):
+    insts = ['FULL', 'LATE', 'GAPPY']
+    df_prices = df_prices.sort_index(kind='mergesort')
+    # Cuts land mid-bucket, inside the GAPPY gap, and before and after LATE first trades
+    cuts = [pd.Timestamp(ts) for ts in ['2020-01-10 13:00', '2020-01-12 18:00', '2020-01-20 02:00',
+                                        '2020-01-25 09:00', '2020-01-25 10:00', '2020-02-03 23:00']]
+    chunks = [df_prices[df_prices.index < cuts[0]]]
+    chunks += [df_prices[(df_prices.index >= st) & (df_prices.index < en)] for st, en in zip(cuts, cuts[1:])]
+    chunks.append(df_prices[df_prices.index >= cuts[-1]])
+
+    pp = PriceProcessor(insts, chunks[0], 7, [0], hr_offset=hr_offset)
+    assert pp.df_close['LATE'].isna().all()
+    for chunk in chunks[1:]:
+        pp.append(chunk)
+
+    expected = PriceProcessor(insts, df_prices, 7, [0], hr_offset=hr_offset, lazy=False)
+    _assert_panels_equal(pp, expected)
+
+
+def test_append_of_old_bars_adds_nothing(df_prices):
+    pp = PriceProcessor(['FULL', 'LATE', 'GAPPY'], df_prices, 7, [0])
+    close = pp.df_close.copy()
+    assert pp.append(df_prices[df_prices.index < '2020-01-05']) == 0
+    pd.testing.assert_frame_equal(pp.df_close, close)
@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from extlib import redis_prices
+from extlib.redis_prices import append_px_redis, last_px_ts, read_px_redis
+
+fakeredis = pytest.importorskip('fakeredis')
+
+
+def _bars(start, periods):
+    index = pd.date_range(start, periods=periods, freq=pd.Timedelta(hours=1))
+    return pd.DataFrame({field: np.arange(periods, dtype=float) for field in redis_prices.PX_FIELDS}, index=index)
+
+
+@pytest.fixture
+def server():
+    return fakeredis.FakeServer()
+
+
+@pytest.fixture
+def r(server):
+    return fakeredis.FakeRedis(server=server)
+
+
+def test_append_skips_stored_bars_across_months(r):
+    assert append_px_redis(_bars('2020-01-31 20:00', 6), 'BTCUSD', r=r) == 6
+    assert append_px_redis(_bars('2020-01-31 22:00', 6), 'BTCUSD', r=r) == 2
+    df = read_px_redis(['BTCUSD'], r=r)
+    assert len(df.index) == 8
+    assert df.index.is_monotonic_increasing and df.index.is_unique
+    assert last_px_ts('BTCUSD', r=r) == pd.Timestamp('2020-02-01 03:00').value // 10 ** 6
+
+
+def test_concurrent_append_is_retried_without_duplicates(r, server, monkeypatch):
+    append_px_redis(_bars('2020-01-01', 4), 'BTCUSD', r=r)
+    other = fakeredis.FakeRedis(server=server)
+    last_ts = redis_prices._last_ts
+    reads = []
+
+    def racing_last_ts(pipe, coin, timeframe, watch=False):
+        last = last_ts(pipe, coin, timeframe, watch)
+        reads.append(last)
+        if len(reads) == 1:
+            # Another writer appends the same bars between this read and the EXEC
+            monkeypatch.setattr(redis_prices, '_last_ts', last_ts)
+            append_px_redis(_bars('2020-01-01', 6), 'BTCUSD', r=other)
+            monkeypatch.setattr(redis_prices, '_last_ts', racing_last_ts)
+        return last
+
+    monkeypatch.setattr(redis_prices, '_last_ts', racing_last_ts)
+    assert append_px_redis(_bars('2020-01-01', 8), 'BTCUSD', r=r) == 2
+    assert len(reads) == 2 and reads[1] > reads[0]
+
+    df = read_px_redis(['BTCUSD'], r=r)
+    assert len(df.index) == 8
+    assert df.index.is_unique
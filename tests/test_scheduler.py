@@ -0,0 +1,79 @@
+import pandas as pd
+import pytest
+
+from extlib import binance, coinbase
+from extlib.bfx_v2 import RATE_LIMITS, BFXV2
+from extlib.scheduler import RateLimitScheduler
+from extlib.transport import SERVER_ERROR_STATUSES, build_session
+
+
+def test_auth_buckets_are_per_api_key():
+    scheduler = RateLimitScheduler(RATE_LIMITS)
+    a = BFXV2(key='key-a', secret='s', scheduler=scheduler)
+    b = BFXV2(key='key-b', secret='s', scheduler=scheduler)
+    assert a._bucket('v2/auth/r/wallets') == a._bucket('v2/auth/r/positions')
+    assert a._bucket('v2/auth/r/wallets') != b._bucket('v2/auth/r/wallets')
+    assert 'key-a' not in a._bucket('v2/auth/r/wallets')
+    assert BFXV2(scheduler=scheduler)._bucket('v2/candles/trade:1h:tBTCUSD/hist') == 'v2/candles'
+
+    for _ in range(RATE_LIMITS['auth']):
+        a._schedule('v2/auth/r/wallets')
+    b._schedule('v2/auth/r/wallets')
+    stats = a.scheduler_stats()
+    assert stats[a.auth_bucket]['calls'] == RATE_LIMITS['auth']
+    assert stats[b.auth_bucket]['queued'] == 0
+    assert scheduler.buckets[b.auth_bucket].capacity == RATE_LIMITS['auth']
+
+
+def test_weighted_calls_take_their_weight():
+    scheduler = RateLimitScheduler({'weight': (60, 10)})
+    assert scheduler.acquire('weight', weight=10) < 0.05
+    assert scheduler.buckets['weight'].tokens < 1
+    # 60 per minute refills 1 token a second, a call of weight 2 waits for about 2 of them
+    assert 1.5 < scheduler.acquire('weight', weight=2) < 3
+
+
+class _Response:
+    status_code = 200
+
+    def __init__(self, data):
+        self.data = data
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.data
+
+
+class _Session:
+
+    def __init__(self, data):
+        self.data = data
+        self.urls = []
+
+    def get(self, url, **kwargs):
+        self.urls.append(url)
+        return _Response(self.data)
+
+
+def test_candle_windows_are_rate_limited():
+    kline = [0, '1', '2', '0.5', '1.5', '10', 59999, '15', 3, '5', '7', '0']
+    scheduler = RateLimitScheduler(binance.RATE_LIMITS)
+    client = binance.Bin(session=_Session([kline]), scheduler=scheduler)
+    client.get_candles('BTCUSDT', '1h', start=pd.Timestamp('2020-01-01'), end=pd.Timestamp('2020-04-01'))
+    calls = len(client.session.urls)
+    assert calls == 3
+    assert scheduler.buckets['weight'].capacity - scheduler.buckets['weight'].tokens == pytest.approx(
+        calls * binance.WEIGHTS['v1/klines'], abs=0.5)
+
+    scheduler = RateLimitScheduler(coinbase.RATE_LIMITS)
+    client = coinbase.CoinBase(session=_Session([[0, 1, 2, 1, 1.5, 10]]), scheduler=scheduler)
+    client.get_candles('btc-usd', '2020-01-01', '2020-03-01', granularity=3600)
+    assert scheduler.stats()['public']['calls'] == len(client.session.urls) == 5
+
+
+def test_scheduled_sessions_do_not_resend_429():
+    session = build_session(statuses=SERVER_ERROR_STATUSES)
+    assert 429 not in session.get_adapter('https://api.binance.com/').max_retries.status_forcelist
+    assert 429 in build_session().get_adapter('https://api.binance.com/').max_retries.status_forcelist